@@ -1,14 +1,17 @@
 // --- KPI Cards Update ---
 function updateKPICards() {
+    // Figures come from /leads/stats when the lead store holds the leads
+    const stats = leadStoreStatsIfUsed();
     // Conversion Rate: hot leads / total leads
-    const totalLeads = leadsData.length;
-    const hotLeadsCount = leadsData.filter(l => l.intentScore >= 85).length;
+    const totalLeads = stats ? stats.total : leadsData.length;
+    const hotLeadsCount = stats ? stats.hot : leadsData.filter(l => l.intentScore >= 85).length;
     const conversionRate = totalLeads > 0 ? Math.round((hotLeadsCount / totalLeads) * 100) : 0;
     const kpiConversion = document.getElementById('kpiConversionRate');
     if (kpiConversion) kpiConversion.textContent = totalLeads ? conversionRate + '%' : '--%';
 
     // Pipeline Velocity: average intent score (or leads per week if you have date info)
-    const avgScore = totalLeads > 0 ? Math.round(leadsData.reduce((sum, l) => sum + (l.intentScore || 0), 0) / totalLeads) : 0;
+    const avgScore = stats ? Math.round(stats.averageIntentScore) :
+        totalLeads > 0 ? Math.round(leadsData.reduce((sum, l) => sum + (l.intentScore || 0), 0) / totalLeads) : 0;
     const kpiVelocity = document.getElementById('kpiPipelineVelocity');
     if (kpiVelocity) kpiVelocity.textContent = totalLeads ? avgScore : '--';
 
@@ -19,8 +22,9 @@ function updateKPICards() {
 // --- Analytics Rendering with Chart.js ---
 function renderAnalytics() {
     updateKPICards();
-    const totalLeads = leadsData.length;
-    const hotLeadsCount = leadsData.filter(l => l.intentScore >= 85).length;
+    const stats = leadStoreStatsIfUsed();
+    const totalLeads = stats ? stats.total : leadsData.length;
+    const hotLeadsCount = stats ? stats.hot : leadsData.filter(l => l.intentScore >= 85).length;
     const analyticsView = document.getElementById('analyticsView');
     if (!analyticsView) return;
     const cards = analyticsView.querySelectorAll('.card');
@@ -55,7 +59,8 @@ function renderAnalytics() {
     if (cards.length > 1) {
         const cardBody = cards[1].querySelector('.card__body');
         if (cardBody) {
-            const topLeads = leadsData.slice().sort((a, b) => b.intentScore - a.intentScore).slice(0, 5);
+            const topLeads = stats ? stats.topLeads :
+                leadsData.slice().sort((a, b) => b.intentScore - a.intentScore).slice(0, 5);
             cardBody.innerHTML = `<h3 style="font-size: var(--font-size-lg); font-weight: var(--font-weight-medium); margin-bottom: var(--space-8);">SDR Performance Overview</h3>
                 <p style="color: var(--color-text-secondary); margin-bottom: var(--space-16);">Top 5 Leads by Intent Score</p>
                 <canvas id="topLeadsChart" height="120"></canvas>`;
@@ -80,8 +85,8 @@ function renderAnalytics() {
     if (cards.length > 2) {
         const cardBody = cards[2].querySelector('.card__body');
         if (cardBody) {
-            const industryCounts = {};
-            leadsData.forEach(l => { industryCounts[l.industry] = (industryCounts[l.industry] || 0) + 1; });
+            const industryCounts = stats ? stats.industries : {};
+            if (!stats) leadsData.forEach(l => { industryCounts[l.industry] = (industryCounts[l.industry] || 0) + 1; });
             cardBody.innerHTML = `<h3 style="font-size: var(--font-size-lg); font-weight: var(--font-weight-medium); margin-bottom: var(--space-8);">Lead Source Breakdown</h3>
                 <p style="color: var(--color-text-secondary); margin-bottom: var(--space-16);">Industry Breakdown</p>
                 <canvas id="industryBreakdownChart" height="120"></canvas>`;
@@ -107,10 +112,44 @@ window.renderAnalytics = renderAnalytics;
 // Load leads from localStorage if available
 let leadsData = [];
 const LOCAL_STORAGE_KEY = 'leadconnect_leads';
+// Server-side lead store (ml_backend/leads_api.py). Once leads are held there,
+// localStorage only keeps LEAD_STORE_FLAG_KEY: the lead views query /leads
+// with their filters a page at a time, and the KPI cards and analytics use
+// /leads/stats, instead of holding every lead in memory.
+const LEAD_STORE_URL = 'http://localhost:5000/leads';
+const LEAD_STORE_FLAG_KEY = 'leadconnect_leads_in_store';
+// Leads sent per POST /leads during an import
+const LEAD_STORE_IMPORT_CHUNK = 5000;
+// Leads per /leads page, best intent score first; "Load more" fetches the next one
+const LEAD_STORE_PAGE_LIMIT = 500;
+// Latest /leads/stats figures (plus topLeads) while the store holds the leads
+let leadStoreStats = null;
+// Server-side paging per lead view: query, next_cursor, total matches and leads loaded so far
+const leadStorePages = { all: null, hot: null };
+
+function leadsInStore() {
+    try {
+        return localStorage.getItem(LEAD_STORE_FLAG_KEY) === '1';
+    } catch (e) {
+        return false;
+    }
+}
+
+function leadStoreStatsIfUsed() {
+    return leadsInStore() ? leadStoreStats : null;
+}
+
+// A lead shown on the dashboard, whether held in memory or on a loaded lead store page
+function findLoadedLead(predicate) {
+    return leadsData.find(predicate) || filteredLeads.find(predicate) || filteredHotLeads.find(predicate);
+}
+
 try {
     const stored = localStorage.getItem(LOCAL_STORAGE_KEY);
     if (stored) {
         leadsData = JSON.parse(stored);
+    } else if (leadsInStore()) {
+        leadsData = []; // lead views query the store a page at a time (queryLeadStore)
     } else {
         leadsData = [
             // ...existing code for default sample leads...
@@ -289,7 +328,9 @@ function createLeadCard(lead) {
     `;
 }
 
-function renderLeads(container, leads, countElement) {
+// more: for lead store pages, { total, loadMore } - total matches on the server
+// and, while more pages remain, a function fetching the next one
+function renderLeads(container, leads, countElement, more = null) {
     if (!container) return;
 
     // Determine view mode
@@ -448,6 +489,9 @@ function renderLeads(container, leads, countElement) {
                 <span style="margin:0 8px;">Page ${virtualization.currentPage + 1} of ${totalPages}</span>
                 <button class="page-btn" ${virtualization.currentPage === totalPages - 1 ? 'disabled' : ''} data-page="next">Next</button>
             </div>` : ''}
+            ${more && more.loadMore ? `<div class="pagination-controls" style="margin:16px 0;text-align:center;">
+                <button class="page-btn" data-page="more">Load more leads (${leads.length} of ${more.total} loaded)</button>
+            </div>` : ''}
         `;
         // Add event listeners to reasoning and delete buttons after rendering
         setTimeout(() => {
@@ -470,11 +514,15 @@ function renderLeads(container, leads, countElement) {
                     if (confirm('Are you sure you want to delete this lead?')) {
                         // Remove lead from leadsData
                         leadsData = leadsData.filter(l => l.id !== leadId);
+                        if (leadsInStore()) {
+                            deleteFromLeadStore(leadId).then(refreshFromLeadStore);
+                            return;
+                        }
                         hotLeads = leadsData.filter(l => l.intentScore >= 85);
                         filteredLeads = filterLeads(searchInput ? searchInput.value.toLowerCase().trim() : '', intentFilter ? intentFilter.value : '', industryFilter ? industryFilter.value : '', sizeFilter ? sizeFilter.value : '', false);
                         filteredHotLeads = filterLeads(hotSearchInput ? hotSearchInput.value.toLowerCase().trim() : '', '', hotIndustryFilter ? hotIndustryFilter.value : '', hotSizeFilter ? hotSizeFilter.value : '', true);
                         try {
-                            localStorage.setItem(LOCAL_STORAGE_KEY, JSON.stringify(leadsData));
+                            if (!leadsInStore()) localStorage.setItem(LOCAL_STORAGE_KEY, JSON.stringify(leadsData));
                         } catch (e) {}
                         renderLeads(container, filteredLeads, countElement);
                         updateHotLeadsView();
@@ -486,8 +534,10 @@ function renderLeads(container, leads, countElement) {
             // Pagination controls
             const prevBtn = container.querySelector('.page-btn[data-page="prev"]');
             const nextBtn = container.querySelector('.page-btn[data-page="next"]');
-            if (prevBtn) prevBtn.addEventListener('click', () => { virtualization.currentPage--; renderLeads(container, leads, countElement); });
-            if (nextBtn) nextBtn.addEventListener('click', () => { virtualization.currentPage++; renderLeads(container, leads, countElement); });
+            if (prevBtn) prevBtn.addEventListener('click', () => { virtualization.currentPage--; renderLeads(container, leads, countElement, more); });
+            if (nextBtn) nextBtn.addEventListener('click', () => { virtualization.currentPage++; renderLeads(container, leads, countElement, more); });
+            const moreBtn = container.querySelector('.page-btn[data-page="more"]');
+            if (moreBtn) moreBtn.addEventListener('click', () => { moreBtn.disabled = true; more.loadMore(); });
         }, 100);
     } else {
         // Card view (default, now grid)
@@ -500,6 +550,9 @@ function renderLeads(container, leads, countElement) {
                 <span style="margin:0 8px;">Page ${virtualization.currentPage + 1} of ${totalPages}</span>
                 <button class="page-btn" ${virtualization.currentPage === totalPages - 1 ? 'disabled' : ''} data-page="next">Next</button>
             </div>` : ''}
+            ${more && more.loadMore ? `<div class="pagination-controls" style="margin:16px 0;text-align:center;">
+                <button class="page-btn" data-page="more">Load more leads (${leads.length} of ${more.total} loaded)</button>
+            </div>` : ''}
         `;
         // Add event listeners to reasoning buttons after rendering
         setTimeout(() => {
@@ -515,13 +568,15 @@ function renderLeads(container, leads, countElement) {
             // Pagination controls
             const prevBtn = container.querySelector('.page-btn[data-page="prev"]');
             const nextBtn = container.querySelector('.page-btn[data-page="next"]');
-            if (prevBtn) prevBtn.addEventListener('click', () => { virtualization.currentPage--; renderLeads(container, leads, countElement); });
-            if (nextBtn) nextBtn.addEventListener('click', () => { virtualization.currentPage++; renderLeads(container, leads, countElement); });
+            if (prevBtn) prevBtn.addEventListener('click', () => { virtualization.currentPage--; renderLeads(container, leads, countElement, more); });
+            if (nextBtn) nextBtn.addEventListener('click', () => { virtualization.currentPage++; renderLeads(container, leads, countElement, more); });
+            const moreBtn = container.querySelector('.page-btn[data-page="more"]');
+            if (moreBtn) moreBtn.addEventListener('click', () => { moreBtn.disabled = true; more.loadMore(); });
         }, 100);
     }
 
     if (countElement) {
-        countElement.textContent = leads.length;
+        countElement.textContent = more ? more.total : leads.length;
     }
     // Error state: visually friendly error message (if present)
     const importStatus = document.getElementById('importStatus');
@@ -577,6 +632,10 @@ function updateAllLeadsView() {
     const industry = industryFilter ? industryFilter.value : '';
     const companySize = sizeFilter ? sizeFilter.value : '';
     
+    if (leadsInStore()) {
+        queryLeadStore('all', leadStoreParams(searchTerm, intentLevel, industry, companySize));
+        return;
+    }
     filteredLeads = filterLeads(searchTerm, intentLevel, industry, companySize, false);
     renderLeads(leadsContainer, filteredLeads, leadCountElement);
 }
@@ -586,12 +645,16 @@ function updateHotLeadsView() {
     const industry = hotIndustryFilter ? hotIndustryFilter.value : '';
     const companySize = hotSizeFilter ? hotSizeFilter.value : '';
     
+    if (leadsInStore()) {
+        queryLeadStore('hot', leadStoreParams(searchTerm, 'high', industry, companySize));
+        return;
+    }
     filteredHotLeads = filterLeads(searchTerm, '', industry, companySize, true);
     renderLeads(hotLeadsContainer, filteredHotLeads, hotLeadCountElement);
 }
 
 function showReasoning(leadId) {
-    const lead = leadsData.find(l => l.id === leadId);
+    const lead = findLoadedLead(l => l.id === leadId);
     if (!lead || !reasoningModal) return;
     
     const avatarColor = getAvatarColor(lead.id);
@@ -627,7 +690,7 @@ function showReasoning(leadId) {
     }
     
     if (reasoningInsights) {
-        reasoningInsights.innerHTML = lead.insights.map(insight => `<li>${insight}</li>`).join('');
+        reasoningInsights.innerHTML = (lead.insights || []).map(insight => `<li>${insight}</li>`).join('');
     }
     
     // Show modal
@@ -753,6 +816,7 @@ function initializeApp() {
     } else if (lastView === 'analyticsView') {
         renderAnalytics();
     }
+    refreshLeadStoreStats();
     
     // Navigation event listeners - using event delegation on the sidebar
     const sidebar = document.querySelector('.sidebar-nav');
@@ -884,8 +948,12 @@ function initializeApp() {
                 hotLeads = [];
                 filteredLeads = [];
                 filteredHotLeads = [];
+                deleteFromLeadStore();
+                leadStoreStats = null;
+                leadStorePages.all = leadStorePages.hot = null;
                 try {
                     localStorage.removeItem(LOCAL_STORAGE_KEY);
+                    localStorage.removeItem(LEAD_STORE_FLAG_KEY);
                 } catch (e) {}
                 updateAllLeadsView();
                 updateHotLeadsView();
@@ -992,6 +1060,158 @@ window.getLeadScoreFromAPI = async function(lead) {
     }
 };
 
+// Batch variant used by the import flow: one POST /score/batch per chunk of
+// leads instead of one POST /score per lead. Results come back in input order.
+window.getLeadScoresFromAPI = async function(leads) {
+    if (typeof predictLeadScores === 'function') {
+        // Array-format ml_model.js scores a whole batch with one reused feature buffer
+        try {
+            return predictLeadScores(leads.map(lead => ({
+                'title': lead.title,
+                'industry': lead.industry,
+                'companySize': lead.companySize,
+                'pageViews': lead.pageViews,
+                'downloads': lead.downloads,
+                'webinarAttended': lead.webinarAttended ? 1 : 0
+            })));
+        } catch (e) {
+            console.warn('JavaScript ML batch scoring failed, trying API fallback:', e.message);
+        }
+    } else if (typeof predictLeadScore === 'function') {
+        return Promise.all(leads.map(lead => window.getLeadScoreFromAPI(lead)));
+    }
+    const payload = leads.map(lead => ({
+        'Title': lead.title,
+        'Industry': lead.industry,
+        'Company Size': lead.companySize,
+        'Page Views': lead.pageViews,
+        'Downloads': lead.downloads,
+        'Webinar Attended': lead.webinarAttended ? 1 : 0
+    }));
+    try {
+        const res = await fetch('http://localhost:5000/score/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ leads: payload })
+        });
+        if (!res.ok) throw new Error(`ML API error: ${res.status}`);
+        const data = await res.json();
+        // Rows the API rejected fall back to rule-based scoring individually
+        return data.results.map((result, i) => result.error ? generateFallbackScore(leads[i]) : result);
+    } catch (e) {
+        console.warn('Batch ML API unavailable, using rule-based fallback:', e.message);
+        return leads.map(lead => generateFallbackScore(lead));
+    }
+};
+
+// Save imported leads to the server-side store in chunks; returns their ids in
+// order, or null if the store is unavailable
+window.saveLeadsToStore = async function(leads) {
+    const ids = [];
+    try {
+        for (let i = 0; i < leads.length; i += LEAD_STORE_IMPORT_CHUNK) {
+            const res = await fetch(LEAD_STORE_URL, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ leads: leads.slice(i, i + LEAD_STORE_IMPORT_CHUNK) })
+            });
+            if (!res.ok) throw new Error(`Lead store error: ${res.status}`);
+            ids.push(...(await res.json()).ids);
+        }
+        return ids;
+    } catch (e) {
+        console.warn('Lead store unavailable, keeping leads in localStorage:', e.message);
+        return null;
+    }
+};
+
+// /leads query for the dashboard filters; intent levels map to intentScore bounds
+function leadStoreParams(searchTerm, intentLevel, industry, companySize) {
+    const params = new URLSearchParams({ limit: LEAD_STORE_PAGE_LIMIT });
+    if (intentLevel === 'high') params.set('min_score', 85);
+    if (intentLevel === 'warm') { params.set('min_score', 60); params.set('max_score', 84); }
+    if (intentLevel === 'cold') params.set('max_score', 59);
+    if (industry) params.set('industry', industry);
+    if (companySize) params.set('company_size', companySize);
+    if (searchTerm) params.set('search', searchTerm);
+    return params;
+}
+
+// Show the first page of a lead view's store query, or with loadMore append the next page
+async function queryLeadStore(view, params, loadMore = false) {
+    const isHot = view === 'hot';
+    const container = isHot ? hotLeadsContainer : leadsContainer;
+    const countElement = isHot ? hotLeadCountElement : leadCountElement;
+    const page = loadMore ? leadStorePages[view] : { params, cursor: null, total: 0, leads: [] };
+    if (!loadMore) leadStorePages[view] = page;
+    const query = new URLSearchParams(page.params);
+    if (loadMore) query.set('cursor', page.cursor);
+    else query.set('count', '1');
+    try {
+        const res = await fetch(`${LEAD_STORE_URL}?${query}`);
+        if (!res.ok) throw new Error(`Lead store error: ${res.status}`);
+        const result = await res.json();
+        // A newer query (filters changed while this one was in flight) owns the view
+        if (leadStorePages[view] !== page) return;
+        if (!loadMore) virtualization.currentPage = 0;
+        else virtualization.currentPage = Math.floor(page.leads.length / virtualization.pageSize);
+        page.leads = page.leads.concat(result.leads);
+        page.cursor = result.next_cursor;
+        if (result.total !== undefined) page.total = result.total;
+    } catch (e) {
+        console.warn('Could not query the lead store:', e.message);
+        if (leadStorePages[view] !== page) return;
+    }
+    if (isHot) {
+        filteredHotLeads = page.leads;
+        window.filteredHotLeads = filteredHotLeads;
+    } else {
+        filteredLeads = page.leads;
+        window.filteredLeads = filteredLeads;
+    }
+    renderLeads(container, page.leads, countElement, {
+        total: page.total,
+        loadMore: page.cursor ? () => queryLeadStore(view, null, true) : null
+    });
+}
+
+// Refresh the KPI cards and analytics from /leads/stats and the top leads
+async function refreshLeadStoreStats() {
+    if (!leadsInStore()) return;
+    try {
+        const [statsRes, topRes] = await Promise.all([
+            fetch(`${LEAD_STORE_URL}/stats`),
+            fetch(`${LEAD_STORE_URL}?limit=5`)
+        ]);
+        if (!statsRes.ok || !topRes.ok) throw new Error(`Lead store error: ${statsRes.status}/${topRes.status}`);
+        leadStoreStats = { ...(await statsRes.json()), topLeads: (await topRes.json()).leads };
+    } catch (e) {
+        console.warn('Could not load lead store stats:', e.message);
+        return;
+    }
+    if (typeof renderAnalytics === 'function') renderAnalytics();
+    else updateKPICards();
+}
+
+// Query both lead views and the stats again after the store changed
+function refreshFromLeadStore() {
+    updateAllLeadsView();
+    updateHotLeadsView();
+    refreshLeadStoreStats();
+}
+
+// Mirror a deleted lead (or, without an id, clearing every lead) into the lead store
+function deleteFromLeadStore(leadId) {
+    if (!leadsInStore()) return Promise.resolve();
+    const url = leadId === undefined ? `${LEAD_STORE_URL}?all=1` : `${LEAD_STORE_URL}/${leadId}`;
+    return fetch(url, { method: 'DELETE' })
+        .then(res => {
+            // Clearing the whole store is an admin action (localhost, or LEAD_ADMIN_TOKEN)
+            if (!res.ok) console.warn(`Lead store delete refused: ${res.status}`);
+        })
+        .catch(e => console.warn('Lead store delete failed:', e.message));
+}
+
 // Fallback scoring function when ML API is unavailable
 function generateFallbackScore(lead) {
     let score = 0.3; // Base score
@@ -1243,13 +1463,9 @@ function initializeImportForm() {
             leadsContainer.dataset.loading = 'true';
             renderLeads(leadsContainer, [], leadCountElement);
         }
-        // Dynamic AI explanation generator
-        function scoreAndExplain(lead) {
-            return window.getLeadScoreFromAPI(lead);
-        }
-        // Fast parallel ML scoring for all leads with concurrency limit
+        // Fast ML scoring for all leads, one batch request per chunk
         (async () => {
-            const CONCURRENCY_LIMIT = 20; // Number of parallel requests
+            const SCORE_BATCH_SIZE = 500; // Leads per /score/batch request
             const leads = [];
             let errorOccurred = false;
 
@@ -1337,13 +1553,14 @@ function initializeImportForm() {
 
             // Helper for concurrency
             async function processBatch(batch) {
-                return await Promise.allSettled(batch.map(async (lead) => {
-                    let ai;
-                    try {
-                        ai = await scoreAndExplain(lead);
-                    } catch (apiErr) {
-                        ai = null;
-                    }
+                let aiResults;
+                try {
+                    aiResults = await window.getLeadScoresFromAPI(batch);
+                } catch (apiErr) {
+                    aiResults = [];
+                }
+                return await Promise.allSettled(batch.map(async (lead, i) => {
+                    const ai = aiResults[i];
                     if (!ai || typeof ai.score === 'undefined' || ai.error) {
                         return {
                             ...lead,
@@ -1431,7 +1648,7 @@ function initializeImportForm() {
             // Main batching loop
             let idx = 0;
             while (idx < allLeadObjs.length) {
-                const batch = allLeadObjs.slice(idx, idx + CONCURRENCY_LIMIT);
+                const batch = allLeadObjs.slice(idx, idx + SCORE_BATCH_SIZE);
                 const results = await processBatch(batch);
                 results.forEach(res => {
                     if (res.status === 'fulfilled') {
@@ -1442,22 +1659,37 @@ function initializeImportForm() {
                         leads.push(res);
                     }
                 });
-                idx += CONCURRENCY_LIMIT;
+                idx += SCORE_BATCH_SIZE;
                 if (importStatus) importStatus.textContent = `Imported ${leads.length} of ${allLeadObjs.length} leads...`;
             }
 
             console.log('Fast import complete. Leads processed:', leads.length, 'Errors:', errorOccurred);
 
             if (!errorOccurred && leads.length > 0) {
-                leadsData.push(...leads);
-                // Persist to localStorage
+                // The first import that reaches the lead store also moves the leads kept so far in localStorage
+                const toStore = leadsInStore() ? leads : leadsData.concat(leads);
+                const storedIds = await window.saveLeadsToStore(toStore);
+                if (storedIds) toStore.forEach((lead, i) => { lead.id = storedIds[i]; });
+                // Stored leads are read back a page at a time, so only keep them in memory without the store
+                if (storedIds) leadsData = [];
+                else leadsData.push(...leads);
+                // Persist to the lead store, or to localStorage when the API is unavailable
                 try {
-                    localStorage.setItem(LOCAL_STORAGE_KEY, JSON.stringify(leadsData));
+                    if (storedIds) {
+                        localStorage.setItem(LEAD_STORE_FLAG_KEY, '1');
+                        localStorage.removeItem(LOCAL_STORAGE_KEY);
+                    } else if (!leadsInStore()) {
+                        localStorage.setItem(LOCAL_STORAGE_KEY, JSON.stringify(leadsData));
+                    }
                 } catch (e) {
                     console.warn('Failed to save leads to localStorage:', e);
                 }
                 if (importStatus) importStatus.textContent = `Successfully imported ${leads.length} leads!`;
                 setTimeout(() => {
+                    if (leadsInStore()) {
+                        refreshFromLeadStore();
+                        return;
+                    }
                     updateAllLeadsView();
                     hotLeads = leadsData.filter(lead => lead.intentScore >= 85);
                     updateHotLeadsView();
@@ -1498,7 +1730,7 @@ function initializeImportForm() {
         if (e.target.id === 'feedbackYes' || e.target.id === 'feedbackNo') {
             const isCorrect = e.target.id === 'feedbackYes';
             const leadName = document.getElementById('reasoningLeadName').textContent;
-            const lead = leadsData.find(l => l.contact === leadName);
+            const lead = findLoadedLead(l => l.contact === leadName);
             if (lead) {
                 fetch('http://localhost:5000/feedback', {
                     method: 'POST',
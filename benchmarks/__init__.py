@@ -0,0 +1,8 @@
+"""
+Reproducible performance benchmarks for training, export and the scoring API.
+
+    python -m benchmarks.synthetic_leads --rows 100k    # write a synthetic CSV
+    python -m benchmarks.run --rows 5k                  # run and compare to the baseline
+
+See benchmarks/run.py for the benchmark list and the result format.
+"""
@@ -0,0 +1,459 @@
+"""
+Run the performance benchmarks and compare them with a stored baseline.
+
+Every benchmark runs on a synthetic CSV (benchmarks/synthetic_leads.py) of
+the requested size, against a throwaway feature cache, model directory and
+feedback file, so runs are reproducible and never touch trained_model/:
+
+    preprocess    cold CSV -> feature store build, and a warm cache load
+    train         MODEL_CONFIG forest fit on the sparse training matrix
+    cv            5-fold cross_val_score, as in train_and_export_model.py
+    js_export     ml_model.js render time and size, both formats
+    js_eval       ml_model.js load and per-lead scoring time in node (skipped without node)
+    score_single  POST /score through the Flask test client
+    score_batch   POST /score/batch through the Flask test client
+    feedback      POST /feedback, plus the time to flush the queue to disk
+
+Results are written as JSON. With a baseline for the same row count (see
+--save-baseline), each metric is compared with it and the run exits with
+status 1 when any metric got worse by more than --tolerance.
+
+Usage:
+    python -m benchmarks.run [--rows 5k] [--only train,score_single] [--repeat 3]
+                             [--requests 200] [--explain shap|path|none]
+                             [--baseline PATH] [--save-baseline] [--tolerance 0.15]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import cross_val_score
+
+from benchmarks.synthetic_leads import DEFAULT_DATA_DIR, parse_rows, synthetic_leads_csv
+from js_model_export import JS_FORMATS, render_js_model
+from train_and_export_model import MODEL_CONFIG
+
+from ml_backend.feature_store import load_features, rss_mb
+from ml_backend.model_artifacts import DROP_COLUMNS, build_feature_schema, save_artifacts
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'ml_backend')
+# Stored baselines, one per row count: benchmarks/baselines/<rows>.json
+BASELINE_DIR = os.path.join(BENCHMARK_DIR, 'baselines')
+# Leads per /score/batch request
+BATCH_SIZE = 100
+# Untimed requests sent before each API benchmark
+WARMUP_REQUESTS = 5
+
+# Metric name suffixes where a larger value is an improvement; all other
+# numeric metrics (seconds, ms, bytes, MB) are better when smaller
+HIGHER_IS_BETTER = ('_per_second', 'accuracy')
+# Metrics that describe the run rather than its performance
+INFORMATIONAL = ('rows', 'requests', 'leads', 'batch_size', 'n_nodes', 'rss_mb', 'written')
+
+
+def percentiles(timings):
+    """p50/p95/p99 and mean of a list of durations in seconds, as milliseconds"""
+    ms = np.asarray(timings) * 1000
+    return {
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
+
+
+def timed(func, repeat=1):
+    """Run func repeat times; returns (median seconds, last result)"""
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+class BenchmarkContext:
+    """
+    Data, model and scratch directories shared by the benchmarks of one run
+
+    Features, the trained model and the API app are created on first use,
+    so any subset of benchmarks can run on its own.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.n_rows = parse_rows(args.rows)
+        self.data_path = synthetic_leads_csv(self.n_rows, args.seed, args.data_dir)
+        self.work_dir = tempfile.mkdtemp(prefix='lead-bench-')
+        self.cache_dir = os.path.join(self.work_dir, 'feature_cache')
+        self.model_dir = os.path.join(self.work_dir, 'model')
+        self._features = None
+        self._model = None
+        self._api = None
+        self._leads = None
+
+    def close(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def features(self):
+        if self._features is None:
+            self._features = load_features(self.data_path, cache_dir=self.cache_dir)
+        return self._features
+
+    def model(self):
+        if self._model is None:
+            features = self.features()
+            self._model = RandomForestClassifier(**{**MODEL_CONFIG, 'n_jobs': self.args.jobs})
+            self._model.fit(features.X_sparse, features.y)
+        return self._model
+
+    def leads(self):
+        """Lead dicts as the dashboard posts them, in CSV order"""
+        if self._leads is None:
+            n = max(self.args.requests * 5, self.args.requests // 10 * BATCH_SIZE) + WARMUP_REQUESTS
+            frame = pd.read_csv(self.data_path, nrows=n).drop(DROP_COLUMNS, axis=1)
+            self._leads = frame.to_dict('records')
+        return self._leads
+
+    def api(self):
+        """ml_api imported against this run's model and feedback file"""
+        if self._api is None:
+            features = self.features()
+            schema = build_feature_schema(features.encoder, self.data_path, features.data_hash)
+            save_artifacts(self.model(), schema, self.model_dir)
+            os.environ.update({
+                'LEAD_MODEL_DIR': self.model_dir,
+                'LEAD_FEEDBACK_PATH': os.path.join(self.work_dir, 'feedback.csv'),
+                'LEAD_API_CACHE_SIZE': str(self.args.score_cache),
+                'LEAD_API_MAX_BATCH': str(max(BATCH_SIZE, 1000)),
+                'LEAD_MODEL_WATCH_SECONDS': '0',
+            })
+            os.environ.pop('LEAD_FEEDBACK_JSONL', None)
+            os.environ.pop('LEAD_API_TRAIN', None)
+            sys.path.insert(0, BACKEND_DIR)
+            import ml_api
+            self._api = ml_api
+        return self._api
+
+    def score_url(self, path):
+        return path if self.args.explain is None else f"{path}?explain={self.args.explain}"
+
+
+def bench_preprocess(ctx):
+    # Cold: parse, fit the vocabularies and write a fresh entry; warm: memory-map it back
+    cold, features = timed(
+        lambda: load_features(ctx.data_path, cache_dir=ctx.cache_dir, rebuild=True), ctx.args.repeat,
+    )
+    warm, _ = timed(lambda: load_features(ctx.data_path, cache_dir=ctx.cache_dir), ctx.args.repeat)
+    ctx._features = features
+    return {
+        'rows': len(features),
+        'cold_seconds': cold,
+        'warm_seconds': warm,
+        'rows_per_second': len(features) / cold,
+        'feature_bytes': int(features.nbytes),
+        'rss_mb': rss_mb(),
+    }
+
+
+def bench_train(ctx):
+    features = ctx.features()
+    config = {**MODEL_CONFIG, 'n_jobs': ctx.args.jobs}
+    seconds, model = timed(
+        lambda: RandomForestClassifier(**config).fit(features.X_sparse, features.y), ctx.args.repeat,
+    )
+    ctx._model = model
+    return {
+        'rows': len(features),
+        'seconds': seconds,
+        'rows_per_second': len(features) / seconds,
+        'n_nodes': int(sum(est.tree_.node_count for est in model.estimators_)),
+        'rss_mb': rss_mb(),
+    }
+
+
+def bench_cv(ctx):
+    features = ctx.features()
+    model = RandomForestClassifier(**MODEL_CONFIG)
+    seconds, scores = timed(lambda: cross_val_score(
+        model, features.X_sparse, features.y, cv=5, scoring='accuracy', n_jobs=ctx.args.jobs,
+    ))
+    return {'seconds': seconds, 'accuracy': float(scores.mean())}
+
+
+def bench_js_export(ctx):
+    model, features = ctx.model(), ctx.features()
+    result = {}
+    for js_format in JS_FORMATS:
+        seconds, js = timed(lambda: render_js_model(
+            model, features.columns, js_format, encodings=features.encoder.encodings,
+        ), ctx.args.repeat)
+        result[f'{js_format}_seconds'] = seconds
+        result[f'{js_format}_bytes'] = len(js.encode('utf-8'))
+    return result
+
+
+_NODE_EVAL_JS = """
+const start = process.hrtime.bigint();
+const model = require(process.argv[1]);
+const loaded = process.hrtime.bigint();
+const leads = require(process.argv[2]);
+const single = [];
+for (const lead of leads) {
+  const t = process.hrtime.bigint();
+  model.predictLeadScores([lead]);
+  single.push(Number(process.hrtime.bigint() - t) / 1e6);
+}
+const t = process.hrtime.bigint();
+model.predictLeadScores(leads);
+const batch = Number(process.hrtime.bigint() - t) / 1e6;
+console.log(JSON.stringify({load_ms: Number(loaded - start) / 1e6, single, batch_ms: batch}));
+"""
+
+
+def bench_js_eval(ctx):
+    node = shutil.which('node')
+    if node is None:
+        return {'skipped': 'node not found'}
+    model, features = ctx.model(), ctx.features()
+    model_path = os.path.join(ctx.work_dir, 'ml_model.js')
+    leads_path = os.path.join(ctx.work_dir, 'leads.json')
+    with open(model_path, 'w') as f:
+        f.write(render_js_model(model, features.columns, 'arrays', encodings=features.encoder.encodings))
+    # The dashboard fills intentScore from the model, so the JS never reads Intent Score
+    leads = [{k: v for k, v in lead.items() if k != 'Intent Score'}
+             for lead in ctx.leads()[:ctx.args.requests]]
+    with open(leads_path, 'w') as f:
+        json.dump(leads, f)
+    out = subprocess.run([node, '-e', _NODE_EVAL_JS, model_path, leads_path],
+                         capture_output=True, text=True, check=True)
+    timings = json.loads(out.stdout)
+    single = percentiles(np.asarray(timings['single'][WARMUP_REQUESTS:]) / 1000)
+    return {
+        'leads': len(leads),
+        'load_ms': timings['load_ms'],
+        **{f'single_{k}': v for k, v in single.items()},
+        'batch_leads_per_second': len(leads) / (timings['batch_ms'] / 1000),
+    }
+
+
+def _post_timings(client, url, payloads):
+    timings = []
+    for payload in payloads:
+        start = time.perf_counter()
+        response = client.post(url, json=payload)
+        timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}: {response.get_data(as_text=True)}")
+    return timings
+
+
+def bench_score_single(ctx):
+    client = ctx.api().app.test_client()
+    leads = ctx.leads()
+    url = ctx.score_url('/score')
+    _post_timings(client, url, leads[:WARMUP_REQUESTS])
+    timings = _post_timings(client, url, leads[WARMUP_REQUESTS:WARMUP_REQUESTS + ctx.args.requests])
+    return {
+        'requests': len(timings),
+        **percentiles(timings),
+        'requests_per_second': len(timings) / sum(timings),
+    }
+
+
+def bench_score_batch(ctx):
+    client = ctx.api().app.test_client()
+    leads = ctx.leads()[WARMUP_REQUESTS:]
+    batches = [{'leads': leads[i:i + BATCH_SIZE]} for i in range(0, len(leads), BATCH_SIZE)]
+    batches = [b for b in batches if len(b['leads']) == BATCH_SIZE][:max(1, ctx.args.requests // 10)]
+    url = ctx.score_url('/score/batch')
+    _post_timings(client, url, batches[:1])
+    timings = _post_timings(client, url, batches)
+    return {
+        'requests': len(timings),
+        'batch_size': BATCH_SIZE,
+        **percentiles(timings),
+        'leads_per_second': len(timings) * BATCH_SIZE / sum(timings),
+    }
+
+
+def bench_feedback(ctx):
+    api = ctx.api()
+    client = api.app.test_client()
+    records = [
+        {'id': i, 'contact': f'lead{i}', 'company': lead['Company'], 'title': lead['Title'],
+         'industry': lead['Industry'], 'companySize': lead['Company Size'],
+         'pageViews': lead['Page Views'], 'downloads': lead['Downloads'],
+         'webinarAttended': lead['Webinar Attended'], 'intentScore': lead['Intent Score'],
+         'correct': i % 2 == 0}
+        for i, lead in enumerate(ctx.leads()[:ctx.args.requests * 5])
+    ]
+    timings = _post_timings(client, '/feedback', records)
+    # The sink writes in the background; closing it waits for the queue to reach disk
+    flush_seconds, _ = timed(api.feedback_sink.close)
+    return {
+        'requests': len(timings),
+        **percentiles(timings),
+        'requests_per_second': len(timings) / sum(timings),
+        'flush_seconds': flush_seconds,
+        'written': api.feedback_sink.written,
+    }
+
+
+BENCHMARKS = {
+    'preprocess': bench_preprocess,
+    'train': bench_train,
+    'cv': bench_cv,
+    'js_export': bench_js_export,
+    'js_eval': bench_js_eval,
+    'score_single': bench_score_single,
+    'score_batch': bench_score_batch,
+    'feedback': bench_feedback,
+}
+
+
+def run_metadata(args, n_rows):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'rows': n_rows,
+        'seed': args.seed,
+        'jobs': args.jobs,
+        'explain': args.explain,
+        'score_cache': args.score_cache,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__, 'scikit-learn': sklearn.__version__},
+    }
+
+
+def compare_results(results, baseline, tolerance):
+    """
+    Per-metric change against a baseline run
+
+    Returns:
+        list: {benchmark, metric, baseline, current, change, regression} for
+            every numeric metric present in both runs; change is relative
+            and positive when the metric got worse
+    """
+    rows = []
+    for name, metrics in results.items():
+        for metric, current in metrics.items():
+            previous = baseline.get('results', {}).get(name, {}).get(metric)
+            if (not isinstance(current, (int, float)) or not isinstance(previous, (int, float))
+                    or metric in INFORMATIONAL or previous == 0):
+                continue
+            change = (current - previous) / abs(previous)
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = -change
+            rows.append({
+                'benchmark': name, 'metric': metric, 'baseline': previous, 'current': current,
+                'change': change, 'regression': change > tolerance,
+            })
+    return rows
+
+
+def format_comparison(rows, tolerance):
+    lines = [f"{'benchmark':<14}{'metric':<30}{'baseline':>14}{'current':>14}{'change':>9}"]
+    for r in rows:
+        flag = '  REGRESSION' if r['regression'] else ''
+        lines.append(f"{r['benchmark']:<14}{r['metric']:<30}{r['baseline']:>14.4g}{r['current']:>14.4g}"
+                     f"{r['change']:>+9.1%}{flag}")
+    regressions = sum(r['regression'] for r in rows)
+    lines.append(f"\n{regressions} regression(s) beyond {tolerance:.0%} (positive change = worse)")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='5k', help="synthetic CSV size, e.g. 5k, 100k, 1M")
+    parser.add_argument('--seed', type=int, default=42, help="synthetic data seed")
+    parser.add_argument('--only', default=None,
+                        help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per preprocess/train/export benchmark (median is reported)")
+    parser.add_argument('--requests', type=int, default=200,
+                        help="timed /score requests; batch and feedback counts scale from it")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="processes for training and cross-validation (-1 = all cores)")
+    parser.add_argument('--explain', default=None,
+                        help="explanation engine for /score (default: the API's LEAD_API_EXPLAIN)")
+    parser.add_argument('--score-cache', type=int, default=0,
+                        help="API score cache size (default 0, so every request is scored)")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="where synthetic CSVs are cached")
+    parser.add_argument('--output', default=None,
+                        help="results JSON (default: <data-dir>/results_<rows>.json)")
+    parser.add_argument('--baseline', default=None,
+                        help="baseline JSON to compare with (default: benchmarks/baselines/<rows>.json)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="also store these results as the baseline for this row count")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="relative slowdown flagged as a regression (default 0.15 = 15%%)")
+    args = parser.parse_args(argv)
+    args.selected = list(BENCHMARKS) if args.only is None else [n.strip() for n in args.only.split(',')]
+    unknown = [n for n in args.selected if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    ctx = BenchmarkContext(args)
+    results = {}
+    try:
+        for name in args.selected:
+            print(f"\nRunning {name} on {ctx.n_rows} rows...")
+            results[name] = BENCHMARKS[name](ctx)
+            print(json.dumps(results[name], indent=2))
+    finally:
+        ctx.close()
+
+    report = {'meta': run_metadata(args, ctx.n_rows), 'results': results}
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f'{ctx.n_rows}.json')
+    regressions = 0
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        report['baseline'] = {'path': baseline_path, 'meta': baseline.get('meta')}
+        report['comparison'] = compare_results(results, baseline, args.tolerance)
+        regressions = sum(r['regression'] for r in report['comparison'])
+        print(f"\nCompared with {baseline_path}:")
+        print(format_comparison(report['comparison'], args.tolerance))
+    else:
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to create one")
+
+    output = args.output or os.path.join(args.data_dir, f'results_{ctx.n_rows}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to: {output}")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump({'meta': report['meta'], 'results': results}, f, indent=2)
+        print(f"Baseline saved to: {baseline_path}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Synthetic leads with the schema and distributions of small file.csv.
+
+The real CSV has 5,000 rows, which is too small to show how preprocessing,
+training or scoring scale. The generator keeps the same columns and
+roughly the same marginals: near-uniform Title and Industry, Poisson page
+views and downloads, about 15% webinar attendance, an Intent Score driven
+by engagement, about 14% conversions, and a Company column where most rows
+have a unique company. Output is deterministic for a given seed and row
+count, and is written in chunks, so millions of rows fit in bounded memory.
+
+Usage:
+    python -m benchmarks.synthetic_leads --rows 1M [--seed 42] [--output leads.csv]
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Category pools and weights observed in small file.csv
+TITLES = ['CTO', 'Marketing Manager', 'HR Manager', 'CEO', 'Product Manager', 'Data Analyst', 'Sales Director']
+INDUSTRIES = ['Technology', 'Retail', 'Education', 'Healthcare', 'Manufacturing', 'Energy', 'Finance']
+COMPANY_SIZES = ['Small Business', 'Enterprise', 'Mid-Market']
+COMPANY_SIZE_WEIGHTS = [0.373, 0.370, 0.257]
+COLUMNS = [
+    'Name', 'Company', 'Title', 'Industry', 'Company Size', 'Email', 'Website',
+    'Page Views', 'Downloads', 'Webinar Attended', 'Intent Score', 'Converted',
+]
+# Company pool size per row; drawing from 5x the rows gives ~91% distinct
+# companies, as in small file.csv (4,546 companies in 5,000 rows)
+COMPANY_RATIO = 5
+# Rows generated and written per chunk
+CHUNK_ROWS = 100_000
+# Generated CSVs are cached here, keyed on row count and seed
+DEFAULT_DATA_DIR = os.getenv('LEAD_BENCH_DATA', '.benchmark_data')
+
+_FIRST = ['Pamela', 'Tracy', 'Paul', 'Glen', 'Maria', 'James', 'Aisha', 'Wei', 'Carlos', 'Nina']
+_LAST = ['Howard', 'Turner', 'Crawford', 'Cooper', 'Lopez', 'Smith', 'Khan', 'Chen', 'Silva', 'Ivanova']
+_SUFFIXES = ['Inc', 'LLC', 'Group', 'and Sons', 'Ltd']
+
+
+def parse_rows(text):
+    """Row count from '5000', '5k', '100k' or '1M'"""
+    text = str(text).strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def generate_chunk(rng, start, n_rows, n_companies):
+    """
+    One DataFrame of synthetic leads
+
+    Args:
+        rng: numpy Generator; chunks drawn in order from one generator are reproducible
+        start: Index of the first row, used for names and emails
+        n_rows: Rows in this chunk
+        n_companies: Size of the company pool shared by all chunks
+    """
+    ids = np.arange(start, start + n_rows)
+    first = np.array(_FIRST)[rng.integers(len(_FIRST), size=n_rows)]
+    last = np.array(_LAST)[rng.integers(len(_LAST), size=n_rows)]
+    company_ids = rng.integers(n_companies, size=n_rows)
+
+    page_views = rng.poisson(10, n_rows)
+    downloads = rng.poisson(2, n_rows)
+    webinar = (rng.random(n_rows) < 0.15).astype(np.int8)
+    intent = np.clip(np.round(
+        16 + 1.5 * page_views + 5 * downloads + 15 * webinar + rng.normal(0, 14, n_rows)
+    ), 1, 100).astype(int)
+    logit = -14 + 0.2 * intent + 0.35 * downloads + 1.2 * webinar
+    converted = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(np.int8)
+
+    return pd.DataFrame({
+        'Name': np.char.add(np.char.add(first, ' '), last),
+        'Company': [f"{_LAST[c % 10]}-{_LAST[c // 10 % 10]} {_SUFFIXES[c % 5]} {c}" for c in company_ids],
+        'Title': np.array(TITLES)[rng.integers(len(TITLES), size=n_rows)],
+        'Industry': np.array(INDUSTRIES)[rng.integers(len(INDUSTRIES), size=n_rows)],
+        'Company Size': np.array(COMPANY_SIZES)[rng.choice(3, size=n_rows, p=COMPANY_SIZE_WEIGHTS)],
+        'Email': [f"lead{i}@example.com" for i in ids],
+        'Website': [f"https://company{c}.example.com/" for c in company_ids],
+        'Page Views': page_views,
+        'Downloads': downloads,
+        'Webinar Attended': webinar,
+        'Intent Score': intent,
+        'Converted': converted,
+    }, columns=COLUMNS)
+
+
+def write_leads(path, n_rows, seed=42, chunk_rows=CHUNK_ROWS):
+    """Write n_rows synthetic leads to path, chunk by chunk"""
+    rng = np.random.default_rng(seed)
+    n_companies = max(1, int(n_rows * COMPANY_RATIO))
+    tmp_path = f"{path}.tmp"
+    for start in range(0, n_rows, chunk_rows):
+        chunk = generate_chunk(rng, start, min(chunk_rows, n_rows - start), n_companies)
+        chunk.to_csv(tmp_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def synthetic_leads_csv(n_rows, seed=42, data_dir=DEFAULT_DATA_DIR):
+    """Path of the synthetic CSV for (n_rows, seed), generating it on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"leads_{n_rows}_seed{seed}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {n_rows} synthetic leads -> {path}")
+        write_leads(path, n_rows, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='5k', help="row count, e.g. 5000, 100k, 1M")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="CSV path (default: cached under LEAD_BENCH_DATA)")
+    args = parser.parse_args()
+    n_rows = parse_rows(args.rows)
+    path = write_leads(args.output, n_rows, args.seed) if args.output else synthetic_leads_csv(n_rows, args.seed)
+    print(f"{n_rows} leads written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -30,6 +30,7 @@ function appendMessage(sender, text) {
   msg.innerText = text;
   chatBody.appendChild(msg);
   chatBody.scrollTop = chatBody.scrollHeight;
+  return msg;
 }
 
 chatBtn.onclick = () => {
@@ -41,12 +42,60 @@ chatCloseBtn.onclick = () => {
   chatBtn.style.display = 'block';
 };
 
-chatForm.onsubmit = (e) => {
+const CHAT_STREAM_URL = 'http://localhost:5000/chat/stream';
+
+// Stream the reply from the backend as server-sent events, appending tokens
+// to a single message bubble as they arrive. Resolves false if the backend is
+// unreachable so the caller can fall back to the static replies.
+async function streamAIReply(userMsg) {
+  let res;
+  try {
+    res = await fetch(CHAT_STREAM_URL, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message: userMsg })
+    });
+  } catch (err) {
+    return false;
+  }
+  if (!res.ok || !res.body) return false;
+
+  const msg = appendMessage('ai', '');
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split('\n\n');
+    buffer = events.pop();
+    for (const raw of events) {
+      const event = (raw.match(/^event: (.*)$/m) || [])[1];
+      const dataLine = (raw.match(/^data: (.*)$/m) || [])[1];
+      if (!dataLine) continue;
+      const data = JSON.parse(dataLine);
+      if (event === 'error') {
+        msg.innerText = msg.innerText || data.error;
+        return true;
+      }
+      if (data.token) {
+        msg.innerText += data.token;
+        chatBody.scrollTop = chatBody.scrollHeight;
+      }
+    }
+  }
+  if (!msg.innerText) msg.innerText = getStaticAIReply(userMsg);
+  return true;
+}
+
+chatForm.onsubmit = async (e) => {
   e.preventDefault();
   const userMsg = chatInput.value.trim();
   if (!userMsg) return;
   appendMessage('user', userMsg);
   chatInput.value = '';
+  if (await streamAIReply(userMsg)) return;
   setTimeout(() => {
     const reply = getStaticAIReply(userMsg);
     appendMessage('ai', reply);
@@ -0,0 +1,115 @@
+"""
+Width, latency and accuracy trade-off of the categorical encodings.
+
+Trains the MODEL_CONFIG forest once per encoding of the high-cardinality
+columns and reports, side by side:
+
+- feature width (model input columns) and the JS feature table size
+- single-lead encode time (FeatureEncoder.encode) and predict_proba latency
+- cross-validated accuracy, fit time and pickled model size
+
+Cross-validation folds run across a process pool (see model_search.py).
+
+Usage:
+    python encoding_report.py [--encoding Company=hash:64 ...] [--cv 5] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_search import successive_halving
+from train_and_export_model import DATA_PATH, MODEL_CONFIG, MODEL_DIR
+
+from ml_backend.feature_encoder import parse_encoding_spec
+from ml_backend.feature_store import load_features
+from ml_backend.model_artifacts import DROP_COLUMNS
+
+REPORT_PATH = os.path.join(MODEL_DIR, 'encoding_report.txt')
+
+# Encodings compared when none are given on the command line
+DEFAULT_CANDIDATES = [
+    'Company=onehot', 'Company=drop', 'Company=topk:50', 'Company=topk:200',
+    'Company=hash:32', 'Company=hash:128', 'Company=frequency', 'Company=target',
+]
+
+
+def encode_latency_us(encoder, leads, repeat=5):
+    """Median microseconds to encode one lead dict"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for lead in leads:
+            encoder.encode(lead)
+        timings.append((time.perf_counter() - start) / len(leads))
+    return float(np.median(timings)) * 1e6
+
+
+def evaluate_encoding(spec, cv, n_jobs):
+    """
+    Cross-validate MODEL_CONFIG with one column encoding
+
+    Returns:
+        dict: Report row for the spec
+    """
+    column, encoding = parse_encoding_spec(spec)
+    encodings = {column: encoding}
+    features = load_features(DATA_PATH, encodings=encodings)
+    leads = pd.read_csv(DATA_PATH, nrows=200).drop(DROP_COLUMNS, axis=1).to_dict('records')
+    search = successive_halving(DATA_PATH, MODEL_CONFIG, {}, cv=cv, n_jobs=n_jobs, encodings=encodings)
+    result = search['leaderboard'][0]
+    return {
+        'encoding': spec,
+        'width': features.encoder.n_features,
+        'js_features_kb': len(json.dumps(features.encoder.layout()['columns'])
+                              + json.dumps(features.encoder.encodings)) / 1024,
+        'encode_us': encode_latency_us(features.encoder, leads),
+        **result,
+    }
+
+
+def format_report(rows):
+    lines = [
+        "CATEGORICAL ENCODING TRADE-OFF",
+        "=" * 50,
+        f"Data: {DATA_PATH}   Model: {MODEL_CONFIG}",
+        "",
+        f"{'encoding':<20}{'width':>7}{'JS KB':>8}{'enc µs':>8}{'pred ms':>9}"
+        f"{'accuracy':>17}{'fit s':>8}{'size KB':>9}",
+    ]
+    for r in rows:
+        lines.append(
+            f"{r['encoding']:<20}{r['width']:>7}{r['js_features_kb']:>8.1f}{r['encode_us']:>8.1f}"
+            f"{r['latency_ms']:>9.2f}{r['cv_mean_accuracy']:>10.4f} ± {r['cv_std_accuracy']:.3f}"
+            f"{r['fit_seconds']:>8.2f}{r['size_bytes'] / 1024:>9.0f}"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--encoding', action='append', metavar='COLUMN=STRATEGY[:PARAM]',
+                        help="encoding to compare (repeatable); defaults to a sweep over Company")
+    parser.add_argument('--cv', type=int, default=5, help="cross-validation folds")
+    parser.add_argument('--jobs', type=int, default=-1, help="worker processes (-1 = all cores)")
+    args = parser.parse_args()
+
+    rows = []
+    for spec in args.encoding or DEFAULT_CANDIDATES:
+        print(f"\nEvaluating {spec}...")
+        rows.append(evaluate_encoding(spec, args.cv, args.jobs))
+
+    report = format_report(rows)
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(REPORT_PATH, 'w') as f:
+        f.write(report)
+    print('\n' + report)
+    print(f"Report saved to: {REPORT_PATH}")
+
+
+if __name__ == '__main__':
+    main()
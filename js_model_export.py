@@ -0,0 +1,573 @@
+"""
+JavaScript export of the trained Random Forest, shared by
+train_and_export_model.py and export_model.py.
+
+Two output formats are supported:
+
+- arrays (default): every tree is flattened into shared node arrays
+  (feature index, threshold, left, right, node value) embedded as base64
+  typed arrays, plus a small evaluator that walks them over a dense
+  Float32Array feature vector. Much smaller to download and parse than
+  generated code, and no string-keyed lookups while scoring. The same
+  walk accumulates exact path contributions (each split's change in the
+  node's positive-class probability, credited to its feature), so the
+  explanation is the top EXPLAIN_TOP_K of those, as the API's path
+  explainer returns them. With
+  quantize=True thresholds are stored as float32 (rounded down, so
+  decisions on float32 inputs are unchanged) and node probabilities as
+  uint16 steps of 1/65535.
+- functions: the original generated nested if/else function per tree,
+  now rendered iteratively, streamed to the file and optionally spread
+  across a process pool (output is identical for any n_jobs). Its
+  explanation is still the rule-of-thumb heuristicExplanation.
+
+Both keep the same predictLeadScore(lead) API.
+"""
+
+import base64
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+JS_FORMATS = ('arrays', 'functions')
+# Features in each explanation of the 'arrays' export (same as the API's TOP_K)
+EXPLAIN_TOP_K = 5
+
+_HEADER = """
+// Auto-generated Random Forest model from scikit-learn
+// Lead Intent Scoring Model
+// Generated on: {generated_on}
+
+// Feature names
+const MODEL_FEATURES = {features};
+
+// Non one-hot categorical encodings (topk, hash, frequency, target, drop)
+const FEATURE_ENCODINGS = {encodings};
+"""
+
+_ENCODE_JS = """
+const FEATURE_INDEX = {};
+MODEL_FEATURES.forEach((feature, i) => { FEATURE_INDEX[feature] = i; });
+
+// 32-bit FNV-1a of the UTF-8 value (same as feature_encoder.stable_hash)
+function fnv1a(text) {
+    const bytes = unescape(encodeURIComponent(String(text)));
+    let h = 0x811c9dc5;
+    for (let i = 0; i < bytes.length; i++) {
+        h = Math.imul(h ^ bytes.charCodeAt(i), 0x01000193);
+    }
+    return h >>> 0;
+}
+
+// [feature index, value] for one categorical field, or null if it sets nothing
+function encodeCategory(column, value) {
+    const encoding = FEATURE_ENCODINGS[column] || { strategy: 'onehot' };
+    const strategy = encoding.strategy;
+    if (strategy === 'drop') return null;
+    if (strategy === 'frequency' || strategy === 'target') {
+        const i = FEATURE_INDEX[`${column}_${strategy}`];
+        const known = value !== undefined && value !== null && value !== '' && encoding.values[value] !== undefined;
+        return [i, known ? encoding.values[value] : encoding.default];
+    }
+    if (value === undefined || value === null || value === '') return null;
+    const i = FEATURE_INDEX[`${column}_${value}`];
+    if (i !== undefined) return [i, 1];
+    if (strategy === 'topk') return [FEATURE_INDEX[`${column}___other__`], 1];
+    if (strategy === 'hash') return [FEATURE_INDEX[`${column}_hash_0`] + fnv1a(value) % encoding.buckets, 1];
+    return null;
+}
+
+// Lead fields feeding each categorical model column
+function categoricalFields(lead) {
+    return {
+        'Company': lead.company || lead.Company,
+        'Title': lead.title || lead.Title,
+        'Industry': lead.industry || lead.Industry,
+        'Company Size': lead.companySize || lead['Company Size']
+    };
+}
+"""
+
+_PREPROCESS_JS = """
+// Helper function to preprocess input data
+function preprocessLeadData(lead) {
+    const features = {};
+
+    // Initialize all features to 0
+    MODEL_FEATURES.forEach(feature => {
+        features[feature] = 0;
+    });
+
+    // Map categorical input fields to model features
+    const fields = categoricalFields(lead);
+    Object.keys(fields).forEach(column => {
+        const encoded = encodeCategory(column, fields[column]);
+        if (encoded && encoded[0] !== undefined) {
+            features[MODEL_FEATURES[encoded[0]]] = encoded[1];
+        }
+    });
+
+    // Numerical features
+    features['Page Views'] = parseFloat(lead.pageViews || lead['Page Views']) || 0;
+    features['Downloads'] = parseFloat(lead.downloads || lead['Downloads']) || 0;
+    features['Webinar Attended'] = parseInt(lead.webinarAttended || lead['Webinar Attended']) || 0;
+
+    return features;
+}
+"""
+
+_EXPLANATION_JS = """
+// Rule-of-thumb explanation shown alongside the model score
+function heuristicExplanation(lead, pageViews, downloads, webinarAttended) {
+    return [
+        { feature: 'Page Views', impact: pageViews > 10 ? 0.2 : (pageViews > 5 ? 0.1 : 0) },
+        { feature: 'Downloads', impact: downloads > 2 ? 0.2 : (downloads > 0 ? 0.1 : 0) },
+        { feature: 'Webinar Attended', impact: webinarAttended ? 0.15 : 0 },
+        { feature: 'Company Size', impact: (lead.companySize === 'Enterprise' || lead['Company Size'] === 'Enterprise') ? 0.1 : ((lead.companySize === 'Mid-Market' || lead['Company Size'] === 'Mid-Market') ? 0.05 : 0) },
+        { feature: 'Industry', impact: ['Technology', 'Finance', 'Healthcare'].includes(lead.industry || lead.Industry) ? 0.1 : 0 }
+    ];
+}
+"""
+
+_FUNCTIONS_PREDICT_JS = """
+// Main prediction function (Random Forest)
+function predictLeadScore(lead) {
+    try {
+        const features = preprocessLeadData(lead);
+
+        // Get predictions from all trees
+        let totalScore = 0;
+        for (let i = 0; i < TREE_PREDICTIONS.length; i++) {
+            totalScore += TREE_PREDICTIONS[i](features);
+        }
+
+        // Average the predictions (Random Forest)
+        const score = totalScore / TREE_PREDICTIONS.length;
+
+        return {
+            score: score,
+            explanation: heuristicExplanation(lead, features['Page Views'], features['Downloads'], features['Webinar Attended'])
+        };
+    } catch (error) {
+        console.error('Error in ML prediction:', error);
+        // Fallback to rule-based scoring
+        return generateFallbackScore(lead);
+    }
+}
+
+// Batch scoring helper (same results as calling predictLeadScore per lead)
+function predictLeadScores(leads) {
+    return leads.map(lead => predictLeadScore(lead));
+}
+"""
+
+_ARRAYS_RUNTIME_JS = """
+// Decode a little-endian base64 typed array
+function decodeTypedArray(base64, ArrayType) {
+    const binary = typeof atob === 'function' ? atob(base64) : Buffer.from(base64, 'base64').toString('binary');
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    return new ArrayType(bytes.buffer);
+}
+
+// Flattened forest: node n of any tree lives at the same index in every array.
+// VALUE[n] is the node's positive-class probability; FEATURE[n] < 0 marks a leaf.
+const FOREST = (function() {
+    const packed = FOREST_PACKED;
+    return {
+        roots: decodeTypedArray(packed.roots, Int32Array),
+        feature: decodeTypedArray(packed.feature, Int32Array),
+        threshold: decodeTypedArray(packed.threshold, packed.thresholdBits === 32 ? Float32Array : Float64Array),
+        left: decodeTypedArray(packed.left, Int32Array),
+        right: decodeTypedArray(packed.right, Int32Array),
+        value: packed.valueScale
+            ? Float32Array.from(decodeTypedArray(packed.value, Uint16Array), v => v / packed.valueScale)
+            : decodeTypedArray(packed.value, Float32Array)
+    };
+})();
+
+// Encode a lead straight into a dense feature vector (same mapping as preprocessLeadData)
+function encodeLead(lead, out) {
+    const x = out || new Float32Array(MODEL_FEATURES.length);
+    if (out) x.fill(0);
+    const setNumber = (name, value) => {
+        const i = FEATURE_INDEX[name];
+        if (i !== undefined) x[i] = value;
+    };
+    const fields = categoricalFields(lead);
+    for (const column in fields) {
+        const encoded = encodeCategory(column, fields[column]);
+        if (encoded && encoded[0] !== undefined) x[encoded[0]] = encoded[1];
+    }
+    setNumber('Page Views', parseFloat(lead.pageViews || lead['Page Views']) || 0);
+    setNumber('Downloads', parseFloat(lead.downloads || lead['Downloads']) || 0);
+    setNumber('Webinar Attended', parseInt(lead.webinarAttended || lead['Webinar Attended']) || 0);
+    return x;
+}
+
+// Change in positive-class probability from each node's parent (0 at the roots).
+// Derived from the node values at load time, so it costs no download size.
+FOREST.delta = (function() {
+    const { feature, left, right, value } = FOREST;
+    const delta = new Float32Array(value.length);
+    for (let n = 0; n < value.length; n++) {
+        if (feature[n] >= 0) {
+            delta[left[n]] = value[left[n]] - value[n];
+            delta[right[n]] = value[right[n]] - value[n];
+        }
+    }
+    return delta;
+})();
+
+// Average positive-class probability over all trees for an encoded vector
+function forestScore(x) {
+    const { roots, feature, threshold, left, right, value } = FOREST;
+    let total = 0;
+    for (let t = 0; t < roots.length; t++) {
+        let n = roots[t];
+        while (feature[n] >= 0) {
+            n = x[feature[n]] <= threshold[n] ? left[n] : right[n];
+        }
+        total += value[n];
+    }
+    return total / roots.length;
+}
+
+// Score plus per-feature path contributions, in one walk of every tree.
+// The mean root value plus the contributions equals the score.
+function forestScoreAndContributions(x, contributions) {
+    const { roots, feature, threshold, left, right, value, delta } = FOREST;
+    contributions.fill(0);
+    let total = 0;
+    for (let t = 0; t < roots.length; t++) {
+        let n = roots[t];
+        while (feature[n] >= 0) {
+            const f = feature[n];
+            n = x[f] <= threshold[n] ? left[n] : right[n];
+            contributions[f] += delta[n];
+        }
+        total += value[n];
+    }
+    for (let f = 0; f < contributions.length; f++) contributions[f] /= roots.length;
+    return total / roots.length;
+}
+
+// Top-k features by absolute contribution, largest first (ties keep feature order,
+// as explainers.top_impacts does)
+function topImpacts(contributions, k) {
+    const top = [];
+    for (let f = 0; f < contributions.length; f++) {
+        const size = Math.abs(contributions[f]);
+        if (top.length === k && size <= Math.abs(contributions[top[k - 1]])) continue;
+        let i = top.length;
+        while (i > 0 && size > Math.abs(contributions[top[i - 1]])) i--;
+        top.splice(i, 0, f);
+        if (top.length > k) top.pop();
+    }
+    return top.map(f => ({ feature: MODEL_FEATURES[f], impact: contributions[f] }));
+}
+
+function scoreEncodedLead(x, contributions) {
+    const score = forestScoreAndContributions(x, contributions);
+    return { score: score, explanation: topImpacts(contributions, EXPLAIN_TOP_K) };
+}
+
+// Main prediction function (Random Forest)
+function predictLeadScore(lead) {
+    try {
+        return scoreEncodedLead(encodeLead(lead), new Float64Array(MODEL_FEATURES.length));
+    } catch (error) {
+        console.error('Error in ML prediction:', error);
+        // Fallback to rule-based scoring
+        return generateFallbackScore(lead);
+    }
+}
+
+// Batch scoring that reuses one feature and one contribution buffer for every lead
+function predictLeadScores(leads) {
+    const x = new Float32Array(MODEL_FEATURES.length);
+    const contributions = new Float64Array(MODEL_FEATURES.length);
+    return leads.map(lead => {
+        try {
+            return scoreEncodedLead(encodeLead(lead, x), contributions);
+        } catch (error) {
+            console.error('Error in ML prediction:', error);
+            return generateFallbackScore(lead);
+        }
+    });
+}
+"""
+
+_FALLBACK_JS = """
+// Fallback scoring function (from app.js)
+function generateFallbackScore(lead) {
+    let score = 0.3; // Base score
+
+    // Score based on engagement
+    const pageViews = parseInt(lead.pageViews || lead['Page Views']) || 0;
+    const downloads = parseInt(lead.downloads || lead['Downloads']) || 0;
+    const webinarAttended = !!(lead.webinarAttended || lead['Webinar Attended']);
+
+    if (pageViews > 10) score += 0.2;
+    else if (pageViews > 5) score += 0.1;
+
+    if (downloads > 2) score += 0.2;
+    else if (downloads > 0) score += 0.1;
+
+    if (webinarAttended) score += 0.15;
+
+    // Score based on company attributes
+    const companySize = lead.companySize || lead['Company Size'] || '';
+    if (companySize === 'Enterprise') score += 0.1;
+    else if (companySize === 'Mid-Market') score += 0.05;
+
+    // Industry scoring
+    const industry = lead.industry || lead.Industry || '';
+    const highValueIndustries = ['Technology', 'Finance', 'Healthcare'];
+    if (highValueIndustries.includes(industry)) score += 0.1;
+
+    // Title scoring
+    const title = lead.title || lead.Title || '';
+    const seniorTitles = ['CEO', 'CTO', 'VP', 'Director', 'Manager'];
+    if (seniorTitles.some(t => title.includes(t))) score += 0.1;
+
+    // Cap at 1.0
+    score = Math.min(score, 1.0);
+
+    return {
+        score: score,
+        explanation: [
+            { feature: 'Page Views', impact: pageViews > 5 ? 0.1 : 0 },
+            { feature: 'Downloads', impact: downloads > 0 ? 0.1 : 0 },
+            { feature: 'Webinar Attendance', impact: webinarAttended ? 0.15 : 0 },
+            { feature: 'Company Size', impact: companySize === 'Enterprise' ? 0.1 : 0.05 },
+            { feature: 'Industry', impact: highValueIndustries.includes(industry) ? 0.1 : 0 }
+        ]
+    };
+}
+"""
+
+_EXPORTS_JS = """
+// Export for use in other modules
+if (typeof module !== 'undefined' && module.exports) {{
+    module.exports = {{ {exports} }};
+}}
+"""
+
+
+def leaf_probabilities(tree_):
+    """Positive-class probability of every node of a fitted sklearn tree"""
+    value = tree_.value[:, 0, :]
+    totals = value.sum(axis=1)
+    return np.divide(value[:, 1], totals, out=np.zeros(len(totals)), where=totals > 0)
+
+
+def tree_arrays(tree_):
+    """Plain node arrays for one fitted tree (cheap to send to worker processes)"""
+    return (
+        tree_.feature, tree_.threshold, tree_.children_left, tree_.children_right,
+        leaf_probabilities(tree_),
+    )
+
+
+def iter_tree_rules(arrays, feature_names, base_depth=0):
+    """
+    Yield the nested if/else JavaScript for one tree, line by line
+
+    Walks children_left/right with an explicit stack instead of recursion,
+    so deep unpruned trees neither hit the recursion limit nor build the
+    whole tree body by repeated string concatenation.
+
+    Args:
+        arrays: (feature, threshold, left, right, leaf_probability) from tree_arrays()
+        feature_names: Encoded feature names, in model input order
+    """
+    feature, threshold, left, right, prob = arrays
+    # Stack entries are either a node to expand or a literal closing line
+    stack = [(0, base_depth)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, str):
+            yield node
+            continue
+        indent = "  " * depth
+        if left[node] != -1:
+            yield f"{indent}if (features['{feature_names[feature[node]]}'] <= {threshold[node]}) {{\n"
+            stack.append((f"{indent}}}\n", None))
+            stack.append((right[node], depth + 1))
+            stack.append((f"{indent}}} else {{\n", None))
+            stack.append((left[node], depth + 1))
+        else:
+            # Leaf node - return probability
+            yield f"{indent}return {prob[node]:.6f};\n"
+
+
+def extract_tree_rules(tree, feature_names):
+    """Extract decision tree rules and convert to JavaScript"""
+    return ''.join(iter_tree_rules(tree_arrays(tree.tree_), feature_names))
+
+
+def render_tree_function(index, arrays, feature_names):
+    """JavaScript for one entry of TREE_PREDICTIONS"""
+    lines = [f"  // Tree {index + 1}\n", f"  function tree_{index}(features) {{\n"]
+    lines.extend(iter_tree_rules(arrays, feature_names))
+    lines.append("  },\n")
+    return ''.join(lines)
+
+
+# Feature names for worker processes, set once per worker by _init_worker
+_worker_feature_names = None
+
+
+def _init_worker(feature_names):
+    global _worker_feature_names
+    _worker_feature_names = feature_names
+
+
+def _render_tree_task(task):
+    index, arrays = task
+    return render_tree_function(index, arrays, _worker_feature_names)
+
+
+def iter_tree_functions(model, feature_names, n_jobs=1):
+    """
+    Yield each tree's JavaScript function in forest order
+
+    With n_jobs > 1 trees are rendered across a process pool. Results are
+    consumed in submission order, in bounded windows, so the output is
+    byte-for-byte identical to the serial path and only a few rendered
+    trees are held in memory at once.
+    """
+    tasks = ((i, tree_arrays(est.tree_)) for i, est in enumerate(model.estimators_))
+    if n_jobs == 1:
+        for i, arrays in tasks:
+            yield render_tree_function(i, arrays, feature_names)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import islice
+
+    n_jobs = n_jobs if n_jobs > 0 else os.cpu_count()
+    window = n_jobs * 4
+    with ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=(list(feature_names),)) as pool:
+        while True:
+            batch = list(islice(tasks, window))
+            if not batch:
+                break
+            yield from pool.map(_render_tree_task, batch)
+
+
+# Node probabilities are stored as round(p * VALUE_SCALE) when quantized. 16 bits
+# rather than 8 keep the per-split deltas behind the explanations close to exact.
+VALUE_SCALE = 65535
+
+
+def float32_floor(values):
+    """Largest float32 <= each value; x <= t and x <= float32_floor(t) agree for float32 x"""
+    rounded = np.asarray(values).astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def flatten_forest(model, quantize=False):
+    """
+    Concatenate every tree of a fitted forest into shared node arrays
+
+    Child indices are rewritten to global positions and leaves get feature
+    -1, so one evaluator loop can walk any tree from its root offset.
+
+    Args:
+        quantize: float32 thresholds and uint16 node probabilities
+
+    Returns:
+        dict: roots, feature, threshold, left, right and value arrays
+    """
+    roots, feature, threshold, left, right, value = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree_ = estimator.tree_
+        is_leaf = tree_.children_left == -1
+        roots.append(offset)
+        feature.append(np.where(is_leaf, -1, tree_.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree_.threshold))
+        left.append(np.where(is_leaf, -1, tree_.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree_.children_right + offset))
+        value.append(leaf_probabilities(tree_))
+        offset += tree_.node_count
+    threshold = np.concatenate(threshold).astype('<f8')
+    value = np.concatenate(value)
+    return {
+        'roots': np.asarray(roots, dtype='<i4'),
+        'feature': np.concatenate(feature).astype('<i4'),
+        'threshold': float32_floor(threshold).astype('<f4') if quantize else threshold,
+        'left': np.concatenate(left).astype('<i4'),
+        'right': np.concatenate(right).astype('<i4'),
+        'value': np.round(value * VALUE_SCALE).astype('<u2') if quantize else value.astype('<f4'),
+    }
+
+
+def _b64(array):
+    return base64.b64encode(array.tobytes()).decode('ascii')
+
+
+def iter_js_model(model, feature_names, js_format='arrays', n_jobs=1, encodings=None, quantize=False):
+    """
+    Yield the ml_model.js source for a fitted forest in chunks
+
+    Args:
+        model: Trained RandomForestClassifier
+        feature_names: Encoded feature names, in model input order
+        js_format: 'arrays' (flattened typed arrays) or 'functions' (nested if/else)
+        n_jobs: Worker processes for rendering 'functions' trees (-1 = all cores)
+        encodings: Non one-hot categorical encodings from the feature schema
+        quantize: Compact node arrays ('arrays' format only, see flatten_forest)
+    """
+    if js_format not in JS_FORMATS:
+        raise ValueError(f"Unknown JS model format {js_format!r}, expected one of {JS_FORMATS}")
+    feature_names = [str(f) for f in feature_names]
+    yield _HEADER.format(
+        generated_on=datetime.now().isoformat(),
+        features=json.dumps(feature_names),
+        encodings=json.dumps(encodings or {}),
+    )
+    yield _ENCODE_JS
+    exports = ['predictLeadScore', 'predictLeadScores', 'preprocessLeadData', 'MODEL_FEATURES', 'generateFallbackScore']
+
+    if js_format == 'functions':
+        yield "\n// Individual tree predictions\nconst TREE_PREDICTIONS = [\n"
+        yield from iter_tree_functions(model, feature_names, n_jobs)
+        yield "];\n"
+        yield from (_PREPROCESS_JS, _EXPLANATION_JS, _FUNCTIONS_PREDICT_JS)
+    else:
+        packed = {name: _b64(array) for name, array in flatten_forest(model, quantize).items()}
+        if quantize:
+            packed.update(thresholdBits=32, valueScale=VALUE_SCALE)
+        yield f"\n// Packed forest nodes (base64 little-endian typed arrays)\nconst FOREST_PACKED = {json.dumps(packed)};\n"
+        yield f"\n// Features kept per explanation\nconst EXPLAIN_TOP_K = {EXPLAIN_TOP_K};\n"
+        yield from (_PREPROCESS_JS, _ARRAYS_RUNTIME_JS)
+        exports.extend(['encodeLead', 'forestScore', 'forestScoreAndContributions', 'topImpacts'])
+
+    yield _FALLBACK_JS
+    yield _EXPORTS_JS.format(exports=', '.join(exports))
+
+
+def render_js_model(model, feature_names, js_format='arrays', n_jobs=1, encodings=None, quantize=False):
+    """Full ml_model.js source as one string (see iter_js_model)"""
+    return ''.join(iter_js_model(model, feature_names, js_format, n_jobs, encodings, quantize))
+
+
+def export_to_javascript(model, feature_names, js_path, js_format='arrays', n_jobs=1, encodings=None,
+                         quantize=False):
+    """
+    Stream the JavaScript model to js_path for client-side use
+
+    Returns:
+        int: Size of the written file in bytes
+    """
+    with open(js_path, 'w') as f:
+        for chunk in iter_js_model(model, feature_names, js_format, n_jobs, encodings, quantize):
+            f.write(chunk)
+    return os.path.getsize(js_path)
@@ -0,0 +1,12 @@
+# Access check for /admin endpoints and other store-wide actions
+from flask import request
+import os
+
+# Required in X-Admin-Token for admin actions; without it they only accept localhost
+ADMIN_TOKEN = os.getenv('LEAD_ADMIN_TOKEN')
+
+
+def admin_allowed():
+    if ADMIN_TOKEN:
+        return request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+    return request.remote_addr in ('127.0.0.1', '::1')
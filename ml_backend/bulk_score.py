@@ -0,0 +1,286 @@
+"""
+Offline bulk scoring of a lead CSV, without going through the API.
+
+Rescores a whole lead base (same layout as small file.csv) in one batch job:
+
+    python bulk_score.py leads.csv scored.csv [--explain path] [--workers 8]
+    python bulk_score.py leads.csv scored.jsonl --explain none
+
+The input is read in chunks of --chunk-rows. Each chunk is encoded with the
+model's FeatureEncoder, scored and optionally explained in a worker process,
+and written by that worker as one part file:
+
+    scored.csv.parts/
+        job.json             <- input, model version and options of this job
+        part-000000.csv      <- rows 0 .. chunk_rows-1, renamed into place when complete
+        ...
+
+When every chunk is done, the parts are concatenated into the output and
+the directory is removed. An interrupted job is resumed by running the
+same command again: chunks whose part file exists are skipped. job.json
+guards against resuming with a different input, model version or options;
+--restart discards the old parts instead.
+
+Memory stays bounded. At most 2 x --workers chunks are in flight at once,
+and each worker memory-maps the model arrays when the artifact is
+uncompressed.
+
+Output rows hold the input columns (or --columns), then score and
+model_version. With an explanation engine they also hold the top-k
+impacts:
+
+- CSV: top_1_feature, top_1_impact ... top_k_feature, top_k_impact
+- JSONL: an "explanation" list shaped like the /score response
+
+Use --explain path for nightly jobs. Exact SHAP costs milliseconds to
+tens of milliseconds per lead on a full forest, so it is meant for
+smaller extracts.
+
+Progress (rows, rows/s, ETA) is printed after every chunk.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from explainers import ENGINES
+from model_artifacts import (
+    DEFAULT_MODEL_DIR, artifact_dir, current_version, load_artifacts, load_schema, model_version,
+)
+from model_registry import ServingModel
+
+# Rows per chunk; each worker holds one encoded chunk at a time
+CHUNK_ROWS = int(os.getenv('LEAD_BULK_CHUNK_ROWS', '50000'))
+# Features kept per explanation
+TOP_K = 5
+OUTPUT_FORMATS = ('csv', 'jsonl')
+JOB_FILENAME = 'job.json'
+
+# Per-worker model bundle, built once by _init_worker
+_serving = None
+
+
+def _init_worker(model_dir, version, top_k):
+    global _serving
+    model, schema = load_artifacts(model_dir, version, mmap_mode='r')
+    # No memo: every row of a bulk job is scored once
+    _serving = ServingModel(model, schema, default_explainer='none', top_k=top_k, memo_size=0).warm()
+
+
+def _part_path(parts_dir, index, fmt):
+    return os.path.join(parts_dir, f'part-{index:06d}.{fmt}')
+
+
+def score_chunk(index, frame, parts_dir, fmt, columns, engine, top_k):
+    """
+    Score one chunk in a worker and write it as a part file
+
+    Returns:
+        tuple: (chunk index, rows written)
+    """
+    X = _serving.encoder.transform(frame)
+    out = frame if columns is None else frame.reindex(columns=columns)
+    out = out.assign(score=_serving.predict_positive(X), model_version=_serving.version)
+    if engine != 'none':
+        _, explained = _serving.explanations.explain(X, engine)
+        if fmt == 'jsonl':
+            out['explanation'] = [[{**e, 'impact': round(e['impact'], 6)} for e in row] for row in explained]
+        else:
+            for i in range(top_k):
+                out[f'top_{i + 1}_feature'] = [row[i]['feature'] if i < len(row) else '' for row in explained]
+                out[f'top_{i + 1}_impact'] = [round(row[i]['impact'], 6) if i < len(row) else np.nan
+                                              for row in explained]
+
+    path = _part_path(parts_dir, index, fmt)
+    tmp_path = path + '.tmp'
+    if fmt == 'jsonl':
+        out.to_json(tmp_path, orient='records', lines=True, double_precision=6)
+    else:
+        out.to_csv(tmp_path, index=False, float_format='%.6g')
+    os.replace(tmp_path, path)  # a part exists only once it is complete
+    return index, len(out)
+
+
+def count_rows(path):
+    """Data rows in a CSV by counting newlines (approximate if fields contain line breaks)"""
+    lines, last = 0, b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 24), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return max(lines + (last != b'\n') - 1, 0)
+
+
+def _job_manifest(input_path, version, args):
+    stat = os.stat(input_path)
+    return {
+        'input': os.path.abspath(input_path),
+        'input_bytes': stat.st_size,
+        'input_mtime': stat.st_mtime,
+        'model_version': version,
+        'format': args.format,
+        'chunk_rows': args.chunk_rows,
+        'explain': args.explain,
+        'top_k': args.top_k,
+        'columns': args.columns,
+    }
+
+
+def prepare_parts_dir(parts_dir, manifest, restart=False):
+    """
+    Create the part-file directory, or check that it belongs to this job
+
+    Raises:
+        ValueError: If existing parts were written by a different job
+    """
+    job_path = os.path.join(parts_dir, JOB_FILENAME)
+    if restart and os.path.isdir(parts_dir):
+        shutil.rmtree(parts_dir)
+    if os.path.exists(job_path):
+        with open(job_path) as f:
+            previous = json.load(f)
+        changed = sorted(k for k in manifest if previous.get(k) != manifest[k])
+        if changed:
+            raise ValueError(
+                f"{parts_dir} holds parts of a different job (changed: {', '.join(changed)}); "
+                f"rerun with --restart to discard them"
+            )
+        return
+    os.makedirs(parts_dir, exist_ok=True)
+    with open(job_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def assemble(parts_dir, n_chunks, output_path, fmt):
+    """Concatenate part files in chunk order into the output, then remove them"""
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as out:
+        for index in range(n_chunks):
+            with open(_part_path(parts_dir, index, fmt), 'rb') as part:
+                if fmt == 'csv' and index > 0:
+                    part.readline()  # header
+                shutil.copyfileobj(part, out, 1 << 20)
+    os.replace(tmp_path, output_path)
+    shutil.rmtree(parts_dir)
+
+
+def _progress(done_rows, total_rows, skipped_rows, start):
+    elapsed = time.perf_counter() - start
+    rate = (done_rows - skipped_rows) / elapsed if elapsed > 0 else 0.0
+    eta = f", ETA {(total_rows - done_rows) / rate:.0f}s" if rate and total_rows > done_rows else ''
+    pct = f" ({100 * done_rows / total_rows:.1f}%)" if total_rows else ''
+    print(f"  {done_rows:,}/{total_rows:,} rows{pct}, {rate:,.0f} rows/s{eta}", flush=True)
+
+
+def bulk_score(input_path, output_path, args):
+    """
+    Score every row of input_path into output_path, resuming a previous run
+
+    Returns:
+        int: Rows scored
+    """
+    # Pin the version so a model promoted mid-job does not reach later chunks
+    stored_version = args.version or current_version(args.model_dir)
+    version = model_version(load_schema(args.model_dir, stored_version))
+    parts_dir = output_path + '.parts'
+    prepare_parts_dir(parts_dir, _job_manifest(input_path, version, args), args.restart)
+
+    total_rows = count_rows(input_path)
+    print(f"Scoring {input_path} ({total_rows:,} rows) with model {version} "
+          f"using {args.workers} worker(s), explain={args.explain}")
+    task_args = (parts_dir, args.format, args.columns, args.explain, args.top_k)
+    reader = pd.read_csv(input_path, chunksize=args.chunk_rows)
+    start = time.perf_counter()
+    done_rows = skipped_rows = n_chunks = 0
+
+    if args.workers <= 1:
+        _init_worker(args.model_dir, stored_version, args.top_k)
+        for index, frame in enumerate(reader):
+            n_chunks += 1
+            if os.path.exists(_part_path(parts_dir, index, args.format)):
+                skipped_rows += len(frame)
+            else:
+                score_chunk(index, frame, *task_args)
+            done_rows += len(frame)
+            _progress(done_rows, total_rows, skipped_rows, start)
+    else:
+        pool = ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                                   initargs=(args.model_dir, stored_version, args.top_k))
+        try:
+            pending = set()
+            for index, frame in enumerate(reader):
+                n_chunks += 1
+                if os.path.exists(_part_path(parts_dir, index, args.format)):
+                    skipped_rows += len(frame)
+                    done_rows += len(frame)
+                    continue
+                pending.add(pool.submit(score_chunk, index, frame, *task_args))
+                # Bound memory: read ahead at most two chunks per worker
+                while len(pending) >= 2 * args.workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done_rows += future.result()[1]
+                        _progress(done_rows, total_rows, skipped_rows, start)
+            for future in wait(pending).done:
+                done_rows += future.result()[1]
+                _progress(done_rows, total_rows, skipped_rows, start)
+        except BaseException:
+            # Drop queued chunks; ones already running still finish their part files
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+    if skipped_rows:
+        print(f"Resumed: {skipped_rows:,} rows were already scored")
+    assemble(parts_dir, n_chunks, output_path, args.format)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {done_rows:,} scored rows to {output_path} in {elapsed:.1f}s")
+    return done_rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="lead CSV in the small file.csv layout")
+    parser.add_argument('output', help="scored output; .jsonl writes JSON lines, anything else CSV")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default=None,
+                        help="output format (default: from the output file extension)")
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR, help="artifact directory to load from")
+    parser.add_argument('--version', default=None, help="stored model version (default: CURRENT)")
+    parser.add_argument('--explain', choices=ENGINES, default='none',
+                        help="explanation engine for top-k impacts (default: none)")
+    parser.add_argument('--top-k', type=int, default=TOP_K, help="impacts kept per lead")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="scoring processes (default: all cores)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="rows read and scored per chunk")
+    parser.add_argument('--columns', default=None, metavar='COL,...',
+                        help="input columns copied to the output (default: all)")
+    parser.add_argument('--restart', action='store_true', help="discard parts of an interrupted run")
+    args = parser.parse_args()
+    if args.format is None:
+        args.format = 'jsonl' if args.output.endswith(('.jsonl', '.ndjson')) else 'csv'
+    if args.columns is not None:
+        args.columns = args.columns.split(',')
+    if not os.path.isdir(artifact_dir(args.model_dir, args.version)):
+        parser.error(f"no model artifacts in {artifact_dir(args.model_dir, args.version)}")
+    return args
+
+
+def main():
+    args = parse_args()
+    try:
+        bulk_score(args.input, args.output, args)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; run the same command again to resume from {args.output}.parts")
+        raise SystemExit(130)
+
+
+if __name__ == '__main__':
+    main()
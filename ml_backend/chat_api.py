@@ -1,31 +1,218 @@
 # Conversational AI backend for OpenAI API
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
 import os
-import openai
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from chat_cache import ChatResponseCache
+from request_metrics import metrics
 
 chat_api = Blueprint('chat_api', __name__)
 
 # Set your OpenAI API key here or via environment variable
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'sk-...')  # Replace with your key or set env var
-openai.api_key = OPENAI_API_KEY
+# Any OpenAI-compatible endpoint; point it at a local stand-in server for testing
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/')
+CHAT_MODEL = os.getenv('CHAT_MODEL', 'gpt-3.5-turbo')
+# (connect, read) timeouts in seconds; read applies between streamed chunks
+CHAT_TIMEOUT = (
+    float(os.getenv('CHAT_CONNECT_TIMEOUT', '5')),
+    float(os.getenv('CHAT_READ_TIMEOUT', '30')),
+)
+# Max concurrent upstream chat calls per process, so chat cannot starve /score workers
+CHAT_MAX_CONCURRENCY = int(os.getenv('CHAT_MAX_CONCURRENCY', '4'))
+# How long a chat request waits for a free upstream slot before giving up
+CHAT_QUEUE_TIMEOUT = float(os.getenv('CHAT_QUEUE_TIMEOUT', '2'))
+# Replies to repeated questions are cached on the normalized prompt (0 disables)
+CHAT_CACHE_SIZE = int(os.getenv('CHAT_CACHE_SIZE', '256'))
+CHAT_CACHE_TTL = float(os.getenv('CHAT_CACHE_TTL', '3600'))
+# How long an identical concurrent question waits for the in-flight reply
+CHAT_COALESCE_TIMEOUT = float(os.getenv('CHAT_COALESCE_TIMEOUT', '60'))
+
+SYSTEM_PROMPT = "You are a helpful onboarding and sales assistant for a lead scoring dashboard. Answer questions, guide onboarding, and make recommendations."
+
+# Pooled keep-alive client shared by every chat request in this process
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=CHAT_MAX_CONCURRENCY)
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+_slots = threading.BoundedSemaphore(CHAT_MAX_CONCURRENCY)
+chat_cache = ChatResponseCache(CHAT_CACHE_SIZE, CHAT_CACHE_TTL)
+
+
+class ChatBusyError(Exception):
+    """All upstream chat slots are in use"""
+
+
+def _post_completion(user_message, stream):
+    # Upstream latency is time to response headers; for streams that is time to first chunk
+    endpoint = 'chat_stream' if stream else 'chat'
+    start = time.perf_counter()
+    try:
+        response = _session.post(
+            f"{OPENAI_BASE_URL}/chat/completions",
+            headers={'Authorization': f"Bearer {OPENAI_API_KEY}"},
+            json={
+                'model': CHAT_MODEL,
+                'messages': [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message}
+                ],
+                'max_tokens': 200,
+                'temperature': 0.7,
+                'stream': stream,
+            },
+            timeout=CHAT_TIMEOUT,
+            stream=stream,
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        metrics.count_error(endpoint, f"upstream_{type(e).__name__}")
+        raise
+    finally:
+        metrics.observe(endpoint, 'upstream', time.perf_counter() - start)
+    return response
+
+
+def _acquire_slot():
+    if not _slots.acquire(timeout=CHAT_QUEUE_TIMEOUT):
+        metrics.count_error('chat', 'busy')
+        raise ChatBusyError('The assistant is busy, please try again in a moment.')
+
+
+def complete(user_message):
+    """Blocking completion; returns the full reply text"""
+    _acquire_slot()
+    try:
+        data = _post_completion(user_message, stream=False).json()
+        return data['choices'][0]['message']['content'].strip()
+    finally:
+        _slots.release()
+
+
+def cached_completion(user_message):
+    """complete() behind the reply cache; identical concurrent questions share one call"""
+    return chat_cache.get_or_compute(
+        user_message, lambda: complete(user_message), timeout=CHAT_COALESCE_TIMEOUT,
+    )
+
+
+def cached_stream(user_message):
+    """
+    stream_completion() behind the reply cache. Hits and coalesced followers
+    get the whole reply as one token; the leader streams from upstream and
+    publishes the assembled reply when it finishes.
+    """
+    reply, flight, leader = chat_cache.claim(user_message)
+    if reply is not None:
+        yield reply
+        return
+    if not leader:
+        yield flight.wait(CHAT_COALESCE_TIMEOUT)
+        return
+    tokens = []
+    completed = False
+    try:
+        for token in stream_completion(user_message):
+            tokens.append(token)
+            yield token
+        completed = True
+    except Exception as e:
+        chat_cache.resolve(flight, error=e)
+        raise
+    finally:
+        if completed:
+            chat_cache.resolve(flight, value=''.join(tokens).strip())
+        else:
+            # Leader's client disconnected mid-stream; never cache a partial reply
+            chat_cache.resolve(flight, error=ConnectionAbortedError('The reply was interrupted, please ask again.'))
+
+
+def stream_completion(user_message):
+    """
+    Yield reply tokens as the upstream streams them. The upstream slot is
+    taken before the first token and released when the generator finishes
+    or is closed by a disconnecting client.
+    """
+    _acquire_slot()
+    try:
+        with _post_completion(user_message, stream=True) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                chunk = line[len('data:'):].strip()
+                if chunk == '[DONE]':
+                    break
+                delta = json.loads(chunk)['choices'][0].get('delta', {})
+                if delta.get('content'):
+                    yield delta['content']
+    finally:
+        _slots.release()
+
+
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ''
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
 
 @chat_api.route('/chat', methods=['POST'])
+@metrics.instrument('chat')
 def chat():
-    data = request.get_json()
+    with metrics.stage('parse'):
+        data = request.get_json()
     user_message = data.get('message', '')
     if not user_message:
         return jsonify({'reply': 'Please enter a message.'})
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful onboarding and sales assistant for a lead scoring dashboard. Answer questions, guide onboarding, and make recommendations."},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=200,
-            temperature=0.7
-        )
-        reply = response.choices[0].message['content'].strip()
-        return jsonify({'reply': reply})
+        with metrics.stage('reply'):
+            reply = cached_completion(user_message)
+    except ChatBusyError as e:
+        return jsonify({'reply': str(e)}), 503
     except Exception as e:
+        if not isinstance(e, requests.RequestException):  # upstream errors are counted at the call
+            metrics.count_error('chat', type(e).__name__)
         return jsonify({'reply': f'Sorry, there was an error: {str(e)}'})
+    with metrics.stage('serialize'):
+        return jsonify({'reply': reply})
+
+
+@chat_api.route('/chat/stream', methods=['POST'])
+@metrics.instrument('chat_stream')
+def chat_stream():
+    """
+    Server-sent events: one {"token": ...} message per upstream chunk, then
+    an "event: done" message, or "event: error" with {"error": ...}
+    """
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '')
+    if not user_message:
+        return jsonify({'reply': 'Please enter a message.'}), 400
+
+    def events():
+        # Runs after the view returned, so the full stream is timed here
+        start = time.perf_counter()
+        try:
+            for token in cached_stream(user_message):
+                yield _sse({'token': token})
+            yield _sse({}, event='done')
+            metrics.observe('chat_stream', 'stream', time.perf_counter() - start)
+        except Exception as e:
+            if not isinstance(e, requests.RequestException):
+                metrics.count_error('chat_stream', type(e).__name__)
+            yield _sse({'error': f'Sorry, there was an error: {str(e)}'}, event='error')
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@chat_api.route('/chat/stats', methods=['GET'])
+def chat_stats():
+    """Reply cache hit rate, coalesced requests and upstream calls in flight"""
+    return jsonify(chat_cache.stats())
@@ -0,0 +1,142 @@
+"""
+Response cache with in-flight coalescing for common chat questions.
+
+Most chat traffic is the same handful of onboarding questions. Replies are
+cached on the normalized prompt with a TTL and LRU eviction, and concurrent
+identical questions share one upstream call: the first caller becomes the
+leader, the rest wait for its result.
+"""
+
+import re
+import threading
+import time
+
+from score_cache import LRUCache
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?!.]+$')
+
+
+def normalize_prompt(message):
+    """Case, whitespace and trailing-punctuation insensitive cache key"""
+    text = _WHITESPACE.sub(' ', message.strip().lower())
+    return _TRAILING_PUNCTUATION.sub('', text)
+
+
+class Flight:
+    """One in-progress upstream call that followers can wait on"""
+
+    def __init__(self, key):
+        self.key = key
+        self._done = threading.Event()
+        self.value = None
+        self.error = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError('Timed out waiting for an identical chat request')
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class ChatResponseCache:
+    """
+    TTL + LRU reply cache with request coalescing
+
+    Args:
+        maxsize: Max cached replies; 0 disables caching (coalescing still applies)
+        ttl: Seconds a cached reply stays valid
+    """
+
+    def __init__(self, maxsize=256, ttl=3600.0, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._replies = LRUCache(maxsize)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        # Lookups that found an expired reply, and expired replies dropped without a lookup
+        self.expired = 0
+        self.purged = 0
+
+    def claim(self, message):
+        """
+        Look up a reply or join/start the upstream call for it
+
+        Returns:
+            tuple: (cached_reply, flight, is_leader). A non-None cached_reply
+            is a hit. Otherwise the leader must call resolve(flight, ...) and
+            followers call flight.wait().
+        """
+        key = normalize_prompt(message)
+        with self._lock:
+            entry = self._replies.get(key)
+            if entry is not None:
+                expires_at, reply = entry
+                if self._clock() < expires_at:
+                    return reply, None, False
+                self._replies.pop(key)
+                self.expired += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return None, flight, False
+            flight = self._flights[key] = Flight(key)
+            return None, flight, True
+
+    def resolve(self, flight, value=None, error=None):
+        """Publish the leader's result to followers and cache it on success"""
+        with self._lock:
+            if flight.done:
+                return
+            self._flights.pop(flight.key, None)
+            if error is None and value:
+                self._replies.put(flight.key, (self._clock() + self.ttl, value))
+            flight.value, flight.error = value, error
+            flight._done.set()
+
+    def get_or_compute(self, message, compute, timeout=None):
+        """Cached reply, a coalesced result, or compute() run once as leader"""
+        reply, flight, leader = self.claim(message)
+        if reply is not None:
+            return reply
+        if not leader:
+            return flight.wait(timeout)
+        try:
+            value = compute()
+        except Exception as e:
+            self.resolve(flight, error=e)
+            raise
+        self.resolve(flight, value=value)
+        return value
+
+    def purge_expired(self):
+        """Drop expired replies that were never looked up again, so size counts live entries only"""
+        now = self._clock()
+        with self._lock:
+            purged = self._replies.drop_if(lambda entry: entry[0] <= now)
+            self.purged += purged
+        return purged
+
+    def stats(self):
+        self.purge_expired()
+        with self._lock:
+            in_flight = len(self._flights)
+        stats = self._replies.stats()
+        # Expired entries were found by the LRU but served as misses
+        stats['hits'] -= self.expired
+        stats['misses'] += self.expired
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return {
+            **stats,
+            'coalesced': self.coalesced,
+            'expired': self.expired,
+            'purged': self.purged,
+            'in_flight': in_flight,
+        }
@@ -0,0 +1,201 @@
+"""
+NumPy evaluator for a fitted forest, without scikit-learn's per-call overhead.
+
+For a single lead, RandomForestClassifier.predict_proba spends most of its
+time validating input and dispatching to each of its trees, not walking
+them. compile_forest() flattens every tree into one set of contiguous node
+arrays:
+
+    feature, threshold, left, right, missing_left, positive
+
+Children are global indices, so node i of every tree lives in the same
+arrays. Leaves point back at themselves. Scoring starts one cursor per
+(row, tree) at the tree roots and advances all of them one level per step
+with fancy indexing. Cursors that reached a leaf stay there, so after
+max_depth steps every cursor sits on its leaf. The forest's probability
+is the mean of those leaves' positive-class fractions.
+
+Decisions follow sklearn exactly:
+- inputs are cast to float32 before comparing with the float64 thresholds
+- x <= threshold goes left
+- NaN goes where the tree sent missing values in training
+verify() checks this against predict_proba on rows placed exactly on,
+just below and just above every threshold; tests/test_compiled_forest.py
+does the same for fitted RandomForest and ExtraTrees models.
+
+The win is per call, not per row. Large batches are slower than sklearn's
+compiled tree walk (2000 rows: ~25 ms vs ~10-13 ms), so ServingModel only
+uses the compiled scorer up to compiled_max_rows rows (LEAD_API_COMPILED_MAX_ROWS)
+and sends bigger batches to predict_proba.
+
+Usage (from ml_backend/):
+    python compiled_forest.py [model_dir]    # parity check and timing for the CURRENT model
+"""
+
+import sys
+import time
+
+import numpy as np
+
+TREE_LEAF = -1
+# Largest |compiled - sklearn| accepted by verify()
+PARITY_TOLERANCE = 1e-9
+
+
+class CompiledForest:
+    """
+    Flattened node arrays of a fitted binary forest classifier
+
+    Args:
+        model: Fitted RandomForestClassifier or ExtraTreesClassifier
+    """
+
+    def __init__(self, model):
+        features, thresholds, lefts, rights, missing, positive, roots = [], [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == TREE_LEAF
+            value = tree.value[:, 0, :]
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, 0.0, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            missing_go_to_left = getattr(tree, 'missing_go_to_left', None)
+            missing.append(np.zeros(tree.node_count, dtype=bool) if missing_go_to_left is None
+                           else np.asarray(missing_go_to_left, dtype=bool) & ~leaf)
+            positive.append(value[:, 1] / np.maximum(value.sum(axis=1), 1e-12))
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.n_features = model.n_features_in_
+        self.n_trees = len(model.estimators_)
+        self.max_depth = max_depth
+        self.roots = np.array(roots, dtype=np.intp)
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.leaf = self.left == np.arange(len(self.left))
+        self.missing_left = np.concatenate(missing)
+        self.positive = np.concatenate(positive)
+        self.classes_ = model.classes_
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def predict_positive(self, X):
+        """Positive-class probability for each row of a dense (n, n_features) matrix"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        has_missing = self.missing_left.any() and np.isnan(X).any()
+        # One cursor per (row, tree), row-major; only those not yet on a leaf are stepped
+        cursor = np.tile(self.roots, len(X))
+        rows = np.repeat(np.arange(len(X)), self.n_trees)
+        active = np.flatnonzero(~self.leaf[cursor])
+        rows = rows[active]
+        while active.size:
+            node = cursor[active]
+            x = X[rows, self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            cursor[active] = node
+            inner = ~self.leaf[node]
+            active, rows = active[inner], rows[inner]
+        return self.positive[cursor].reshape(len(X), self.n_trees).mean(axis=1)
+
+    def predict_proba(self, X):
+        """Same layout as the forest's predict_proba: [P(class 0), P(class 1)] per row"""
+        positive = self.predict_positive(X)
+        return np.column_stack([1 - positive, positive])
+
+
+def boundary_rows(compiled, n_rows=256, random_state=0):
+    """
+    Rows whose values sit on, just below and just above split thresholds
+
+    Every column draws from its own thresholds (or 0/1 when unused), so the
+    sample exercises the <= comparisons where float handling could differ.
+    """
+    rng = np.random.default_rng(random_state)
+    internal = compiled.left != np.arange(compiled.n_nodes)
+    X = np.zeros((n_rows, compiled.n_features), dtype=np.float32)
+    for column in range(compiled.n_features):
+        cuts = compiled.threshold[internal & (compiled.feature == column)].astype(np.float32)
+        if len(cuts) == 0:
+            X[:, column] = rng.integers(0, 2, n_rows)
+            continue
+        values = rng.choice(cuts, n_rows)
+        step = rng.integers(-1, 2, n_rows)  # below, on, above
+        X[:, column] = np.where(step < 0, np.nextafter(values, -np.inf),
+                                np.where(step > 0, np.nextafter(values, np.inf), values))
+    return X
+
+
+def verify(compiled, model, X=None, tolerance=PARITY_TOLERANCE):
+    """
+    Compare the compiled evaluator with model.predict_proba
+
+    Args:
+        X: Rows to compare on; defaults to boundary_rows()
+
+    Raises:
+        ValueError: If any probability differs by more than tolerance
+
+    Returns:
+        float: Largest absolute difference
+    """
+    X = boundary_rows(compiled) if X is None else np.asarray(X)
+    diff = float(np.abs(compiled.predict_positive(X) - model.predict_proba(X)[:, 1]).max())
+    if diff > tolerance:
+        raise ValueError(f"compiled forest differs from predict_proba by {diff:.3g} (tolerance {tolerance:g})")
+    return diff
+
+
+def compile_forest(model, check=True):
+    """
+    Compile a fitted forest, checking parity with sklearn before it is used
+
+    Raises:
+        ValueError: If the model is not a binary tree ensemble or parity fails
+    """
+    if not hasattr(model, 'estimators_') or len(getattr(model, 'classes_', ())) != 2:
+        raise ValueError(f"{type(model).__name__} is not a fitted binary forest classifier")
+    compiled = CompiledForest(model)
+    if check:
+        verify(compiled, model)
+    return compiled
+
+
+def _median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    from model_artifacts import DEFAULT_MODEL_DIR, load_artifacts
+
+    model, schema = load_artifacts(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODEL_DIR)
+    compiled = compile_forest(model, check=False)
+    X = boundary_rows(compiled, n_rows=2000)
+    print(f"Compiled {compiled.n_trees} trees, {compiled.n_nodes} nodes, max depth {compiled.max_depth}")
+    print(f"Parity: max |compiled - predict_proba| = {verify(compiled, model, X):.3g}")
+    row = X[:1]
+    print(f"Single row: sklearn {_median_ms(lambda: model.predict_proba(row), 200):.3f} ms, "
+          f"compiled {_median_ms(lambda: compiled.predict_positive(row), 200):.3f} ms")
+    print(f"{len(X)} rows:   sklearn {_median_ms(lambda: model.predict_proba(X), 5):.1f} ms, "
+          f"compiled {_median_ms(lambda: compiled.predict_positive(X), 5):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Explanation engines for the scoring API.
+
+- shap: exact TreeSHAP, as the API has always returned
+- path: Saabas-style path contributions read off the forest's node values,
+  O(depth) per tree and a single sparse product per batch
+- none: score only, for callers that do not need explanations
+
+Top-k explanations are memoized per encoded feature vector, so repeated
+leads skip the explanation pass entirely.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from request_metrics import metrics
+from score_cache import LRUCache, canonical_key
+
+ENGINES = ('shap', 'path', 'none')
+
+
+def top_impacts(values, columns, k):
+    """Top-k features by absolute impact, largest first"""
+    order = np.argsort(-np.abs(values), kind='stable')[:k]
+    return [{"feature": columns[i], "impact": float(values[i])} for i in order]
+
+
+def positive_class_shap(shap_values):
+    """Positive-class SHAP matrix, for both list and 3-D array shap outputs"""
+    if isinstance(shap_values, list):
+        return np.asarray(shap_values[1])
+    shap_values = np.asarray(shap_values)
+    return shap_values[..., 1] if shap_values.ndim == 3 else shap_values
+
+
+class TreeShapExplainer:
+    """Exact TreeSHAP values for the positive class"""
+
+    name = 'shap'
+
+    def __init__(self, model):
+        import shap
+        self._explainer = shap.TreeExplainer(model)
+
+    def contributions(self, X):
+        return positive_class_shap(self._explainer.shap_values(X))
+
+
+class PathContributionExplainer:
+    """
+    Saabas path contributions for a forest of classification trees
+
+    Every split on a lead's decision path moves the positive-class
+    probability from the parent's value to the child's; that delta is
+    credited to the parent's split feature. Deltas for all trees are stacked
+    into one sparse (total_nodes x n_features) matrix, so a batch is
+    explained with model.decision_path(X) and a single sparse product.
+    Contributions plus bias sum to predict_proba.
+    """
+
+    name = 'path'
+
+    def __init__(self, model):
+        self.model = model
+        n_features = model.n_features_in_
+        n_trees = len(model.estimators_)
+        rows, cols, deltas, bias = [], [], [], 0.0
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            value = tree.value[:, 0, :]
+            prob = value[:, 1] / np.maximum(value.sum(axis=1), 1e-12)
+            parent = np.full(tree.node_count, -1)
+            internal = np.flatnonzero(tree.children_left != -1)
+            parent[tree.children_left[internal]] = internal
+            parent[tree.children_right[internal]] = internal
+            child = np.flatnonzero(parent >= 0)
+            rows.append(child + offset)
+            cols.append(tree.feature[parent[child]])
+            deltas.append(prob[child] - prob[parent[child]])
+            bias += prob[0]
+            offset += tree.node_count
+        self.bias = bias / n_trees
+        self._node_deltas = sparse.csr_matrix(
+            (np.concatenate(deltas) / n_trees, (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, n_features),
+        )
+
+    def contributions(self, X):
+        indicator, _ = self.model.decision_path(X)
+        return np.asarray((indicator @ self._node_deltas).todense())
+
+
+class NullExplainer:
+    """Score-only mode"""
+
+    name = 'none'
+
+    def contributions(self, X):
+        return None
+
+
+class ExplanationService:
+    """
+    Dispatch to an explanation engine and memoize top-k results
+
+    Args:
+        model: Fitted forest
+        columns: Encoded feature names, in model input order
+        default: Engine used when a request does not pick one
+        top_k: Features kept per explanation
+        memo_size: Max memoized (engine, feature vector) entries
+    """
+
+    def __init__(self, model, columns, default='shap', top_k=5, memo_size=4096):
+        if default not in ENGINES:
+            raise ValueError(f"unknown explainer {default!r}, expected one of {ENGINES}")
+        self.model = model
+        self.columns = columns
+        self.default = default
+        self.top_k = top_k
+        self._engines = {'none': NullExplainer()}
+        self.memo = LRUCache(memo_size)
+
+    def engine(self, name=None):
+        """Return (and lazily build) an explanation engine by name"""
+        name = name or self.default
+        if name not in ENGINES:
+            raise ValueError(f"unknown explainer {name!r}, expected one of {ENGINES}")
+        if name not in self._engines:
+            cls = TreeShapExplainer if name == 'shap' else PathContributionExplainer
+            self._engines[name] = cls(self.model)
+        return self._engines[name]
+
+    def explain(self, X, engine=None):
+        """
+        Top-k explanations for every row of an encoded matrix
+
+        Returns:
+            tuple: (engine name, list of explanation lists in row order)
+        """
+        explainer = self.engine(engine)
+        if explainer.name == 'none':
+            return explainer.name, [[] for _ in range(len(X))]
+
+        keys = [(explainer.name, canonical_key(row)) for row in X]
+        results = [self.memo.get(key) for key in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            with metrics.stage('explain'):
+                values = explainer.contributions(X[missing])
+            with metrics.stage('rank'):
+                for i, row in zip(missing, values):
+                    results[i] = top_impacts(row, self.columns, self.top_k)
+                    self.memo.put(keys[i], results[i])
+        return explainer.name, results
@@ -0,0 +1,378 @@
+"""
+Precompiled feature encoder shared by training, export and serving.
+
+Replaces the per-request pd.get_dummies + reindex with a lookup table built
+once from the feature schema, so a lead dict is written straight into a
+preallocated NumPy row. Column order matches pd.get_dummies on the training
+frame: numeric columns first, then one block per categorical column with its
+vocabulary sorted.
+
+High-cardinality columns (Company has a category per lead) can use a
+bounded encoding instead of one-hot, so the feature width stays fixed as
+lead volume grows:
+
+    onehot      {col}_{value} per category (default, same as get_dummies)
+    drop        no columns
+    topk        one-hot for the k most frequent categories, the rest share {col}___other__
+    hash        {col}_hash_0 .. {col}_hash_{buckets-1}, FNV-1a of the value
+    frequency   {col}_frequency, the category's share of training rows
+    target      {col}_target, the category's smoothed training conversion rate
+"""
+
+import numpy as np
+import pandas as pd
+
+# Model inputs are float32 internally, so encode straight into that dtype
+DTYPE = np.float32
+
+ENCODING_STRATEGIES = ('onehot', 'drop', 'topk', 'hash', 'frequency', 'target')
+# Shared bucket for categories outside a topk vocabulary
+OTHER_CATEGORY = '__other__'
+# Parameter each strategy accepts in a "column=strategy:param" spec, with its default
+_STRATEGY_PARAMS = {'topk': ('k', 50), 'hash': ('buckets', 32), 'target': ('smoothing', 20)}
+
+
+def stable_hash(value):
+    """32-bit FNV-1a of the UTF-8 value; the JS export uses the same function"""
+    h = 0x811c9dc5
+    for byte in str(value).encode('utf-8'):
+        h = ((h ^ byte) * 0x01000193) & 0xffffffff
+    return h
+
+
+def parse_encoding_spec(spec):
+    """
+    Parse "Company=hash:64" style options into an encodings dict entry
+
+    Returns:
+        tuple: (column, {'strategy': ..., param: value})
+
+    Raises:
+        ValueError: For an unknown strategy or malformed spec
+    """
+    column, sep, rule = spec.partition('=')
+    strategy, _, param = rule.partition(':')
+    if not sep or strategy not in ENCODING_STRATEGIES:
+        raise ValueError(f"Expected COLUMN=STRATEGY[:PARAM] with a strategy in {ENCODING_STRATEGIES}, got {spec!r}")
+    encoding = {'strategy': strategy}
+    if strategy in _STRATEGY_PARAMS:
+        name, default = _STRATEGY_PARAMS[strategy]
+        encoding[name] = type(default)(param) if param else default
+    return column, encoding
+
+
+class FeatureEncoder:
+    """
+    Map lead dicts or DataFrames onto the model's encoded column layout
+
+    Unknown categories are handled deterministically: with unknown='ignore'
+    (the default) a one-hot block stays all-zero, exactly like
+    get_dummies + reindex; with unknown='error' a ValueError is raised.
+    The bounded encodings map unknown categories by design (other bucket,
+    hash bucket, or the frequency/target default). Missing or empty numeric
+    fields encode as 0.
+    """
+
+    def __init__(self, columns, numeric_columns, categorical_vocabularies, unknown='ignore', encodings=None):
+        if unknown not in ('ignore', 'error'):
+            raise ValueError(f"unknown must be 'ignore' or 'error', got {unknown!r}")
+        self.columns = [str(c) for c in columns]
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_vocabularies = {c: list(v) for c, v in categorical_vocabularies.items()}
+        self.encodings = dict(encodings or {})
+        self.unknown = unknown
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        self._numeric_index = [(c, self.column_index[c]) for c in self.numeric_columns]
+        # {column: {category: output index}}, restricted to categories the model saw
+        self._category_index = {}
+        # {column: output index for categories not in _category_index (topk, hash)}
+        self._category_fallback = {}
+        # [(column, {category: value}, default, output index)] for frequency/target
+        self._value_index = []
+        for col, vocab in self.categorical_vocabularies.items():
+            encoding = self.encoding(col)
+            strategy = encoding['strategy']
+            if strategy in ('frequency', 'target'):
+                self._value_index.append((
+                    col, encoding['values'], encoding['default'], self.column_index[f"{col}_{strategy}"],
+                ))
+                continue
+            self._category_index[col] = {
+                value: self.column_index[f"{col}_{value}"]
+                for value in vocab
+                if f"{col}_{value}" in self.column_index
+            }
+            if strategy == 'topk':
+                self._category_fallback[col] = self.column_index[f"{col}_{OTHER_CATEGORY}"]
+            elif strategy == 'hash':
+                self._category_fallback[col] = self.column_index[f"{col}_hash_0"]
+
+    @property
+    def n_features(self):
+        return len(self.columns)
+
+    @property
+    def _dense_index(self):
+        """Output index of every split() numeric column: raw numerics, then frequency/target"""
+        return [idx for _, idx in self._numeric_index] + [entry[3] for entry in self._value_index]
+
+    @property
+    def split_widths(self):
+        """Column counts of the (numeric, codes) arrays returned by split()"""
+        return len(self._dense_index), len(self._category_index)
+
+    def encoding(self, column):
+        """Encoding spec of a categorical column (one-hot unless configured)"""
+        return self.encodings.get(column, {'strategy': 'onehot'})
+
+    def layout(self):
+        """JSON-serialisable column layout, as stored in the feature schema"""
+        return {
+            'columns': list(self.columns),
+            'numeric_columns': list(self.numeric_columns),
+            'categorical_vocabularies': dict(self.categorical_vocabularies),
+            'encodings': dict(self.encodings),
+        }
+
+    @classmethod
+    def from_schema(cls, schema, unknown='ignore'):
+        """Build an encoder from a feature-schema manifest"""
+        return cls(
+            schema['columns'],
+            schema['numeric_columns'],
+            schema['categorical_vocabularies'],
+            unknown=unknown,
+            encodings=schema.get('encodings'),
+        )
+
+    @classmethod
+    def fit(cls, raw_features, unknown='ignore', encodings=None, target=None):
+        """
+        Derive the column layout from a raw (pre one-hot) training frame
+
+        Args:
+            raw_features: Feature DataFrame with non-feature columns dropped
+            encodings: {column: {'strategy': ...}} for non one-hot columns
+            target: Training target, required by the 'target' strategy
+        """
+        categorical = [c for c in raw_features.columns if raw_features[c].dtype.kind not in 'biuf']
+        numeric = [c for c in raw_features.columns if c not in categorical]
+        counts, target_sums = {}, {} if target is not None else None
+        for col in categorical:
+            grouped = pd.Series(np.asarray(target) if target is not None else 0, index=raw_features.index)
+            grouped = grouped.groupby(raw_features[col].astype(str).where(raw_features[col].notna()))
+            counts[col] = grouped.size().to_dict()
+            if target_sums is not None:
+                target_sums[col] = grouped.sum().to_dict()
+        return cls.from_statistics(numeric, counts, target_sums, encodings, unknown=unknown)
+
+    @classmethod
+    def from_statistics(cls, numeric_columns, counts, target_sums=None, encodings=None, unknown='ignore'):
+        """
+        Build the column layout from per-category training statistics
+        (e.g. accumulated chunk by chunk)
+
+        Args:
+            numeric_columns: Columns passed through as numbers
+            counts: {column: {category: rows}}
+            target_sums: {column: {category: positive rows}}; needed for 'target'
+            encodings: {column: {'strategy': ..., param: value}}; others are one-hot
+
+        Raises:
+            ValueError: For an unknown strategy, or 'target' without target_sums
+        """
+        encodings = encodings or {}
+        columns = list(numeric_columns)
+        vocabularies, fitted = {}, {}
+        for col, col_counts in counts.items():
+            col_counts = {str(v): n for v, n in col_counts.items()}
+            encoding = dict(encodings.get(col, {'strategy': 'onehot'}))
+            strategy = encoding['strategy']
+            if strategy not in ENCODING_STRATEGIES:
+                raise ValueError(f"Unknown encoding {strategy!r} for {col}, expected one of {ENCODING_STRATEGIES}")
+            if strategy == 'drop':
+                fitted[col] = encoding
+                continue
+            vocab = []
+            if strategy == 'onehot':
+                vocab = sorted(col_counts)
+                columns.extend(f"{col}_{value}" for value in vocab)
+            elif strategy == 'topk':
+                k = encoding.get('k', _STRATEGY_PARAMS['topk'][1])
+                ranked = sorted(col_counts, key=lambda v: (-col_counts[v], v))
+                vocab = sorted(ranked[:k])
+                columns.extend(f"{col}_{value}" for value in vocab)
+                columns.append(f"{col}_{OTHER_CATEGORY}")
+                encoding['k'] = k
+            elif strategy == 'hash':
+                buckets = encoding.get('buckets', _STRATEGY_PARAMS['hash'][1])
+                columns.extend(f"{col}_hash_{i}" for i in range(buckets))
+                encoding['buckets'] = buckets
+            elif strategy == 'frequency':
+                total = sum(col_counts.values()) or 1
+                encoding['values'] = {v: n / total for v, n in col_counts.items()}
+                encoding['default'] = 0.0
+                columns.append(f"{col}_frequency")
+            elif strategy == 'target':
+                if target_sums is None:
+                    raise ValueError(f"Target encoding of {col} needs the training target")
+                sums = {str(v): s for v, s in target_sums[col].items()}
+                smoothing = encoding.get('smoothing', _STRATEGY_PARAMS['target'][1])
+                prior = sum(sums.values()) / (sum(col_counts.values()) or 1)
+                # Shrink rare categories towards the overall rate
+                encoding['values'] = {
+                    v: (sums.get(v, 0) + smoothing * prior) / (n + smoothing) for v, n in col_counts.items()
+                }
+                encoding['default'] = prior
+                encoding['smoothing'] = smoothing
+                columns.append(f"{col}_target")
+            vocabularies[col] = vocab
+            if strategy != 'onehot':
+                fitted[col] = encoding
+        return cls(columns, numeric_columns, vocabularies, unknown=unknown, encodings=fitted)
+
+    def allocate(self, n_rows):
+        """Zeroed feature matrix for n_rows leads"""
+        return np.zeros((n_rows, self.n_features), dtype=DTYPE)
+
+    def category_position(self, column, value):
+        """
+        Output index a category value sets to 1, or None
+
+        Raises:
+            ValueError: If the category is unknown, one-hot and unknown='error'
+        """
+        idx = self._category_index[column].get(value)
+        if idx is not None:
+            return idx
+        fallback = self._category_fallback.get(column)
+        if fallback is None:
+            if self.unknown == 'error':
+                raise ValueError(f"unknown {column} {value!r}")
+            return None
+        if self.encodings[column]['strategy'] == 'hash':
+            return fallback + stable_hash(value) % self.encodings[column]['buckets']
+        return fallback
+
+    def encode_into(self, lead, out):
+        """
+        Encode one lead dict into a preallocated row
+
+        Raises:
+            ValueError: If the lead is not a dict, a numeric field is not
+                numeric, or a category is unknown and unknown='error'
+        """
+        if not isinstance(lead, dict):
+            raise ValueError('lead must be a JSON object')
+        out[:] = 0
+        for col, idx in self._numeric_index:
+            value = lead.get(col)
+            if value is None or value == '':
+                continue
+            try:
+                out[idx] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"'{col}' must be numeric, got {value!r}")
+        for col in self._category_index:
+            value = lead.get(col)
+            if value is None or value == '':
+                continue
+            idx = self.category_position(col, str(value))
+            if idx is not None:
+                out[idx] = 1
+        for col, values, default, idx in self._value_index:
+            value = lead.get(col)
+            out[idx] = default if value is None or value == '' else values.get(str(value), default)
+        return out
+
+    def encode(self, lead):
+        """Encode one lead dict into a (1, n_features) matrix"""
+        out = self.allocate(1)
+        self.encode_into(lead, out[0])
+        return out
+
+    def encode_batch(self, leads):
+        """Encode a list of lead dicts into an (n, n_features) matrix"""
+        out = self.allocate(len(leads))
+        for row, lead in zip(out, leads):
+            self.encode_into(lead, row)
+        return out
+
+    def split(self, frame, overrides=None):
+        """
+        Compact encoding of a raw DataFrame: numeric values (raw numerics
+        followed by frequency/target columns) plus, per remaining categorical
+        column, the output index of its one-hot column (-1 for missing or
+        unknown). This is what the feature store caches.
+
+        Args:
+            overrides: {column: per-row values} used instead of a
+                frequency/target table, e.g. out-of-fold training rates
+
+        Returns:
+            tuple: (numeric float32 (n, n_dense), codes int32 (n, n_categorical))
+        """
+        numeric = np.zeros((len(frame), len(self._dense_index)), dtype=DTYPE)
+        for j, (col, _) in enumerate(self._numeric_index):
+            if col in frame:
+                numeric[:, j] = pd.to_numeric(frame[col], errors='coerce').fillna(0).to_numpy()
+        for j, (col, values, default, _) in enumerate(self._value_index, start=len(self._numeric_index)):
+            numeric[:, j] = default
+            if overrides and col in overrides:
+                numeric[:, j] = overrides[col]
+            elif col in frame:
+                categories, table = self._categories(frame[col])
+                lookup = np.array([values.get(c, default) for c in categories] + [default], dtype=DTYPE)
+                numeric[:, j] = lookup[table]
+        codes = np.full((len(frame), len(self._category_index)), -1, dtype=np.int32)
+        for j, col in enumerate(self._category_index):
+            if col not in frame:
+                continue
+            categories, table = self._categories(frame[col])
+            # Look up each distinct category once instead of every row
+            positions = [self.category_position(col, c) for c in categories]
+            lookup = np.array([-1 if p is None else p for p in positions] + [-1], dtype=np.int32)
+            codes[:, j] = lookup[table]  # missing values (code -1) hit the trailing -1
+        return numeric, codes
+
+    @staticmethod
+    def _categories(values):
+        """Distinct string categories of a column and each row's position in them (-1 if missing)"""
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        return [str(c) for c in values.cat.categories], values.cat.codes.to_numpy()
+
+    def expand(self, numeric, codes):
+        """Dense (n, n_features) matrix from the output of split()"""
+        out = self.allocate(len(numeric))
+        out[:, self._dense_index] = numeric
+        for j in range(codes.shape[1]):
+            rows = np.flatnonzero(codes[:, j] >= 0)
+            out[rows, codes[rows, j]] = 1
+        return out
+
+    def expand_sparse(self, numeric, codes):
+        """Sparse CSR (n, n_features) matrix from the output of split()"""
+        from scipy import sparse
+
+        n_rows = len(numeric)
+        dense_cols = np.array(self._dense_index, dtype=np.int32)
+        num_rows, num_pos = np.nonzero(numeric)
+        cat_rows, cat_pos = np.nonzero(np.asarray(codes) >= 0)
+        rows = np.concatenate([num_rows, cat_rows])
+        cols = np.concatenate([dense_cols[num_pos], np.asarray(codes)[cat_rows, cat_pos]])
+        data = np.concatenate([np.asarray(numeric)[num_rows, num_pos], np.ones(len(cat_rows), dtype=DTYPE)])
+        return sparse.csr_matrix((data, (rows, cols)), shape=(n_rows, self.n_features), dtype=DTYPE)
+
+    def transform(self, frame):
+        """
+        Vectorized encoding of a raw DataFrame (training or bulk scoring)
+
+        Returns:
+            np.ndarray: (len(frame), n_features) float32 matrix
+        """
+        return self.expand(*self.split(frame))
+
+    def to_frame(self, frame):
+        """transform() wrapped in a DataFrame labelled with the encoded column names"""
+        return pd.DataFrame(self.transform(frame), columns=self.columns, index=frame.index)
@@ -0,0 +1,357 @@
+"""
+On-disk cache of the preprocessed training features.
+
+Training, export and the API's --train path all need the same encoded
+matrix. Instead of each re-reading the CSV and rerunning drop + one-hot,
+the first run writes a compact cache and the rest memory-map it:
+
+    .feature_cache/<key>/
+        numeric.npy      <- float32 (n, n_numeric)
+        codes.npy        <- int16/int32 (n, n_categorical), one-hot column index or -1
+        target.npy       <- int8 (n,)
+        meta.json        <- encoder layout, data hash, preprocessing config
+
+The key is a hash of the CSV contents and the preprocessing config (dropped
+columns, target, categorical encodings or the encoder layout when one is
+supplied), so a cache entry is
+rebuilt only when either changes. Categories are stored as codes rather
+than as the dense one-hot matrix, which is almost all zeros; expanding the
+codes back is a single scatter per categorical column, or a sparse matrix
+for training on large histories.
+
+Entries are built by streaming the CSV in chunks, so ingestion memory is
+bounded by the chunk size rather than the file size:
+
+    1. vocabulary pass: count rows and collect each categorical column's
+       category counts and conversions (read as pandas 'category' dtype)
+    2. encode pass: encode each chunk and write it straight into
+       preallocated memory-mapped arrays
+
+Target-encoded columns of the training rows hold out-of-fold rates: rows
+are split into TARGET_ENCODING_FOLDS folds by position and each row gets
+the smoothed rate computed without its own fold, so the model cannot read
+a lead's own label back out of its encoding. The encoder's serving table
+uses all rows.
+
+Process memory is printed after each stage.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: memory is only reported where /proc exists
+    resource = None
+
+# ml_api.py runs from ml_backend/, the training scripts from the repo root
+try:
+    from feature_encoder import FeatureEncoder
+    from model_artifacts import (
+        BASE_DIR, CATEGORICAL_ENCODINGS, DROP_COLUMNS, TARGET_COLUMN, file_sha256,
+    )
+except ImportError:
+    from ml_backend.feature_encoder import FeatureEncoder
+    from ml_backend.model_artifacts import (
+        BASE_DIR, CATEGORICAL_ENCODINGS, DROP_COLUMNS, TARGET_COLUMN, file_sha256,
+    )
+
+# Cache location; entries are disposable and safe to delete at any time
+DEFAULT_CACHE_DIR = os.getenv('LEAD_FEATURE_CACHE', os.path.join(BASE_DIR, '.feature_cache'))
+# Rows per CSV chunk while building an entry; bounds ingestion memory
+CHUNK_ROWS = int(os.getenv('LEAD_CSV_CHUNK_ROWS', '200000'))
+# Folds for out-of-fold target encoding of the training rows
+TARGET_ENCODING_FOLDS = 5
+# Bump when the on-disk layout or the preprocessing itself changes
+STORE_FORMAT = 3
+META_FILENAME = 'meta.json'
+
+
+def rss_mb():
+    """Resident memory of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return float('nan')
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if peak > 2**30 else peak / 2**10  # bytes on macOS, KB on Linux
+
+
+def process_memory():
+    """
+    RSS of this process split into shared and private pages, in MB
+
+    PSS charges each shared page to the processes sharing it, so summing it
+    over pre-forked workers gives their real combined footprint. Falls back
+    to rss_mb() alone where /proc/self/smaps_rollup is unavailable.
+    """
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = int(value.split()[0]) / 1024
+    except OSError:
+        return {'rss_mb': rss_mb()}
+    return {
+        'rss_mb': fields.get('Rss', 0.0),
+        'pss_mb': fields.get('Pss', 0.0),
+        'shared_mb': fields.get('Shared_Clean', 0.0) + fields.get('Shared_Dirty', 0.0),
+        'private_mb': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0),
+    }
+
+
+def report_memory(stage, detail=''):
+    print(f"[feature store] {stage}: RSS {rss_mb():.0f} MB{f' ({detail})' if detail else ''}")
+
+
+def preprocessing_config(encoder=None, encodings=None):
+    """
+    Everything besides the CSV contents that determines the cached arrays
+
+    Args:
+        encoder: Fixed column layout to encode into (e.g. a trained model's
+            schema); None means the layout is fitted on the CSV itself
+        encodings: Categorical encodings used when fitting the layout
+    """
+    return {
+        'format': STORE_FORMAT,
+        'drop_columns': list(DROP_COLUMNS),
+        'target': TARGET_COLUMN,
+        'encodings': encodings if encoder is None else None,
+        'layout': None if encoder is None else encoder.layout(),
+    }
+
+
+def cache_key(data_hash, config):
+    """Cache entry name for one CSV content hash and preprocessing config"""
+    digest = hashlib.sha256(data_hash.encode())
+    digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()[:24]
+
+
+class FeatureSet:
+    """
+    Cached features for one CSV; arrays are memory-mapped read-only
+
+    Attributes:
+        encoder: FeatureEncoder describing the column layout
+        y: Target vector
+        data_hash: sha256 of the source CSV
+        from_cache: False if this call had to build the entry
+    """
+
+    def __init__(self, encoder, numeric, codes, y, data_hash, from_cache):
+        self.encoder = encoder
+        self.numeric = numeric
+        self.codes = codes
+        self.y = y
+        self.data_hash = data_hash
+        self.from_cache = from_cache
+
+    def __len__(self):
+        return len(self.y)
+
+    @property
+    def columns(self):
+        return self.encoder.columns
+
+    @property
+    def X(self):
+        """Dense float32 (n, n_features) matrix"""
+        return self.encoder.expand(self.numeric, self.codes)
+
+    @property
+    def X_sparse(self):
+        """Sparse CSR float32 (n, n_features) matrix; use for large histories"""
+        return self.encoder.expand_sparse(self.numeric, self.codes)
+
+    @property
+    def nbytes(self):
+        """Size of the cached arrays"""
+        return self.numeric.nbytes + self.codes.nbytes + self.y.nbytes
+
+    def to_frame(self):
+        """X as a DataFrame labelled with the encoded column names"""
+        return pd.DataFrame(self.X, columns=self.columns)
+
+
+def _read_chunks(data_path, **kwargs):
+    return pd.read_csv(data_path, chunksize=CHUNK_ROWS, **kwargs)
+
+
+def _add_counts(totals, series):
+    for key, value in series.items():
+        totals[key] = totals.get(key, 0) + int(value)
+
+
+def _add_fold_counts(totals, chunk, column, start):
+    folds = np.arange(start, start + len(chunk)) % TARGET_ENCODING_FOLDS
+    grouped = chunk[TARGET_COLUMN].groupby([chunk[column], folds], observed=True).agg(['size', 'sum'])
+    for (category, fold), (size, positives) in grouped.iterrows():
+        stats = totals.setdefault(str(category), np.zeros((2, TARGET_ENCODING_FOLDS)))
+        stats[:, fold] += (size, positives)
+
+
+def _out_of_fold_rates(values, start, stats, encoding):
+    """Smoothed target rate of each training row, computed without the row's own fold"""
+    folds = np.arange(start, start + len(values)) % TARGET_ENCODING_FOLDS
+    empty = np.zeros((2, TARGET_ENCODING_FOLDS))
+    # (categories + missing, [rows, positives], folds); code -1 picks the trailing empty entry
+    table = np.array([stats.get(str(c), empty) for c in values.cat.categories] + [empty])
+    per_row = table[values.cat.codes.to_numpy()]
+    held_in = per_row.sum(axis=2) - per_row[np.arange(len(values)), :, folds]
+    smoothing, prior = encoding['smoothing'], encoding['default']
+    return (held_in[:, 1] + smoothing * prior) / (held_in[:, 0] + smoothing)
+
+
+def _scan_vocabularies(data_path, encodings):
+    """
+    Pass 1: row count and per-category row and conversion counts
+
+    Column types are inferred from the first chunk, as get_dummies would on
+    a frame of that chunk; later chunks only read the categorical columns.
+
+    Returns:
+        tuple: (encoder, n_rows, {target-encoded column: per-fold stats})
+    """
+    header = pd.read_csv(data_path, nrows=CHUNK_ROWS)
+    raw = header.drop(DROP_COLUMNS, axis=1)
+    categorical = [c for c in raw.columns if raw[c].dtype.kind not in 'biuf']
+    numeric = [c for c in raw.columns if c not in categorical]
+    counts = {c: {} for c in categorical}
+    target_sums = {c: {} for c in categorical}
+    fold_stats = {c: {} for c in categorical if encodings.get(c, {}).get('strategy') == 'target'}
+    n_rows = 0
+    for chunk in _read_chunks(data_path, usecols=categorical + [TARGET_COLUMN],
+                              dtype={c: 'category' for c in categorical}):
+        for col in categorical:
+            grouped = chunk.groupby(col, observed=True)[TARGET_COLUMN]
+            _add_counts(counts[col], grouped.size())
+            _add_counts(target_sums[col], grouped.sum())
+        for col, stats in fold_stats.items():
+            _add_fold_counts(stats, chunk, col, n_rows)
+        n_rows += len(chunk)
+    encoder = FeatureEncoder.from_statistics(numeric, counts, target_sums, encodings)
+    return encoder, n_rows, fold_stats
+
+
+def _count_rows(data_path):
+    return sum(len(chunk) for chunk in _read_chunks(data_path, usecols=[TARGET_COLUMN]))
+
+
+def _build(data_path, encoder, encodings, entry_dir, data_hash, config):
+    report_memory('start')
+    fold_stats = {}
+    if encoder is None:
+        encoder, n_rows, fold_stats = _scan_vocabularies(data_path, encodings)
+    else:
+        n_rows = _count_rows(data_path)
+    report_memory('vocabulary pass', f"{n_rows} rows, {encoder.n_features} encoded columns")
+
+    # One-hot column indices fit in int16 unless the layout is very wide
+    code_dtype = np.int16 if encoder.n_features < 2**15 else np.int32
+    columns = list(encoder.numeric_columns) + list(encoder.categorical_vocabularies)
+    dtypes = {
+        **{c: 'float32' for c in encoder.numeric_columns},
+        **{c: 'category' for c in encoder.categorical_vocabularies},
+        TARGET_COLUMN: 'int8',
+    }
+
+    # Write into a scratch directory and rename it into place, so concurrent
+    # readers see either no entry or a complete one
+    os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(entry_dir))
+    try:
+        open_array = lambda name, dtype, shape: np.lib.format.open_memmap(
+            os.path.join(tmp_dir, name), mode='w+', dtype=dtype, shape=shape)
+        n_numeric, n_codes = encoder.split_widths
+        numeric = open_array('numeric.npy', np.float32, (n_rows, n_numeric))
+        codes = open_array('codes.npy', code_dtype, (n_rows, n_codes))
+        y = open_array('target.npy', np.int8, (n_rows,))
+
+        # Pass 2: encode chunk by chunk into the memory-mapped arrays
+        start = 0
+        for chunk in _read_chunks(data_path, usecols=columns + [TARGET_COLUMN], dtype=dtypes):
+            stop = start + len(chunk)
+            overrides = {
+                col: _out_of_fold_rates(chunk[col], start, stats, encoder.encoding(col))
+                for col, stats in fold_stats.items()
+            }
+            numeric[start:stop], codes[start:stop] = encoder.split(chunk, overrides)
+            y[start:stop] = chunk[TARGET_COLUMN].to_numpy()
+            start = stop
+        for array in (numeric, codes, y):
+            array.flush()
+        del numeric, codes, y
+        report_memory('encode pass')
+
+        with open(os.path.join(tmp_dir, META_FILENAME), 'w') as f:
+            json.dump({
+                **encoder.layout(),
+                'data_path': os.path.basename(data_path),
+                'data_hash': data_hash,
+                'config': config,
+                'rows': n_rows,
+                'created_at': datetime.now().isoformat(),
+            }, f)
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # Another process finished the same entry first; use theirs
+        if not os.path.exists(os.path.join(entry_dir, META_FILENAME)):
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_features(data_path, encoder=None, encodings=None, cache_dir=DEFAULT_CACHE_DIR, rebuild=False):
+    """
+    Encoded features and target for a CSV, from the cache when possible
+
+    Args:
+        data_path: Training CSV
+        encoder: Encode into this fixed layout instead of fitting one
+        encodings: Categorical encodings for a fitted layout; defaults to
+            CATEGORICAL_ENCODINGS (ignored when encoder is given)
+        cache_dir: Root directory of the cache
+        rebuild: Ignore any existing entry and re-encode the CSV
+
+    Returns:
+        FeatureSet
+    """
+    data_hash = file_sha256(data_path)
+    encodings = CATEGORICAL_ENCODINGS if encodings is None else encodings
+    config = preprocessing_config(encoder, encodings)
+    entry_dir = os.path.join(cache_dir, cache_key(data_hash, config))
+    meta_path = os.path.join(entry_dir, META_FILENAME)
+
+    from_cache = os.path.exists(meta_path) and not rebuild
+    if not from_cache:
+        if rebuild:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        _build(data_path, encoder, encodings, entry_dir, data_hash, config)
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    load = lambda name: np.load(os.path.join(entry_dir, name), mmap_mode='r')
+    features = FeatureSet(
+        encoder or FeatureEncoder.from_schema(meta),
+        load('numeric.npy'),
+        load('codes.npy'),
+        load('target.npy'),
+        data_hash,
+        from_cache,
+    )
+    dense_mb = len(features) * features.encoder.n_features * 4 / 2**20
+    report_memory('load', f"cached arrays {features.nbytes / 2**20:.1f} MB, dense matrix would be {dense_mb:.0f} MB")
+    return features
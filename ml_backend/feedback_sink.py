@@ -0,0 +1,146 @@
+"""
+Buffered, concurrency-safe feedback writer.
+
+Request handlers only put a record on an in-memory queue; a background
+thread writes batches to feedback.csv (fixed column schema) and, optionally,
+an append-only JSON-lines log with the full payload. Each batch is one
+locked append, so concurrent workers never interleave rows or duplicate the
+header.
+"""
+
+import atexit
+import csv
+import io
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server, no cross-process lock
+    fcntl = None
+
+FEEDBACK_COLUMNS = [
+    'received_at', 'id', 'contact', 'company', 'title', 'industry', 'companySize',
+    'pageViews', 'downloads', 'webinarAttended', 'intentScore', 'correct',
+]
+
+
+def _locked_append(path, text, header=None):
+    """Append text to path under an exclusive lock, writing header if the file is new"""
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            if header and os.fstat(f.fileno()).st_size == 0:
+                f.write(header)
+            f.write(text)
+            f.flush()
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class FeedbackSink:
+    """
+    Queue feedback records and write them in batches from a background thread
+
+    Args:
+        csv_path: CSV file with the fixed FEEDBACK_COLUMNS schema
+        jsonl_path: Optional JSON-lines log of the full payloads
+        batch_size: Flush once this many records are buffered
+        flush_interval: Flush buffered records at least this often (seconds)
+        max_queue: Records held in memory before submit() starts rejecting
+    """
+
+    def __init__(self, csv_path, jsonl_path=None, batch_size=200, flush_interval=1.0, max_queue=10000):
+        self.csv_path = csv_path
+        self.jsonl_path = jsonl_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        # Guards written/dropped: submit() runs on request threads, _write() on the writer thread
+        self._counts_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='feedback-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def after_fork(self):
+        """Start a fresh queue and writer thread in a forked worker; threads do not survive fork"""
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._stop = threading.Event()
+        self._thread = None
+        self._counts_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        return self.start()
+
+    def submit(self, record):
+        """Queue one feedback record; returns False if the queue is full"""
+        record = dict(record, received_at=datetime.now().isoformat())
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._counts_lock:
+                self.dropped += 1
+            return False
+
+    def close(self, timeout=5.0):
+        """Stop the writer thread after flushing everything still queued"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self._write(self._drain([]))
+
+    def stats(self):
+        with self._counts_lock:
+            written, dropped = self.written, self.dropped
+        return {'queued': self._queue.qsize(), 'written': written, 'dropped': dropped}
+
+    def _drain(self, batch):
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stop.is_set():
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0.01)))
+            except queue.Empty:
+                pass
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+        self._write(self._drain(batch))
+
+    def _write(self, batch):
+        if not batch:
+            return
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=FEEDBACK_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        writer.writerows(batch)
+        header = ','.join(FEEDBACK_COLUMNS) + '\n'
+        _locked_append(self.csv_path, buf.getvalue(), header=header)
+        if self.jsonl_path:
+            lines = ''.join(json.dumps(r, default=str) + '\n' for r in batch)
+            _locked_append(self.jsonl_path, lines)
+        with self._counts_lock:
+            self.written += len(batch)
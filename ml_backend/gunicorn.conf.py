@@ -0,0 +1,77 @@
+"""
+Production serving config: pre-forked gunicorn workers sharing one model.
+
+The app is imported once in the master (preload_app), which loads the
+forest, encoder and warmed explainers; uncompressed artifacts are
+memory-mapped while loading (LEAD_MODEL_MMAP). The master then freezes the
+garbage collector's view of those objects and forks, so every worker
+shares the read-only model pages copy-on-write instead of holding its own
+copy. Each worker reports its RSS and PSS (its fair share of the shared
+pages) once it is ready, and /metrics exposes the same figures.
+
+Usage (from ml_backend/):
+    gunicorn -c gunicorn.conf.py ml_api:app
+
+    LEAD_API_WORKERS    worker processes (default: one per core)
+    LEAD_API_THREADS    threads per worker (default 8; 1 gives sync workers)
+    LEAD_API_BIND       listen address (default 0.0.0.0:5000)
+    LEAD_API_TIMEOUT    worker timeout in seconds (default 60)
+
+Workers are threaded (gthread) by default. A sync worker handles one
+request at a time, so the micro-batcher (LEAD_API_MICROBATCH=1) would only
+ever see batches of one, and a chat stream would hold the worker and block
+/score however low CHAT_MAX_CONCURRENCY is. Keep threads above
+CHAT_MAX_CONCURRENCY (default 4) so /score always has a free thread.
+
+LEAD_MODEL_WATCH_SECONDS and /admin/reload act per worker: a reloaded
+model is private to the worker that loaded it, so for a fleet-wide update
+with shared pages, restart gunicorn (kill -HUP re-imports in the master).
+"""
+
+import gc
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from feature_store import process_memory  # noqa: E402
+
+bind = os.getenv('LEAD_API_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('LEAD_API_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.getenv('LEAD_API_THREADS', '8'))
+# Concurrent requests per worker: micro-batches form and chat streams don't block /score
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.getenv('LEAD_API_TIMEOUT', '60'))
+# Import ml_api, and with it the model, once in the master before forking
+preload_app = True
+
+
+def _memory_line(memory):
+    parts = [f"RSS {memory['rss_mb']:.0f} MB"]
+    if 'pss_mb' in memory:
+        parts.append(f"PSS {memory['pss_mb']:.0f} MB, shared {memory['shared_mb']:.0f} MB, "
+                     f"private {memory['private_mb']:.0f} MB")
+    return ', '.join(parts)
+
+
+def when_ready(server):
+    # Everything allocated so far (model, explainers) is moved out of the
+    # collector's generations, so GC passes in the workers never write to
+    # those objects' pages and un-share them
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Master loaded the model: {_memory_line(process_memory())}")
+
+
+def post_fork(server, worker):
+    import ml_api
+    ml_api.after_fork()
+
+
+def post_worker_init(worker):
+    worker.log.info(f"Worker {worker.pid} ready: {_memory_line(process_memory())}")
+
+
+def worker_exit(server, worker):
+    import ml_api
+    ml_api.feedback_sink.close()
@@ -0,0 +1,383 @@
+"""
+Persistent, indexed lead store (SQLite) behind the /leads endpoints.
+
+The dashboard used to hold every lead in memory and rewrite all of them to
+localStorage after each import. Here leads live in one SQLite table,
+written in bulk on import and read one page at a time:
+
+    leads(id, contact, company, title, industry, company_size, email, website,
+          page_views, downloads, webinar_attended, intent_score, score,
+          model_version, explanation, extra, imported_at, scored_at)
+
+Lead dicts use the frontend's field names (companySize, pageViews,
+intentScore, ...). Fields without a column, such as insights, reasoning
+and recommendedAction, are kept as JSON in `extra` and merged back on read.
+
+Indexes cover the dashboard's queries:
+- hot leads: intent_score, id
+- filters: industry or company_size, then intent_score
+- recent imports: imported_at, id
+
+Every list sort ends in id, so pages use keyset pagination. The cursor is
+the last row's (sort value, id), and a page costs the same at row 50 as
+at row 5,000,000. Counts are only computed when asked for.
+
+Scores are updated in place, either with client-computed scores or by
+rescoring leads whose model_version is not the served one, a batch at a
+time.
+
+Each thread opens its own connection. The database runs in WAL mode, so
+readers never wait for an import, and the gunicorn workers share one file.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Frontend field -> column, for fields stored in their own column
+FIELD_COLUMNS = {
+    'contact': 'contact',
+    'company': 'company',
+    'title': 'title',
+    'industry': 'industry',
+    'companySize': 'company_size',
+    'email': 'email',
+    'website': 'website',
+    'pageViews': 'page_views',
+    'downloads': 'downloads',
+    'webinarAttended': 'webinar_attended',
+    'intentScore': 'intent_score',
+    'score': 'score',
+    'modelVersion': 'model_version',
+    'explanation': 'explanation',
+}
+COLUMN_FIELDS = {column: field for field, column in FIELD_COLUMNS.items()}
+NUMERIC_FIELDS = ('pageViews', 'downloads', 'webinarAttended', 'intentScore')
+# Sort keys accepted by query(); every order ends in id, for keyset pagination
+SORT_COLUMNS = {'intentScore': 'intent_score', 'importedAt': 'imported_at', 'id': 'id'}
+# intentScore from which the dashboard calls a lead hot
+HOT_LEAD_SCORE = 85
+# Frontend field -> training CSV column, for rescoring stored leads. Intent Score is
+# left out: the dashboard's intentScore is the model's own output, as in ml_model.js
+MODEL_INPUT_FIELDS = {
+    'company': 'Company',
+    'title': 'Title',
+    'industry': 'Industry',
+    'companySize': 'Company Size',
+    'pageViews': 'Page Views',
+    'downloads': 'Downloads',
+    'webinarAttended': 'Webinar Attended',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY,
+    contact TEXT,
+    company TEXT,
+    title TEXT,
+    industry TEXT,
+    company_size TEXT,
+    email TEXT,
+    website TEXT,
+    page_views REAL NOT NULL DEFAULT 0,
+    downloads REAL NOT NULL DEFAULT 0,
+    webinar_attended INTEGER NOT NULL DEFAULT 0,
+    intent_score INTEGER NOT NULL DEFAULT 0,
+    score REAL,
+    model_version TEXT,
+    explanation TEXT,
+    extra TEXT,
+    imported_at TEXT NOT NULL,
+    scored_at TEXT
+);
+CREATE INDEX IF NOT EXISTS leads_intent_score ON leads (intent_score, id);
+CREATE INDEX IF NOT EXISTS leads_industry_score ON leads (industry, intent_score, id);
+CREATE INDEX IF NOT EXISTS leads_company_size_score ON leads (company_size, intent_score, id);
+CREATE INDEX IF NOT EXISTS leads_imported_at ON leads (imported_at, id);
+CREATE INDEX IF NOT EXISTS leads_model_version ON leads (model_version);
+"""
+_COLUMNS = tuple(FIELD_COLUMNS.values())
+
+
+def _number(value, field):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    try:
+        return float(value) if field != 'intentScore' else int(round(float(value)))
+    except (TypeError, ValueError):
+        raise ValueError(f"'{field}' must be numeric, got {value!r}")
+
+
+def _lead_id(value):
+    # bool is an int subclass; ids past SQLite's 64-bit range would raise OverflowError
+    if not isinstance(value, int) or isinstance(value, bool) or not -2 ** 63 <= value < 2 ** 63:
+        raise ValueError(f"lead ids must be integers, got {value!r}")
+    return value
+
+
+def model_input(lead):
+    """A stored lead as the lead dict the feature encoder expects"""
+    return {column: lead.get(field) for field, column in MODEL_INPUT_FIELDS.items()}
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(sort value, id) from a page cursor; ValueError if it was not made by encode_cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError('invalid cursor')
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError('invalid cursor')
+    return values
+
+
+class LeadStore:
+    """
+    SQLite-backed lead table with bulk insert, paginated queries and score updates
+
+    Args:
+        path: Database file (created with its schema on first use)
+        busy_timeout: Seconds a writer waits for another process's write lock
+    """
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        """Drop connections inherited from the parent; SQLite handles must not cross a fork"""
+        self._local = threading.local()
+
+    def _row(self, lead, imported_at):
+        if not isinstance(lead, dict):
+            raise ValueError('lead must be a JSON object')
+        values = []
+        for field, column in FIELD_COLUMNS.items():
+            value = lead.get(field)
+            if field in NUMERIC_FIELDS:
+                value = _number(value, field)
+            elif field == 'score':
+                value = None if value is None else _number(value, field)
+            elif field == 'explanation':
+                value = None if value is None else json.dumps(value)
+            elif value is not None:
+                value = str(value)
+            values.append(value)
+        extra = {k: v for k, v in lead.items() if k not in FIELD_COLUMNS and k not in ('id', 'importedAt')}
+        values.append(json.dumps(extra) if extra else None)
+        values.append(imported_at)
+        values.append(imported_at if lead.get('intentScore') is not None else None)
+        return values
+
+    def insert_leads(self, leads):
+        """
+        Insert many leads in one transaction
+
+        Raises:
+            ValueError: If any lead is not a dict or has a non-numeric numeric
+                field; nothing is inserted then
+
+        Returns:
+            list: Ids assigned to the leads, in input order
+        """
+        imported_at = datetime.now().isoformat(timespec='seconds')
+        rows = [self._row(lead, imported_at) for lead in leads]
+        placeholders = ', '.join('?' * (len(_COLUMNS) + 3))
+        conn = self._connect()
+        with conn:
+            # Take the write lock before reading MAX(id), so concurrent imports get disjoint ids
+            conn.execute('BEGIN IMMEDIATE')
+            start = conn.execute('SELECT COALESCE(MAX(id), 0) FROM leads').fetchone()[0] + 1
+            conn.executemany(
+                f"INSERT INTO leads (id, {', '.join(_COLUMNS)}, extra, imported_at, scored_at) "
+                f"VALUES (?, {placeholders})",
+                ([start + i] + row for i, row in enumerate(rows)),
+            )
+        return list(range(start, start + len(rows)))
+
+    def _to_lead(self, row):
+        lead = json.loads(row['extra']) if row['extra'] else {}
+        lead['id'] = row['id']
+        for column in _COLUMNS:
+            value = row[column]
+            if column == 'explanation':
+                value = json.loads(value) if value else None
+            elif column in ('page_views', 'downloads') and value is not None and float(value).is_integer():
+                value = int(value)
+            lead[COLUMN_FIELDS[column]] = value
+        lead['webinarAttended'] = bool(lead['webinarAttended'])
+        lead['importedAt'] = row['imported_at']
+        lead['scoredAt'] = row['scored_at']
+        return lead
+
+    def get(self, lead_id):
+        row = self._connect().execute('SELECT * FROM leads WHERE id = ?', (lead_id,)).fetchone()
+        return None if row is None else self._to_lead(row)
+
+    def query(self, min_score=None, max_score=None, industry=None, company_size=None, imported_after=None,
+              imported_before=None, search=None, sort='intentScore', descending=True, limit=50, cursor=None,
+              count=False):
+        """
+        One page of leads matching the filters
+
+        Args:
+            min_score, max_score: Inclusive intentScore bounds
+            industry, company_size: Exact matches
+            imported_after, imported_before: ISO timestamps, inclusive / exclusive
+            search: Case-insensitive substring of contact, company or title
+                (not indexed; combine with a score or industry filter on large stores)
+            sort: One of SORT_COLUMNS; ties are broken by id in the same direction
+            cursor: next_cursor of the previous page
+            count: Also return the number of matching leads (scans the matches)
+
+        Raises:
+            ValueError: For an unknown sort key or a malformed cursor
+
+        Returns:
+            dict: leads, next_cursor (None on the last page) and, with count, total
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"unknown sort {sort!r}, expected one of {tuple(SORT_COLUMNS)}")
+        column = SORT_COLUMNS[sort]
+        where, params = [], []
+        for clause, value in (
+            ('intent_score >= ?', min_score), ('intent_score <= ?', max_score),
+            ('industry = ?', industry), ('company_size = ?', company_size),
+            ('imported_at >= ?', imported_after), ('imported_at < ?', imported_before),
+        ):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        if search:
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            where.append("(contact LIKE ? ESCAPE '\\' OR company LIKE ? ESCAPE '\\' OR title LIKE ? ESCAPE '\\')")
+            params.extend([pattern] * 3)
+        filters = ' AND '.join(where) or '1'
+
+        conn = self._connect()
+        result = {}
+        if count:
+            result['total'] = conn.execute(f'SELECT COUNT(*) FROM leads WHERE {filters}', params).fetchone()[0]
+
+        page_where, page_params = list(where), list(params)
+        if cursor is not None:
+            after_value, after_id = decode_cursor(cursor)
+            op = '<' if descending else '>'
+            page_where.append(f'(id {op} ?)' if column == 'id' else f'(({column}, id) {op} (?, ?))')
+            page_params.extend([after_id] if column == 'id' else [after_value, after_id])
+        direction = 'DESC' if descending else 'ASC'
+        order = f'id {direction}' if column == 'id' else f'{column} {direction}, id {direction}'
+        rows = conn.execute(
+            f"SELECT * FROM leads WHERE {' AND '.join(page_where) or '1'} ORDER BY {order} LIMIT ?",
+            page_params + [limit + 1],
+        ).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        result['leads'] = [self._to_lead(row) for row in rows]
+        result['next_cursor'] = encode_cursor([rows[-1][column], rows[-1]['id']]) if more else None
+        return result
+
+    def update_scores(self, updates):
+        """
+        Set new scores on existing leads
+
+        Args:
+            updates: Dicts with id and intentScore and/or score (0-1; sets
+                intentScore too), plus optional explanation, modelVersion and
+                any extra fields (insights, reasoning, ...) to replace
+
+        Returns:
+            int: Leads updated (unknown ids are skipped)
+        """
+        scored_at = datetime.now().isoformat(timespec='seconds')
+        updated = 0
+        conn = self._connect()
+        with conn:
+            for update in updates:
+                if not isinstance(update, dict) or 'id' not in update:
+                    raise ValueError('each score update needs an id')
+                lead_id = _lead_id(update['id'])
+                score = update.get('score')
+                intent = update.get('intentScore')
+                if score is not None:
+                    score = _number(score, 'score')
+                    intent = round(score * 100) if intent is None else intent
+                if intent is None:
+                    raise ValueError(f"score update for lead {lead_id} has no intentScore or score")
+                sets = {'intent_score': _number(intent, 'intentScore'), 'score': score, 'scored_at': scored_at}
+                if 'explanation' in update:
+                    sets['explanation'] = json.dumps(update['explanation'])
+                if 'modelVersion' in update:
+                    sets['model_version'] = update['modelVersion']
+                extra = {k: v for k, v in update.items() if k not in FIELD_COLUMNS and k != 'id'}
+                assignments = ', '.join(f'{c} = ?' for c in sets)
+                params = list(sets.values())
+                if extra:
+                    assignments += ", extra = json_patch(COALESCE(extra, '{}'), ?)"
+                    params.append(json.dumps(extra))
+                updated += conn.execute(
+                    f'UPDATE leads SET {assignments} WHERE id = ?', params + [lead_id],
+                ).rowcount
+        return updated
+
+    def stale(self, model_version, limit=1000):
+        """Leads not yet scored by model_version, lowest id first"""
+        rows = self._connect().execute(
+            'SELECT * FROM leads WHERE model_version IS NOT ? ORDER BY id LIMIT ?', (model_version, limit),
+        ).fetchall()
+        return [self._to_lead(row) for row in rows]
+
+    def delete(self, lead_ids=None):
+        """
+        Delete the given leads, or every lead when lead_ids is None
+
+        Raises:
+            ValueError: If any id is not an integer; nothing is deleted then
+
+        Returns:
+            int: Rows deleted
+        """
+        conn = self._connect()
+        if lead_ids is None:
+            with conn:
+                return conn.execute('DELETE FROM leads').rowcount
+        params = [(_lead_id(i),) for i in lead_ids]
+        with conn:
+            return conn.executemany('DELETE FROM leads WHERE id = ?', params).rowcount
+
+    def stats(self, hot_score=HOT_LEAD_SCORE):
+        """Totals for the dashboard's KPI cards and industry chart, without loading leads"""
+        conn = self._connect()
+        total, hot, average = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(intent_score >= ?), 0), AVG(intent_score) FROM leads',
+            (hot_score,),
+        ).fetchone()
+        # Leads imported without an industry count as 'Unknown'; a None key would break jsonify
+        industries = dict(conn.execute(
+            "SELECT COALESCE(industry, 'Unknown') AS name, COUNT(*) FROM leads GROUP BY name ORDER BY COUNT(*) DESC",
+        ).fetchall())
+        return {'total': total, 'hot': hot, 'averageIntentScore': average or 0, 'industries': industries}
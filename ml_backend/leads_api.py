@@ -0,0 +1,145 @@
+# Lead store endpoints: bulk import, paginated queries and score updates
+from flask import Blueprint, request, jsonify
+import os
+
+from admin_auth import admin_allowed
+from lead_store import SORT_COLUMNS, LeadStore
+from request_metrics import metrics
+
+leads_api = Blueprint('leads_api', __name__)
+
+# SQLite database holding imported leads (see lead_store.py)
+LEAD_STORE_PATH = os.getenv('LEAD_STORE_PATH', 'leads.db')
+# Leads per /leads page when ?limit= is not given, and the most a page may hold
+LEAD_PAGE_SIZE = int(os.getenv('LEAD_STORE_PAGE_SIZE', '50'))
+LEAD_MAX_PAGE_SIZE = int(os.getenv('LEAD_STORE_MAX_PAGE_SIZE', '500'))
+# Upper bound on leads accepted by one POST /leads; the dashboard imports in chunks
+LEAD_MAX_IMPORT = int(os.getenv('LEAD_STORE_MAX_IMPORT', '10000'))
+
+lead_store = LeadStore(LEAD_STORE_PATH)
+
+
+def _int_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer, got {value!r}")
+
+
+def _list_payload(payload, key):
+    items = payload.get(key) if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        raise ValueError(f'expected a list of {key}')
+    return items
+
+
+@leads_api.route('/leads', methods=['GET'])
+@metrics.instrument('leads')
+def list_leads():
+    """
+    One page of leads, best first by default. Filters: min_score, max_score,
+    industry, company_size, imported_after, imported_before, and search
+    (substring of contact, company or title). Paging: limit,
+    and cursor from the previous page's next_cursor. sort is one of
+    intentScore, importedAt or id, order asc or desc; count=1 adds the
+    number of matching leads.
+    """
+    try:
+        with metrics.stage('parse'):
+            limit = min(max(_int_arg('limit', LEAD_PAGE_SIZE), 1), LEAD_MAX_PAGE_SIZE)
+            options = dict(
+                min_score=_int_arg('min_score'), max_score=_int_arg('max_score'),
+                industry=request.args.get('industry') or None,
+                company_size=request.args.get('company_size') or None,
+                imported_after=request.args.get('imported_after') or None,
+                imported_before=request.args.get('imported_before') or None,
+                search=request.args.get('search') or None,
+                sort=request.args.get('sort', 'intentScore'),
+                descending=request.args.get('order', 'desc') != 'asc',
+                cursor=request.args.get('cursor') or None,
+                count=request.args.get('count') == '1',
+            )
+        with metrics.stage('query'):
+            page = lead_store.query(limit=limit, **options)
+    except ValueError as e:
+        return jsonify({"error": str(e), "sorts": list(SORT_COLUMNS)}), 400
+    with metrics.stage('serialize'):
+        return jsonify(page)
+
+
+@leads_api.route('/leads', methods=['POST'])
+@metrics.instrument('leads_import')
+def import_leads():
+    """Bulk insert {"leads": [...]} (or a bare list) in one transaction; returns the new ids in input order"""
+    try:
+        with metrics.stage('parse'):
+            leads = _list_payload(request.json, 'leads')
+        if len(leads) > LEAD_MAX_IMPORT:
+            return jsonify({"error": f"import too large ({len(leads)} > {LEAD_MAX_IMPORT})"}), 413
+        with metrics.stage('insert'):
+            ids = lead_store.insert_leads(leads)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"ids": ids, "count": len(ids)})
+
+
+@leads_api.route('/leads/scores', methods=['PATCH'])
+@metrics.instrument('leads_scores')
+def update_lead_scores():
+    """
+    Incremental score updates: {"updates": [{"id", "intentScore" or "score",
+    optional "explanation", "modelVersion", insights, ...}]}
+    """
+    try:
+        with metrics.stage('parse'):
+            updates = _list_payload(request.json, 'updates')
+        with metrics.stage('update'):
+            updated = lead_store.update_scores(updates)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"updated": updated, "missing": len(updates) - updated})
+
+
+@leads_api.route('/leads/<int:lead_id>', methods=['GET'])
+def get_lead(lead_id):
+    lead = lead_store.get(lead_id)
+    if lead is None:
+        return jsonify({"error": f"no lead {lead_id}"}), 404
+    return jsonify(lead)
+
+
+@leads_api.route('/leads/<int:lead_id>', methods=['DELETE'])
+def delete_lead(lead_id):
+    return jsonify({"deleted": lead_store.delete([lead_id])})
+
+
+@leads_api.route('/leads', methods=['DELETE'])
+def delete_leads():
+    """
+    Delete {"ids": [...]}, or every lead with ?all=1. Emptying the store is
+    an admin action (X-Admin-Token, or localhost without LEAD_ADMIN_TOKEN):
+    CORS lets any page send this request.
+    """
+    if request.args.get('all') == '1':
+        if not admin_allowed():
+            return jsonify({"error": "forbidden"}), 403
+        return jsonify({"deleted": lead_store.delete()})
+    try:
+        ids = _list_payload(request.get_json(silent=True), 'ids')
+    except ValueError as e:
+        return jsonify({"error": f"{e}, or pass ?all=1"}), 400
+    try:
+        return jsonify({"deleted": lead_store.delete(ids)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@leads_api.route('/leads/stats', methods=['GET'])
+@metrics.instrument('leads_stats')
+def lead_stats():
+    """Total, hot and average-score figures plus per-industry counts for the KPI cards"""
+    with metrics.stage('query'):
+        return jsonify(lead_store.stats())
@@ -0,0 +1,178 @@
+"""
+Dynamic micro-batching for single-lead /score requests.
+
+During imports the dashboard fires many single-lead requests at once, and
+each one pays the fixed cost of a predict_proba and an explanation call
+for one row. With micro-batching on, a request thread encodes its lead,
+puts the row on a queue and waits. One inference thread per process takes
+the first queued row, keeps collecting until it has max_batch rows or
+max_wait has passed since that row arrived, and scores them all in one
+vectorized pass. It then hands each waiting request its own result.
+
+Rows from one batch are grouped by model version and explanation engine.
+A hot reload mid-batch therefore never scores a lead with a model other
+than the one its request picked.
+
+Added latency is bounded by max_wait, plus the pass that was already
+running when the row arrived. Batching only pays off when requests really
+overlap, so it needs a threaded server: gunicorn.conf.py's gthread workers
+(LEAD_API_THREADS > 1, the default) or the Flask dev server's threads. A
+single-threaded sync worker sees batches of one.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+from request_metrics import Histogram, metrics
+
+# Histogram buckets for rows per vectorized pass
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+batch_sizes = metrics.register(Histogram(
+    'lead_api_microbatch_size', 'Rows scored per micro-batch pass', (), BATCH_SIZE_BUCKETS,
+))
+queue_waits = metrics.register(Histogram(
+    'lead_api_microbatch_queue_wait_seconds', 'Time a /score row waited for its micro-batch to start',
+))
+
+
+# Queued by stop() to wake the inference thread when it is waiting for a first row
+_STOP = object()
+
+
+class MicroBatcherBusyError(Exception):
+    """The micro-batch queue is full, the result did not arrive in time or scoring stopped"""
+
+
+class _Pending:
+    __slots__ = ('serving', 'row', 'engine', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, serving, row, engine):
+        self.serving = serving
+        self.row = row
+        self.engine = engine
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Queue single encoded rows and score them in batches on one thread
+
+    Args:
+        score_batch: score_batch(serving, X, engine) -> list of results in row order
+        max_batch: Most rows scored in one pass
+        max_wait: Seconds the first row of a batch waits for company
+        max_queue: Rows held before submit() starts rejecting
+        timeout: Seconds a request waits for its result
+    """
+
+    def __init__(self, score_batch, max_batch=64, max_wait=0.002, max_queue=10000, timeout=30.0):
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='score-microbatcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the inference thread after its current pass; rows still queued get MicroBatcherBusyError"""
+        self._stop.set()
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=self.timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def after_fork(self):
+        """Start a fresh queue and inference thread in a forked worker"""
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._stop = threading.Event()
+        self._thread = None
+        return self.start()
+
+    def submit(self, serving, row, engine):
+        """
+        Score one encoded row as part of the next batch; blocks until done
+
+        Raises:
+            MicroBatcherBusyError: If the queue is full or the result times out
+        """
+        pending = _Pending(serving, row, engine)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            raise MicroBatcherBusyError('scoring queue is full')
+        if not pending.done.wait(self.timeout):
+            raise MicroBatcherBusyError(f'no score within {self.timeout}s')
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return []
+        batch = [first]
+        deadline = first.enqueued + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is _STOP:
+                break
+            batch.append(pending)
+        return batch
+
+    def _fail_queued(self):
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if pending is not _STOP:
+                pending.error = MicroBatcherBusyError('scoring stopped')
+                pending.done.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            for pending in batch:
+                queue_waits.observe(value=started - pending.enqueued)
+            batch_sizes.observe(value=len(batch))
+
+            groups = {}
+            for pending in batch:
+                groups.setdefault((pending.serving.version, pending.engine), []).append(pending)
+            for group in groups.values():
+                try:
+                    X = np.vstack([p.row for p in group])
+                    for pending, result in zip(group, self.score_batch(group[0].serving, X, group[0].engine)):
+                        pending.result = result
+                except Exception as e:
+                    for pending in group:
+                        pending.error = e
+                for pending in group:
+                    pending.done.set()
+            metrics.observe('score', 'batch_pass', time.perf_counter() - started)
+        self._fail_queued()
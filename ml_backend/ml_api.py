@@ -1,50 +1,316 @@
-import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-import shap
-import joblib
 import os
+import sys
 
-# Load and clean data
-DATA_PATH = os.path.join(os.path.dirname(__file__), '../small file.csv')
-df = pd.read_csv(DATA_PATH)
-X = df.drop(['Converted', 'Name', 'Email', 'Website'], axis=1)
-X = pd.get_dummies(X)
-y = df['Converted']
+from admin_auth import admin_allowed
+from feature_store import load_features, process_memory
+from feedback_sink import FeedbackSink
+from lead_store import model_input
+from micro_batcher import MicroBatcher, MicroBatcherBusyError
+from model_artifacts import (
+    DEFAULT_DATA_PATH, DEFAULT_MODEL_DIR, build_feature_schema, save_artifacts,
+)
+from model_registry import ModelRegistry
+from request_metrics import metrics
+from score_cache import ScoreCache
 
-# Train model
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X, y)
-joblib.dump(model, 'lead_model.pkl')
+# Serve-only by default: load the artifact written by train_and_export_model.py.
+# Training only happens when explicitly requested with --train or LEAD_API_TRAIN=1.
+DATA_PATH = os.getenv('LEAD_DATA_PATH', DEFAULT_DATA_PATH)
+MODEL_DIR = os.getenv('LEAD_MODEL_DIR', DEFAULT_MODEL_DIR)
+TRAIN_ON_START = '--train' in sys.argv or os.getenv('LEAD_API_TRAIN') == '1'
 
-# SHAP explainer
-explainer = shap.TreeExplainer(model)
+# Number of features returned in each explanation
+TOP_K = 5
+# Explanation engine when a request does not pass ?explain= (shap, path or none)
+DEFAULT_EXPLAINER = os.getenv('LEAD_API_EXPLAIN', 'shap')
+# Max cached score + explanation results (0 disables the score cache)
+SCORE_CACHE_SIZE = int(os.getenv('LEAD_API_CACHE_SIZE', '10000'))
+# Feedback is appended to this CSV (and optionally a JSON-lines log) by a background writer
+FEEDBACK_PATH = os.getenv('LEAD_FEEDBACK_PATH', 'feedback.csv')
+FEEDBACK_JSONL_PATH = os.getenv('LEAD_FEEDBACK_JSONL')
+# Upper bound on leads accepted by a single /score/batch call
+MAX_BATCH_SIZE = int(os.getenv('LEAD_API_MAX_BATCH', '1000'))
+# Poll trained_model/CURRENT for new versions every N seconds (0 disables watching)
+MODEL_WATCH_SECONDS = float(os.getenv('LEAD_MODEL_WATCH_SECONDS', '0'))
+# joblib mmap_mode for uncompressed model artifacts ('' loads them fully into memory)
+MODEL_MMAP_MODE = os.getenv('LEAD_MODEL_MMAP', 'r') or None
+# Score concurrent single-lead /score requests in shared batches (see micro_batcher.py)
+MICROBATCH = os.getenv('LEAD_API_MICROBATCH') == '1'
+MICROBATCH_MAX_SIZE = int(os.getenv('LEAD_API_MICROBATCH_SIZE', '64'))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv('LEAD_API_MICROBATCH_WAIT_MS', '2'))
+# Scorer for predictions: sklearn (predict_proba) or compiled (NumPy evaluator, see compiled_forest.py)
+SCORER = os.getenv('LEAD_API_SCORER', 'sklearn')
+# Batches with more rows than this use predict_proba even with the compiled scorer
+COMPILED_MAX_ROWS = int(os.getenv('LEAD_API_COMPILED_MAX_ROWS', '256'))
+
+
+def train_and_save():
+    """Train the serving model from DATA_PATH and write it with its schema manifest"""
+    features = load_features(DATA_PATH)
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(features.X_sparse, features.y)
+    schema = build_feature_schema(features.encoder, DATA_PATH, features.data_hash)
+    save_artifacts(model, schema, MODEL_DIR)
+
+
+if TRAIN_ON_START:
+    train_and_save()
+
+# Score + explanation results keyed on the canonical encoded lead and model version
+score_cache = ScoreCache(SCORE_CACHE_SIZE)
+
+# Versioned model, encoder and explainers; swapped atomically on reload.
+# The explainers' own memo is only needed when the score cache is off.
+registry = ModelRegistry(
+    MODEL_DIR, mmap_mode=MODEL_MMAP_MODE, default_explainer=DEFAULT_EXPLAINER, top_k=TOP_K,
+    memo_size=0 if SCORE_CACHE_SIZE else 4096, scorer=SCORER, compiled_max_rows=COMPILED_MAX_ROWS,
+)
+registry.on_swap(lambda serving: score_cache.set_model_version(serving.version))
+registry.reload()
+if MODEL_WATCH_SECONDS > 0:
+    registry.watch(MODEL_WATCH_SECONDS)
+
+feedback_sink = FeedbackSink(FEEDBACK_PATH, FEEDBACK_JSONL_PATH).start()
+
+
+def after_fork():
+    """
+    Restart this module's background threads in a pre-forked worker
+
+    gunicorn.conf.py imports this module once in the master, so the model,
+    encoder and warmed explainers are shared copy-on-write by every worker;
+    only the feedback writer and model watcher threads, and the lead store's
+    SQLite connections, need recreating.
+    """
+    feedback_sink.after_fork()
+    lead_store.after_fork()
+    registry.after_fork()
+    if micro_batcher is not None:
+        micro_batcher.after_fork()
+
+
+def _serving_samples():
+    """Scrape-time gauges: served model version, cache and feedback queue state"""
+    cache = score_cache.stats()
+    return [
+        ('lead_api_model_info', 'gauge', 'Model version currently served',
+         {(registry.current.version,): 1}, ('model_version',)),
+        ('lead_api_score_cache_entries', 'gauge', 'Entries in the score cache',
+         {(): cache['size']}, ()),
+        ('lead_api_score_cache_hits_total', 'counter', 'Score cache hits',
+         {(): cache['hits']}, ()),
+        ('lead_api_score_cache_misses_total', 'counter', 'Score cache misses',
+         {(): cache['misses']}, ()),
+        ('lead_api_feedback_queued', 'gauge', 'Feedback records waiting to be written',
+         {(): feedback_sink.stats()['queued']}, ()),
+        ('lead_api_feedback_dropped_total', 'counter', 'Feedback records rejected by a full queue',
+         {(): feedback_sink.stats()['dropped']}, ()),
+        ('lead_api_process_memory_bytes', 'gauge', 'Memory of this worker process (pss counts shared pages once)',
+         {(kind[:-3],): mb * 2**20 for kind, mb in process_memory().items()}, ('kind',)),
+    ]
+
+
+metrics.add_collector(_serving_samples)
 
 from chat_api import chat_api
+from leads_api import lead_store, leads_api
 from flask_cors import CORS
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all domains
 app.register_blueprint(chat_api)
+app.register_blueprint(leads_api)
+
+def score_and_explain(serving, X, engine=None):
+    """
+    Score an encoded feature matrix with one model version. Rows found in the
+    score cache are served from it; the rest go through one prediction
+    and one explanation pass.
+    """
+    engine = serving.explanations.engine(engine).name
+    with metrics.stage('cache'):
+        keys = [score_cache.key(row, engine, serving.version) for row in X]
+        results = [score_cache.get(key) for key in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        with metrics.stage('predict'):
+            scores = serving.predict_positive(X[missing])
+        _, explained = serving.explanations.explain(X[missing], engine)
+        for i, s, e in zip(missing, scores, explained):
+            results[i] = {"score": float(s), "explanation": e, "explainer": engine}
+            score_cache.put(keys[i], results[i])
+    return [{**r, "model_version": serving.version} for r in results]
+
+# Inference thread for micro-batched /score requests, when enabled
+micro_batcher = MicroBatcher(
+    score_and_explain, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS / 1000,
+).start() if MICROBATCH else None
+
+def requested_engine(serving, payload=None):
+    """Explanation engine from ?explain= or an "explain" body field; ValueError if unknown"""
+    name = request.args.get('explain')
+    if name is None and isinstance(payload, dict):
+        name = payload.get('explain')
+    return serving.explanations.engine(name).name
 
 @app.route('/score', methods=['POST'])
+@metrics.instrument('score')
 def score():
-    data = request.json
-    input_df = pd.DataFrame([data])
-    input_df = pd.get_dummies(input_df)
-    input_df = input_df.reindex(columns=X.columns, fill_value=0)
-    score = model.predict_proba(input_df)[0][1]
-    shap_values = explainer.shap_values(input_df)[1][0]
-    feature_importance = sorted(zip(X.columns, shap_values), key=lambda x: abs(x[1]), reverse=True)
-    explanation = [{"feature": f, "impact": float(imp)} for f, imp in feature_importance[:5]]
-    return jsonify({"score": float(score), "explanation": explanation})
+    serving = registry.current  # in-flight requests finish on this version
+    metrics.set_model_version(serving.version)
+    try:
+        with metrics.stage('parse'):
+            engine = requested_engine(serving)
+            lead = request.json
+        with metrics.stage('encode'):
+            X = serving.encoder.encode(lead)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if micro_batcher is None:
+        result = score_and_explain(serving, X, engine)[0]
+    else:
+        try:
+            with metrics.stage('batch_wait'):
+                result = micro_batcher.submit(serving, X[0], engine)
+        except MicroBatcherBusyError as e:
+            metrics.count_error('score', 'microbatch_busy')
+            return jsonify({"error": str(e)}), 503
+    with metrics.stage('serialize'):
+        return jsonify(result)
+
+@app.route('/score/batch', methods=['POST'])
+@metrics.instrument('score_batch')
+def score_batch():
+    """
+    Score many leads in one call. Accepts {"leads": [...]} or a bare list and
+    returns results in input order; invalid rows get an "error" entry instead
+    of failing the whole batch. The explanation engine comes from ?explain=
+    or an "explain" field next to "leads".
+    """
+    serving = registry.current
+    metrics.set_model_version(serving.version)
+    try:
+        with metrics.stage('parse'):
+            payload = request.json
+            engine = requested_engine(serving, payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    leads = payload.get('leads') if isinstance(payload, dict) else payload
+    if not isinstance(leads, list):
+        return jsonify({"error": "expected a list of leads"}), 400
+    if len(leads) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"batch too large ({len(leads)} > {MAX_BATCH_SIZE})"}), 413
+
+    # Encode straight into one preallocated matrix, compacting out invalid rows
+    results = [None] * len(leads)
+    with metrics.stage('encode'):
+        X = serving.encoder.allocate(len(leads))
+        valid_idx = []
+        for i, data in enumerate(leads):
+            try:
+                serving.encoder.encode_into(data, X[len(valid_idx)])
+                valid_idx.append(i)
+            except ValueError as e:
+                results[i] = {"index": i, "error": str(e)}
+
+    if valid_idx:
+        for i, result in zip(valid_idx, score_and_explain(serving, X[:len(valid_idx)], engine)):
+            results[i] = {"index": i, **result}
+    with metrics.stage('serialize'):
+        return jsonify({"results": results, "count": len(results), "errors": len(leads) - len(valid_idx)})
+
+@app.route('/score/cache', methods=['GET'])
+def score_cache_stats():
+    """Hit, miss and eviction counters for the score and explanation caches"""
+    return jsonify({"score_cache": score_cache.stats(), "explanation_memo": registry.current.explanations.memo.stats()})
+
+@app.route('/admin/models', methods=['GET'])
+def admin_models():
+    """Stored model versions and the one currently served"""
+    if not admin_allowed():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify({"current": registry.current.version, "versions": registry.versions()})
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Load a model version (default: CURRENT on disk), warm it and swap it in.
+    Scoring keeps running on the old version until the swap.
+    """
+    if not admin_allowed():
+        return jsonify({"error": "forbidden"}), 403
+    payload = request.get_json(silent=True) or {}
+    previous = registry.current.version
+    try:
+        serving = registry.reload(payload.get('version'))
+    except (FileNotFoundError, ValueError) as e:
+        return jsonify({"error": str(e), "model_version": previous}), 400
+    return jsonify({"previous_version": previous, "model_version": serving.version})
 
 @app.route('/feedback', methods=['POST'])
+@metrics.instrument('feedback')
 def feedback():
-    feedback = request.json
-    pd.DataFrame([feedback]).to_csv('feedback.csv', mode='a', header=not os.path.exists('feedback.csv'), index=False)
+    with metrics.stage('parse'):
+        feedback = request.json
+    if not isinstance(feedback, dict):
+        return jsonify({"error": "feedback must be a JSON object"}), 400
+    with metrics.stage('enqueue'):
+        accepted = feedback_sink.submit(feedback)
+    if not accepted:
+        metrics.count_error('feedback', 'queue_full')
+        return jsonify({"status": "busy"}), 503
     return jsonify({"status": "received"})
 
+def _rescore_limit(value):
+    """Leads per /leads/rescore call, capped at MAX_BATCH_SIZE; ValueError unless a positive integer"""
+    try:
+        # Floats and bools are rejected rather than truncated
+        limit = int(value) if isinstance(value, (int, str)) and not isinstance(value, bool) else 0
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError(f"'limit' must be a positive integer, got {value!r}")
+    return min(limit, MAX_BATCH_SIZE)
+
+@app.route('/leads/rescore', methods=['POST'])
+@metrics.instrument('leads_rescore')
+def rescore_leads():
+    """
+    Rescore up to {"limit": N} stored leads (default MAX_BATCH_SIZE) that the
+    served model version has not scored yet. Call repeatedly until
+    "remaining" is false to bring the whole store up to date after a reload.
+    """
+    serving = registry.current
+    metrics.set_model_version(serving.version)
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+    try:
+        engine = requested_engine(serving, payload)
+        limit = _rescore_limit(payload.get('limit', MAX_BATCH_SIZE))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with metrics.stage('query'):
+        leads = lead_store.stale(serving.version, limit + 1)
+    remaining, leads = len(leads) > limit, leads[:limit]
+    if not leads:
+        return jsonify({"rescored": 0, "remaining": False, "model_version": serving.version})
+    with metrics.stage('encode'):
+        X = serving.encoder.encode_batch([model_input(lead) for lead in leads])
+    results = score_and_explain(serving, X, engine)
+    with metrics.stage('update'):
+        updated = lead_store.update_scores([
+            {"id": lead['id'], "score": r['score'], "explanation": r['explanation'], "modelVersion": r['model_version']}
+            for lead, r in zip(leads, results)
+        ])
+    return jsonify({"rescored": updated, "remaining": remaining, "model_version": serving.version})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request counters, latency histograms and serving gauges in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(port=5000)
@@ -0,0 +1,189 @@
+"""
+Model artifact persistence shared by the training scripts and the ML API.
+
+The training pipeline writes the fitted model next to a feature-schema
+manifest (column order, categorical vocabularies, training data hash) so the
+API can serve from disk instead of retraining every time a worker starts.
+
+Each training run is stored as its own version:
+
+    trained_model/
+        CURRENT                      <- name of the version being served
+        versions/<model_version>/
+            lead_model.pkl
+            feature_schema.json
+
+CURRENT is replaced atomically, so a reader never sees a model from one
+version with the schema of another. Directories without CURRENT are read
+as the older flat layout (lead_model.pkl directly in trained_model/).
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import joblib
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_DATA_PATH = os.path.join(BASE_DIR, 'small file.csv')
+DEFAULT_MODEL_DIR = os.path.join(BASE_DIR, 'trained_model')
+MODEL_FILENAME = 'lead_model.pkl'
+SCHEMA_FILENAME = 'feature_schema.json'
+CURRENT_FILENAME = 'CURRENT'
+VERSIONS_DIRNAME = 'versions'
+
+# Columns that are never used as model inputs
+TARGET_COLUMN = 'Converted'
+DROP_COLUMNS = [TARGET_COLUMN, 'Name', 'Email', 'Website']
+# Bounded encodings for high-cardinality categoricals (see feature_encoder.py);
+# unlisted categorical columns are one-hot encoded
+CATEGORICAL_ENCODINGS = {'Company': {'strategy': 'hash', 'buckets': 32}}
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Content hash of a file, read in chunks so large CSVs stay out of memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_feature_schema(encoder, data_path, data_hash=None):
+    """
+    Describe the encoded feature space a model was trained on
+
+    Args:
+        encoder: FeatureEncoder fitted on the training frame
+        data_path: CSV the model was trained on
+        data_hash: sha256 of data_path if already known (e.g. from the feature store)
+
+    Returns:
+        dict: JSON-serialisable schema manifest
+    """
+    data_hash = data_hash or file_sha256(data_path)
+    created_at = datetime.now()
+    return {
+        'model_version': f"{created_at:%Y%m%d%H%M%S}-{data_hash[:8]}",
+        **encoder.layout(),
+        'data_path': os.path.basename(data_path),
+        'data_hash': data_hash,
+        'created_at': created_at.isoformat(),
+    }
+
+
+def model_version(schema):
+    """Version label of a manifest; older manifests fall back to the data hash"""
+    return schema.get('model_version') or schema['data_hash'][:12]
+
+
+def current_version(model_dir=DEFAULT_MODEL_DIR):
+    """Version named in CURRENT, or None for the flat legacy layout"""
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILENAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(model_dir=DEFAULT_MODEL_DIR):
+    """All stored versions, oldest first (version names sort by training time)"""
+    versions_dir = os.path.join(model_dir, VERSIONS_DIRNAME)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        v for v in os.listdir(versions_dir)
+        if os.path.exists(os.path.join(versions_dir, v, SCHEMA_FILENAME))
+    )
+
+
+def artifact_dir(model_dir=DEFAULT_MODEL_DIR, version=None):
+    """Directory holding a version's files; defaults to the CURRENT version"""
+    version = version or current_version(model_dir)
+    if version is None:
+        return model_dir
+    return os.path.join(model_dir, VERSIONS_DIRNAME, version)
+
+
+def set_current_version(version, model_dir=DEFAULT_MODEL_DIR):
+    """Atomically point CURRENT at a stored version"""
+    if not os.path.isdir(artifact_dir(model_dir, version)):
+        raise FileNotFoundError(f"Unknown model version {version!r} in {model_dir}")
+    tmp_path = os.path.join(model_dir, f".{CURRENT_FILENAME}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, os.path.join(model_dir, CURRENT_FILENAME))
+
+
+def save_artifacts(model, schema, model_dir=DEFAULT_MODEL_DIR, make_current=True, compress=0):
+    """
+    Save a fitted model and its feature-schema manifest as a new version
+
+    Args:
+        make_current: Point CURRENT at the new version once it is fully written
+        compress: joblib compression level (0 = uncompressed)
+
+    Returns:
+        tuple: (model_path, schema_path)
+    """
+    version = model_version(schema)
+    version_dir = artifact_dir(model_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    model_path = os.path.join(version_dir, MODEL_FILENAME)
+    schema_path = os.path.join(version_dir, SCHEMA_FILENAME)
+    joblib.dump(model, model_path, compress=compress)
+    with open(schema_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    if make_current:
+        set_current_version(version, model_dir)
+    return model_path, schema_path
+
+
+def load_schema(model_dir=DEFAULT_MODEL_DIR, version=None):
+    """Load the feature-schema manifest written next to the model"""
+    with open(os.path.join(artifact_dir(model_dir, version), SCHEMA_FILENAME)) as f:
+        return json.load(f)
+
+
+def is_compressed(path):
+    """True if a joblib file was written with compress > 0 (it cannot be memory-mapped)"""
+    with open(path, 'rb') as f:
+        return f.read(1) != b'\x80'  # uncompressed joblib files start with a pickle PROTO opcode
+
+
+def load_artifacts(model_dir=DEFAULT_MODEL_DIR, version=None, mmap_mode=None):
+    """
+    Load a fitted model and its feature-schema manifest
+
+    Args:
+        version: Stored version to load; defaults to the CURRENT version
+        mmap_mode: joblib mmap_mode for the model's arrays (e.g. 'r');
+            ignored for compressed artifacts, which are always read into memory
+
+    Raises:
+        FileNotFoundError: If the model or manifest has not been written yet
+        ValueError: If the manifest does not match the model's input width
+
+    Returns:
+        tuple: (model, schema)
+    """
+    version_dir = artifact_dir(model_dir, version)
+    model_path = os.path.join(version_dir, MODEL_FILENAME)
+    schema_path = os.path.join(version_dir, SCHEMA_FILENAME)
+    for path in (model_path, schema_path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Missing model artifact {path}. Run train_and_export_model.py "
+                f"or start ml_api.py with --train to create it."
+            )
+    model = joblib.load(model_path, mmap_mode=None if is_compressed(model_path) else mmap_mode)
+    with open(schema_path) as f:
+        schema = json.load(f)
+    n_features = getattr(model, 'n_features_in_', len(schema['columns']))
+    if n_features != len(schema['columns']):
+        raise ValueError(
+            f"Schema in {schema_path} has {len(schema['columns'])} columns "
+            f"but the model expects {n_features}"
+        )
+    return model, schema
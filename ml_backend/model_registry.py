@@ -0,0 +1,170 @@
+"""
+Versioned model registry with hot reload for the scoring API.
+
+A ServingModel bundles one model version with its encoder and explanation
+engines. The registry builds and warms a new bundle off the request path,
+then swaps a single reference, so requests that already picked up the old
+bundle finish on it while new requests see the new version.
+"""
+
+import threading
+import traceback
+
+from compiled_forest import compile_forest
+from explainers import ExplanationService
+from feature_encoder import FeatureEncoder
+from model_artifacts import (
+    current_version, list_versions, load_artifacts, model_version, set_current_version,
+)
+
+
+class ServingModel:
+    """
+    Model, encoder and explainers for one version; never mutated once built
+
+    Args:
+        scorer: 'sklearn' scores with model.predict_proba; 'compiled' with the
+            NumPy evaluator from compiled_forest.py, compiled in warm()
+        compiled_max_rows: Larger batches go to predict_proba, which is
+            faster once there are enough rows to amortise its overhead
+    """
+
+    def __init__(self, model, schema, default_explainer='shap', top_k=5, memo_size=4096,
+                 scorer='sklearn', compiled_max_rows=256):
+        if scorer not in ('sklearn', 'compiled'):
+            raise ValueError(f"unknown scorer {scorer!r}, expected 'sklearn' or 'compiled'")
+        self.model = model
+        self.schema = schema
+        self.version = model_version(schema)
+        self.encoder = FeatureEncoder.from_schema(schema)
+        self.explanations = ExplanationService(
+            model, self.encoder.columns, default=default_explainer, top_k=top_k, memo_size=memo_size,
+        )
+        self.scorer = scorer
+        self.compiled_max_rows = compiled_max_rows
+        self.compiled = None
+
+    def warm(self):
+        """Compile the scorer, build the default explainer and run one prediction before taking traffic"""
+        if self.scorer == 'compiled':
+            try:
+                self.compiled = compile_forest(self.model)
+            except ValueError as e:
+                # Serve with predict_proba rather than refuse the version
+                print(f"Compiled scorer unavailable for {self.version}, using predict_proba: {e}")
+        self.explanations.engine()
+        self.predict_positive(self.encoder.allocate(1))
+        return self
+
+    def predict_positive(self, X):
+        """Conversion probability for each row of an encoded feature matrix"""
+        if self.compiled is not None and len(X) <= self.compiled_max_rows:
+            return self.compiled.predict_positive(X)
+        return self.model.predict_proba(X)[:, 1]
+
+
+class ModelRegistry:
+    """
+    Load, hot-swap and watch versioned model artifacts
+
+    Args:
+        model_dir: Artifact directory written by model_artifacts.save_artifacts
+        mmap_mode: joblib mmap_mode for uncompressed model artifacts
+        **serving_options: Passed through to ServingModel
+    """
+
+    def __init__(self, model_dir, mmap_mode=None, **serving_options):
+        self.model_dir = model_dir
+        self.mmap_mode = mmap_mode
+        self.serving_options = serving_options
+        self._current = None
+        self._reload_lock = threading.Lock()
+        self._listeners = []
+        self._stop = threading.Event()
+        self._watcher = None
+        self._watch_interval = None
+
+    @property
+    def current(self):
+        """The bundle new requests should use; read it once per request"""
+        return self._current
+
+    def versions(self):
+        return list_versions(self.model_dir)
+
+    def on_swap(self, callback):
+        """Call callback(serving_model) after every successful swap"""
+        self._listeners.append(callback)
+
+    def load(self, version=None):
+        """Build and warm a ServingModel without making it current"""
+        model, schema = load_artifacts(self.model_dir, version, self.mmap_mode)
+        return ServingModel(model, schema, **self.serving_options).warm()
+
+    def reload(self, version=None):
+        """
+        Load a version (default: CURRENT on disk) and swap it in atomically
+
+        An explicit version also becomes CURRENT on disk, so a watcher or a
+        restarted worker does not flip back to the previous one.
+
+        Raises:
+            ValueError: If version is given but is not a stored version
+
+        Returns:
+            ServingModel: The bundle now being served
+        """
+        # Only names listed under versions/ reach the filesystem (no paths like ../x)
+        if version is not None and version not in self.versions():
+            raise ValueError(f"Unknown model version {version!r}; stored versions: {', '.join(self.versions())}")
+        with self._reload_lock:
+            serving = self.load(version)
+            if version is not None:
+                set_current_version(version, self.model_dir)
+            self._current = serving
+            for callback in self._listeners:
+                callback(serving)
+            return serving
+
+    def check_for_update(self):
+        """Reload if CURRENT on disk names a different version; returns True on swap"""
+        on_disk = current_version(self.model_dir)
+        if on_disk is None or (self._current is not None and on_disk == self._current.version):
+            return False
+        self.reload()
+        return True
+
+    def watch(self, interval):
+        """Poll CURRENT every interval seconds in a background thread"""
+        if self._watcher is None:
+            self._watch_interval = interval
+            self._watcher = threading.Thread(
+                target=self._watch, args=(interval,), name='model-watcher', daemon=True,
+            )
+            self._watcher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def after_fork(self):
+        """
+        Reset thread state in a forked worker
+
+        The serving bundle is inherited from the parent as is, but threads
+        are not, so a watcher started before the fork is started again.
+        """
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        interval, self._watcher = self._watch_interval, None
+        if interval is not None:
+            self.watch(interval)
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                if self.check_for_update():
+                    print(f"Model registry: now serving {self._current.version}")
+            except Exception:
+                # Keep serving the old version if the new artifact is broken
+                traceback.print_exc()
@@ -0,0 +1,323 @@
+"""
+Request and per-stage latency metrics for the API, in Prometheus text format.
+
+Each instrumented view records, per endpoint:
+
+- lead_api_requests_total{endpoint, status, model_version}    counter
+- lead_api_request_duration_seconds{endpoint, model_version}  histogram
+- lead_api_stage_duration_seconds{endpoint, stage}           histogram
+- lead_api_errors_total{endpoint, kind}                       counter
+- lead_api_in_flight{endpoint}                                gauge
+
+Stages are timed with `with metrics.stage('predict'):` anywhere below an
+instrumented view. The current request is tracked per thread, so helpers
+shared by several endpoints record into whichever endpoint called them.
+Timings from other threads, such as an upstream stream read after the
+view returned, go through observe() with an explicit endpoint.
+
+Slow requests can be profiled: with LEAD_PROFILE_SLOW_MS set, a sample of
+requests (LEAD_PROFILE_SAMPLE) runs under cProfile. Those slower than the
+threshold are dumped to LEAD_PROFILE_DIR as .prof files for pstats or
+snakeviz. Only one request is profiled at a time.
+
+With LEAD_METRICS=0 the instrument() decorator returns the view unchanged
+and stage() returns a shared no-op context manager.
+
+Metrics are per process; under a multi-worker server each worker exposes
+its own /metrics.
+"""
+
+import bisect
+import cProfile
+import contextlib
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from werkzeug.exceptions import HTTPException
+
+# Set to 0 to turn all request instrumentation off
+METRICS_ENABLED = os.getenv('LEAD_METRICS', '1') != '0'
+# Profile sampled requests slower than this many ms (0 disables profiling)
+PROFILE_SLOW_MS = float(os.getenv('LEAD_PROFILE_SLOW_MS', '0'))
+# Fraction of requests run under cProfile while profiling is enabled
+PROFILE_SAMPLE_RATE = float(os.getenv('LEAD_PROFILE_SAMPLE', '0.05'))
+# Where slow-request profiles are written
+PROFILE_DIR = os.getenv('LEAD_PROFILE_DIR', 'profiles')
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels):
+        self.inc(*labels, amount=-1)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                # per-bucket counts (+Inf last), then sum
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def _render_value(self, key, counts):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts[:-1]):
+            cumulative += count
+            le = bound if bound == '+Inf' else f'{bound:g}'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', le))} {cumulative}")
+        labels = _format_labels(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {counts[-1]:.6f}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Trace:
+    """Timing state of the request running on the current thread"""
+
+    __slots__ = ('endpoint', 'model_version')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.model_version = ''
+
+
+class _Stage:
+    __slots__ = ('_metrics', '_trace', '_name', '_start')
+
+    def __init__(self, metrics, trace, name):
+        self._metrics = metrics
+        self._trace = trace
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self._metrics.stages.observe(self._trace.endpoint, self._name, value=time.perf_counter() - self._start)
+
+
+_NOOP = contextlib.nullcontext()
+
+
+def _status_code(response):
+    if isinstance(response, tuple):
+        return response[1] if len(response) > 1 and isinstance(response[1], int) else 200
+    return getattr(response, 'status_code', 200)
+
+
+class RequestMetrics:
+    """
+    Counters, gauges and latency histograms for the API's endpoints
+
+    Args:
+        enabled: Record anything at all; when False every hook is a no-op
+        profile_slow_ms: Dump sampled requests slower than this (0 disables)
+        profile_sample_rate: Fraction of requests profiled when enabled
+        profile_dir: Directory for .prof dumps
+    """
+
+    def __init__(self, enabled=True, profile_slow_ms=0, profile_sample_rate=0.05, profile_dir='profiles'):
+        self.enabled = enabled
+        self.profile_slow_ms = profile_slow_ms
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_dir = profile_dir
+        self._local = threading.local()
+        self._profile_lock = threading.Lock()
+        self._collectors = []
+        self.requests = Counter('lead_api_requests_total', 'Requests handled', ('endpoint', 'status', 'model_version'))
+        self.latency = Histogram('lead_api_request_duration_seconds', 'Request latency',
+                                 ('endpoint', 'model_version'))
+        self.stages = Histogram('lead_api_stage_duration_seconds', 'Latency of each request stage',
+                                ('endpoint', 'stage'))
+        self.errors = Counter('lead_api_errors_total', 'Request and upstream errors', ('endpoint', 'kind'))
+        self.in_flight = Gauge('lead_api_in_flight', 'Requests currently being handled', ('endpoint',))
+        self.profiles = Counter('lead_api_profiles_total', 'Slow-request profiles written', ('endpoint',))
+        self._registered = [self.requests, self.latency, self.stages, self.errors, self.in_flight, self.profiles]
+
+    @classmethod
+    def from_env(cls):
+        return cls(METRICS_ENABLED, PROFILE_SLOW_MS, PROFILE_SAMPLE_RATE, PROFILE_DIR)
+
+    def instrument(self, endpoint):
+        """Decorator counting, timing and optionally profiling a Flask view"""
+        def decorator(view):
+            if not self.enabled:
+                return view
+
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                trace = _Trace(endpoint)
+                previous = getattr(self._local, 'trace', None)
+                self._local.trace = trace
+                self.in_flight.inc(endpoint)
+                profiler = self._start_profile()
+                status = 500
+                start = time.perf_counter()
+                try:
+                    response = view(*args, **kwargs)
+                    status = _status_code(response)
+                    return response
+                except HTTPException as e:
+                    # abort() or a bad body for request.json: Flask answers with e.code, not a 500
+                    status = e.code or 500
+                    raise
+                except Exception as e:
+                    self.errors.inc(endpoint, type(e).__name__)
+                    raise
+                finally:
+                    elapsed = time.perf_counter() - start
+                    if profiler is not None:
+                        self._finish_profile(profiler, endpoint, elapsed)
+                    self.in_flight.dec(endpoint)
+                    self.requests.inc(endpoint, str(status), trace.model_version)
+                    self.latency.observe(endpoint, trace.model_version, value=elapsed)
+                    self._local.trace = previous
+            return wrapper
+        return decorator
+
+    def stage(self, name):
+        """Context manager timing one stage of the current instrumented request"""
+        trace = getattr(self._local, 'trace', None) if self.enabled else None
+        return _NOOP if trace is None else _Stage(self, trace, name)
+
+    def set_model_version(self, version):
+        """Label the current request with the model version that served it"""
+        trace = getattr(self._local, 'trace', None) if self.enabled else None
+        if trace is not None:
+            trace.model_version = version
+
+    def observe(self, endpoint, stage, seconds):
+        """Record a stage timing measured outside the request's thread"""
+        if self.enabled:
+            self.stages.observe(endpoint, stage, value=seconds)
+
+    def count_error(self, endpoint, kind):
+        if self.enabled:
+            self.errors.inc(endpoint, kind)
+
+    def register(self, metric):
+        """Expose another Counter, Gauge or Histogram on /metrics; returns it"""
+        self._registered.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """
+        Register a callable returning extra samples at scrape time
+
+        It returns (name, type, help, {labels tuple: value}, label names)
+        tuples, e.g. cache sizes or the feedback queue depth.
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._registered:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, help_text, values, label_names in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in values.items():
+                    lines.append(f"{name}{_format_labels(label_names, key)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _start_profile(self):
+        if self.profile_slow_ms <= 0 or random.random() >= self.profile_sample_rate:
+            return None
+        # sys.setprofile is per-thread, but only one cProfile.Profile can be enabled
+        # at a time (enable() raises ValueError otherwise); profile one request at a time
+        if not self._profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is already active
+            self._profile_lock.release()
+            return None
+        return profiler
+
+    def _finish_profile(self, profiler, endpoint, elapsed):
+        try:
+            profiler.disable()
+            if elapsed * 1000 >= self.profile_slow_ms:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                stamp = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+                path = os.path.join(self.profile_dir, f"{endpoint}-{stamp}-{elapsed * 1000:.0f}ms.prof")
+                profiler.dump_stats(path)
+                self.profiles.inc(endpoint)
+        finally:
+            self._profile_lock.release()
+
+
+# Shared by ml_api and the chat blueprint
+metrics = RequestMetrics.from_env()
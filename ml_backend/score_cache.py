@@ -0,0 +1,123 @@
+"""
+Bounded, thread-safe LRU caches for scoring results.
+
+The scoring input space is tiny (a handful of titles, industries and sizes
+plus small engagement counts), so the frontend keeps sending identical
+encoded vectors. Caching on the canonical encoded vector plus model version
+turns those repeats into a dictionary lookup.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def canonical_key(row):
+    """
+    Compact, hashable key for an encoded feature row
+
+    One-hot rows are almost entirely zeros, so the key is the nonzero
+    positions and their values rather than the full dense row.
+    """
+    nonzero = np.flatnonzero(row)
+    return nonzero.astype(np.int32).tobytes() + row[nonzero].tobytes()
+
+
+class LRUCache:
+    """
+    Size-bounded LRU mapping with hit, miss and eviction counters
+
+    Args:
+        maxsize: Maximum number of entries; 0 disables caching
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def drop_if(self, predicate):
+        """Remove every entry whose value matches predicate; returns how many were removed"""
+        with self._lock:
+            stale = [key for key, value in self._data.items() if predicate(value)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ScoreCache(LRUCache):
+    """
+    LRU cache of score + explanation results for one model version
+
+    Keys combine the model version, the explanation engine and the canonical
+    encoded row. Switching to a new model version drops every entry, so a
+    retrained model never serves stale scores.
+    """
+
+    def __init__(self, maxsize=10000, model_version=None):
+        super().__init__(maxsize)
+        self.model_version = model_version
+
+    def set_model_version(self, model_version):
+        """Invalidate the cache if the serving model has changed"""
+        if model_version != self.model_version:
+            self.clear()
+            self.model_version = model_version
+
+    def key(self, row, engine, model_version=None):
+        """
+        Cache key for one encoded row; pass the version the row is scored
+        with so requests still finishing on an old model never write
+        entries under the new version
+        """
+        return (model_version or self.model_version, engine, canonical_key(row))
+
+    def stats(self):
+        return {**super().stats(), 'model_version': self.model_version}
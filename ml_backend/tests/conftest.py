@@ -0,0 +1,8 @@
+import os
+import sys
+
+# ml_backend modules import each other by bare name, as when ml_api runs from ml_backend/
+ML_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_BACKEND)
+# Training-side modules (model_compaction, js_model_export) live at the repo root
+sys.path.insert(1, os.path.dirname(ML_BACKEND))
@@ -0,0 +1,75 @@
+"""Parity of CompiledForest with the fitted forest's predict_proba."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from compiled_forest import PARITY_TOLERANCE, CompiledForest, boundary_rows, compile_forest
+
+FORESTS = [RandomForestClassifier, ExtraTreesClassifier]
+
+
+def _training_data(missing=False, n_rows=600, random_state=0):
+    rng = np.random.default_rng(random_state)
+    X = np.column_stack([
+        rng.normal(size=n_rows),
+        rng.integers(0, 50, n_rows),  # count-like, many ties at thresholds
+        rng.integers(0, 2, n_rows),   # one-hot-like
+        rng.uniform(0, 100, n_rows),
+    ])
+    y = ((X[:, 0] + X[:, 1] / 25 + X[:, 2] - X[:, 3] / 50 + rng.normal(scale=0.5, size=n_rows)) > 0.5).astype(int)
+    if missing:
+        X[rng.random(X.shape) < 0.15] = np.nan
+    return X, y
+
+
+def _fit(forest_class, missing=False):
+    X, y = _training_data(missing)
+    return forest_class(n_estimators=25, random_state=0).fit(X, y), X
+
+
+def _assert_parity(compiled, model, X):
+    expected = model.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(compiled.predict_positive(X), expected, rtol=0, atol=PARITY_TOLERANCE)
+
+
+@pytest.mark.parametrize('forest_class', FORESTS)
+def test_boundary_rows(forest_class):
+    model, _ = _fit(forest_class)
+    compiled = CompiledForest(model)
+    _assert_parity(compiled, model, boundary_rows(compiled, n_rows=2000))
+
+
+@pytest.mark.parametrize('forest_class', FORESTS)
+def test_single_rows(forest_class):
+    model, X = _fit(forest_class)
+    compiled = CompiledForest(model)
+    for row in X[:50]:
+        _assert_parity(compiled, model, row.reshape(1, -1))
+    # A 1-D row is scored as one lead
+    assert compiled.predict_positive(X[0]).shape == (1,)
+
+
+@pytest.mark.parametrize('forest_class', FORESTS)
+def test_missing_values(forest_class):
+    model, X = _fit(forest_class, missing=True)
+    compiled = CompiledForest(model)
+    assert compiled.missing_left.any()
+    _assert_parity(compiled, model, X)
+    # Rows with every feature missing follow each split's missing-value direction
+    _assert_parity(compiled, model, np.full((3, X.shape[1]), np.nan))
+    for row in X[np.isnan(X).any(axis=1)][:20]:
+        _assert_parity(compiled, model, row.reshape(1, -1))
+
+
+def test_compile_forest_checks_parity():
+    model, X = _fit(RandomForestClassifier)
+    compiled = compile_forest(model)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=PARITY_TOLERANCE)
+
+
+def test_compile_forest_rejects_multiclass():
+    X, y = _training_data()
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y + (X[:, 2] > 0))
+    with pytest.raises(ValueError):
+        compile_forest(model)
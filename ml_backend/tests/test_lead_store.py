@@ -0,0 +1,40 @@
+"""LeadStore stats and deletes with incomplete or malformed input."""
+
+import pytest
+from flask import Flask, jsonify
+
+from lead_store import LeadStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LeadStore(str(tmp_path / 'leads.db'))
+
+
+def test_stats_counts_leads_without_industry(store):
+    store.insert_leads([
+        {'contact': 'A', 'industry': 'Finance', 'intentScore': 90},
+        {'contact': 'B', 'industry': 'Finance', 'intentScore': 40},
+        {'contact': 'C', 'intentScore': 85},
+    ])
+    stats = store.stats()
+    assert stats['industries'] == {'Finance': 2, 'Unknown': 1}
+    assert (stats['total'], stats['hot']) == (3, 2)
+    # /leads/stats returns this through jsonify, which sorts keys
+    with Flask(__name__).app_context():
+        assert jsonify(stats).get_json()['industries'] == {'Finance': 2, 'Unknown': 1}
+
+
+@pytest.mark.parametrize('bad_id', [{'a': 1}, [1], '1', 1.0, True, None, 2 ** 63])
+def test_delete_rejects_non_integer_ids(store, bad_id):
+    first, _ = store.insert_leads([{'contact': 'A'}, {'contact': 'B'}])
+    with pytest.raises(ValueError):
+        store.delete([first, bad_id])
+    # Validation happens before the transaction, so nothing is deleted
+    assert store.stats()['total'] == 2
+
+
+def test_delete_given_ids(store):
+    first, second = store.insert_leads([{'contact': 'A'}, {'contact': 'B'}])
+    assert store.delete([first, 999]) == 1
+    assert store.get(first) is None and store.get(second) is not None
@@ -0,0 +1,65 @@
+"""Compacted forests rebuilt from private Tree state still predict correctly."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from js_model_export import VALUE_SCALE
+from model_compaction import compacted_forest, prune_estimator, quantize_estimator, rank_estimators
+
+
+def _fit(n_rows=600, random_state=0):
+    rng = np.random.default_rng(random_state)
+    X = np.column_stack([
+        rng.normal(size=n_rows),
+        rng.integers(0, 50, n_rows),
+        rng.integers(0, 2, n_rows),
+        rng.uniform(0, 100, n_rows),
+    ]).astype(np.float32)
+    y = ((X[:, 0] + X[:, 1] / 25 + X[:, 2] - X[:, 3] / 50 + rng.normal(scale=0.5, size=n_rows)) > 0.5).astype(int)
+    return RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y), X, y
+
+
+def _assert_probabilities(proba):
+    assert np.all((proba >= 0) & (proba <= 1))
+    np.testing.assert_allclose(proba.sum(axis=1), 1)
+
+
+def test_unpruned_unquantized_matches_original():
+    model, X, y = _fit()
+    ranking = rank_estimators(model, X, y)
+    compact = compacted_forest(model, ranking, len(model.estimators_), quantize=False)
+    np.testing.assert_allclose(compact.predict_proba(X), model.predict_proba(X))
+
+
+def test_quantized_matches_within_value_step():
+    model, X, y = _fit()
+    ranking = rank_estimators(model, X, y)
+    compact = compacted_forest(model, ranking, len(model.estimators_))
+    proba = compact.predict_proba(X)
+    _assert_probabilities(proba)
+    # float32 inputs take the same branches, so only leaf rounding differs
+    np.testing.assert_allclose(proba, model.predict_proba(X), rtol=0, atol=1 / VALUE_SCALE)
+
+
+@pytest.mark.parametrize('max_depth', [1, 3, 8])
+def test_pruned_tree_matches_depth_limited_walk(max_depth):
+    model, X, _ = _fit()
+    estimator = model.estimators_[0]
+    pruned = prune_estimator(estimator, max_depth)
+    assert pruned.tree_.max_depth <= max_depth
+    _assert_probabilities(pruned.predict_proba(X))
+    # Each row lands on the pruned leaf that was its ancestor at max_depth
+    path = estimator.decision_path(X).toarray()
+    for row in range(50):
+        nodes = np.flatnonzero(path[row])
+        node = nodes[min(max_depth, len(nodes) - 1)]
+        value = estimator.tree_.value[node, 0]
+        np.testing.assert_allclose(pruned.predict_proba(X[row:row + 1])[0], value / value.sum())
+
+
+def test_quantized_estimator_round_trips():
+    model, X, _ = _fit()
+    quantized = quantize_estimator(model.estimators_[0])
+    _assert_probabilities(quantized.predict_proba(X))
+    np.testing.assert_array_equal(quantized.apply(X), model.estimators_[0].apply(X))
@@ -0,0 +1,285 @@
+"""
+Forest compaction under a size or latency budget.
+
+An unpruned 100-tree forest is much larger than its accuracy needs, and
+its size drives model load time, SHAP cost and the ml_model.js download.
+Compaction works on the fitted forest without retraining:
+
+- drop estimators: trees are ranked by their own accuracy on a selection
+  half of the validation rows and only the best n are kept
+- prune: subtrees below a depth limit collapse into leaves carrying the
+  node's class distribution; unreachable nodes are removed
+- quantize: thresholds are rounded down to float32 (decisions on float32
+  inputs are unchanged) and node probabilities to steps of 1/65535, matching
+  the quantized JS export
+
+Every (trees, depth) candidate is scored on the other half of the
+validation rows for accuracy, log-loss, total nodes, ml_model.js bytes,
+p99 single-lead latency and compressed joblib size. Candidates within the
+budget are compared on log-loss rather than accuracy: on a few hundred
+evaluation rows an accuracy gap of 0.002 is one or two leads. Those within
+one standard error of the lowest log-loss count as tied, and the tie goes
+to the forest with the most trees, then the fewest nodes.
+"""
+
+import copy
+import io
+import time
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.model_selection import train_test_split
+from sklearn.tree._tree import TREE_LEAF, TREE_UNDEFINED, Tree
+
+from js_model_export import VALUE_SCALE, float32_floor, render_js_model
+
+# Candidate grid: trees kept x depth limit (None = unpruned)
+TREE_COUNTS = (100, 75, 50, 25, 10)
+MAX_DEPTHS = (None, 24, 16, 12, 8)
+# Leads timed per candidate for the p99 latency figure
+LATENCY_SAMPLE_ROWS = 200
+# joblib compression level for compacted artifacts
+COMPRESS_LEVEL = 3
+# Probabilities are clipped to [eps, 1 - eps] before taking logs
+LOG_LOSS_EPS = 1e-15
+# scikit-learn releases whose private Tree state layout the rebuild is tested
+# against (keep in step with the pin in ml_backend/requirements.txt)
+SKLEARN_VERSIONS = ((1, 4), (1, 10))
+
+
+def _check_sklearn_version():
+    """Refuse to rebuild trees on a scikit-learn whose Tree state may differ"""
+    version = tuple(int(part) for part in sklearn.__version__.split('.')[:2])
+    low, high = SKLEARN_VERSIONS
+    if not low <= version < high:
+        raise RuntimeError(
+            f"Forest compaction rebuilds trees through scikit-learn's private Tree state and is "
+            f"tested on {low[0]}.{low[1]} to {high[0]}.{high[1] - 1}, not {sklearn.__version__}"
+        )
+
+
+def _rebuild_tree(tree_, nodes, values, max_depth):
+    _check_sklearn_version()
+    rebuilt = Tree(tree_.n_features, np.asarray(tree_.n_classes, dtype=np.intp), tree_.n_outputs)
+    rebuilt.__setstate__({
+        'max_depth': max_depth,
+        'node_count': len(nodes),
+        'nodes': nodes,
+        'values': values,
+    })
+    return rebuilt
+
+
+def prune_estimator(estimator, max_depth):
+    """
+    Copy of a fitted decision tree truncated to max_depth
+
+    Nodes at the depth limit become leaves with their class distribution;
+    the subtrees below them are dropped from the node arrays.
+    """
+    state = estimator.tree_.__getstate__()
+    nodes, values = state['nodes'], state['values']
+    order, depth_of = [], {}
+    stack = [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        depth_of[node] = depth
+        order.append(node)
+        if nodes[node]['left_child'] != TREE_LEAF and depth < max_depth:
+            stack.append((nodes[node]['right_child'], depth + 1))
+            stack.append((nodes[node]['left_child'], depth + 1))
+    position = {node: i for i, node in enumerate(order)}
+
+    kept = nodes[order].copy()
+    for i, node in enumerate(order):
+        left = nodes[node]['left_child']
+        if left != TREE_LEAF and depth_of[node] < max_depth:
+            kept[i]['left_child'] = position[left]
+            kept[i]['right_child'] = position[nodes[node]['right_child']]
+        else:
+            kept[i]['left_child'] = kept[i]['right_child'] = TREE_LEAF
+            kept[i]['feature'] = TREE_UNDEFINED
+            kept[i]['threshold'] = TREE_UNDEFINED
+    pruned = copy.deepcopy(estimator)
+    pruned.tree_ = _rebuild_tree(
+        estimator.tree_, kept, values[order].copy(), min(max_depth, estimator.tree_.max_depth),
+    )
+    return pruned
+
+
+def quantize_estimator(estimator):
+    """Copy of a fitted tree with float32-floor thresholds and 1/VALUE_SCALE node probabilities"""
+    state = estimator.tree_.__getstate__()
+    nodes, values = state['nodes'].copy(), state['values'].copy()
+    split = nodes['left_child'] != TREE_LEAF
+    nodes['threshold'][split] = float32_floor(nodes['threshold'][split])
+    totals = values.sum(axis=2, keepdims=True)
+    positive = np.round(values[:, :, 1:2] / np.where(totals > 0, totals, 1) * VALUE_SCALE) / VALUE_SCALE
+    values = np.concatenate([1 - positive, positive], axis=2)
+    quantized = copy.deepcopy(estimator)
+    quantized.tree_ = _rebuild_tree(estimator.tree_, nodes, values, state['max_depth'])
+    return quantized
+
+
+def rank_estimators(model, X, y):
+    """Estimator indices, most accurate on (X, y) first"""
+    scores = [
+        np.mean((est.predict_proba(X)[:, 1] >= 0.5) == y) for est in model.estimators_
+    ]
+    return list(np.argsort(scores, kind='stable')[::-1])
+
+
+def compacted_forest(model, ranking, n_trees, max_depth=None, quantize=True):
+    """Copy of a fitted forest with its best n_trees, pruned and quantized"""
+    estimators = [model.estimators_[i] for i in ranking[:n_trees]]
+    if max_depth is not None:
+        estimators = [prune_estimator(est, max_depth) for est in estimators]
+    if quantize:
+        estimators = [quantize_estimator(est) for est in estimators]
+    compact = copy.copy(model)
+    compact.estimators_ = estimators
+    compact.n_estimators = len(estimators)
+    return compact
+
+
+def joblib_size(model, compress=COMPRESS_LEVEL):
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer, compress=compress)
+    return buffer.tell()
+
+
+def row_log_losses(model, X, y):
+    """Log-loss of each row's positive-class probability"""
+    p = np.clip(model.predict_proba(X)[:, 1], LOG_LOSS_EPS, 1 - LOG_LOSS_EPS)
+    positive = np.asarray(y) == model.classes_[1]
+    return -np.where(positive, np.log(p), np.log1p(-p))
+
+
+def measure_forest(model, X, y, feature_names, encodings=None, quantize=True):
+    """
+    Accuracy and serving cost of one forest
+
+    Returns:
+        dict: accuracy, log_loss (mean) and log_loss_se (its standard
+            error), n_nodes, js_bytes, p99_ms and joblib_bytes
+    """
+    rows = X[:LATENCY_SAMPLE_ROWS]
+    rows = rows.toarray() if hasattr(rows, 'toarray') else np.asarray(rows)
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict_proba(row.reshape(1, -1))
+        timings.append(time.perf_counter() - start)
+    js = render_js_model(model, feature_names, 'arrays', encodings=encodings, quantize=quantize)
+    losses = row_log_losses(model, X, y)
+    return {
+        'accuracy': float(model.score(X, y)),
+        'log_loss': float(losses.mean()),
+        'log_loss_se': float(losses.std(ddof=1) / np.sqrt(len(losses))) if len(losses) > 1 else 0.0,
+        'n_nodes': int(sum(est.tree_.node_count for est in model.estimators_)),
+        'js_bytes': len(js.encode('utf-8')),
+        'p99_ms': float(np.percentile(timings, 99)) * 1000,
+        'joblib_bytes': joblib_size(model),
+    }
+
+
+def within_budget(row, max_nodes=None, max_js_bytes=None, max_p99_ms=None):
+    return (
+        (max_nodes is None or row['n_nodes'] <= max_nodes)
+        and (max_js_bytes is None or row['js_bytes'] <= max_js_bytes)
+        and (max_p99_ms is None or row['p99_ms'] <= max_p99_ms)
+    )
+
+
+def choose_candidate(rows):
+    """
+    Lowest log-loss candidate, breaking near-ties toward the larger forest
+
+    Rows within one standard error of the best log-loss are not told apart
+    by the evaluation rows; of those, the most trees (the more stable
+    average) and then the fewest nodes win.
+    """
+    best = min(rows, key=lambda r: r['log_loss'])
+    tied = [r for r in rows if r['log_loss'] <= best['log_loss'] + best['log_loss_se']]
+    return max(tied, key=lambda r: (r['trees'], -r['n_nodes']))
+
+
+def compact_forest(model, X_val, y_val, feature_names, encodings=None, max_nodes=None,
+                   max_js_bytes=None, max_p99_ms=None, tree_counts=TREE_COUNTS,
+                   max_depths=MAX_DEPTHS, random_state=42):
+    """
+    Pick the best compacted forest within a budget (see choose_candidate)
+
+    Args:
+        model: Fitted RandomForestClassifier
+        X_val, y_val: Held-out rows; half rank the trees, half score candidates
+        feature_names: Encoded column names, for the JS size figure
+        encodings: Fitted categorical encodings, for the JS size figure
+        max_nodes, max_js_bytes, max_p99_ms: Budget; unset limits are ignored
+
+    Returns:
+        dict: model (the chosen forest), chosen (its report row), baseline
+            (the original forest), candidates (all rows) and met_budget.
+            When no candidate fits, the smallest one is returned with
+            met_budget False.
+    """
+    y_val = np.asarray(y_val)
+    X_rank, X_eval, y_rank, y_eval = train_test_split(
+        X_val, y_val, test_size=0.5, random_state=random_state, stratify=y_val,
+    )
+    ranking = rank_estimators(model, X_rank, y_rank)
+    baseline = {
+        'trees': len(model.estimators_), 'max_depth': None, 'quantized': False,
+        **measure_forest(model, X_eval, y_eval, feature_names, encodings, quantize=False),
+    }
+
+    candidates, forests = [], {}
+    for n_trees in tree_counts:
+        if n_trees > len(model.estimators_):
+            continue
+        for max_depth in max_depths:
+            forest = compacted_forest(model, ranking, n_trees, max_depth)
+            row = {
+                'trees': n_trees, 'max_depth': max_depth, 'quantized': True,
+                **measure_forest(forest, X_eval, y_eval, feature_names, encodings),
+            }
+            candidates.append(row)
+            forests[(n_trees, max_depth)] = forest
+            print(f"  {n_trees:3d} trees, depth {str(max_depth):>4}: accuracy {row['accuracy']:.4f}, "
+                  f"log-loss {row['log_loss']:.4f}, {row['n_nodes']} nodes, {row['js_bytes'] / 1024:.0f} KB JS, p99 {row['p99_ms']:.2f} ms")
+
+    fitting = [r for r in candidates if within_budget(r, max_nodes, max_js_bytes, max_p99_ms)]
+    if fitting:
+        chosen = choose_candidate(fitting)
+    else:
+        chosen = min(candidates, key=lambda r: r['n_nodes'])
+    return {
+        'model': forests[(chosen['trees'], chosen['max_depth'])],
+        'chosen': chosen,
+        'baseline': baseline,
+        'candidates': candidates,
+        'met_budget': bool(fitting),
+        'budget': {'max_nodes': max_nodes, 'max_js_bytes': max_js_bytes, 'max_p99_ms': max_p99_ms},
+    }
+
+
+def format_compaction_report(result):
+    """Plain-text accuracy vs size and latency table for model_metrics-style reports"""
+    budget = ', '.join(f"{k}={v}" for k, v in result['budget'].items() if v is not None) or 'none'
+    lines = [
+        "FOREST COMPACTION",
+        "=" * 50,
+        f"Budget: {budget}" + ('' if result['met_budget'] else '  (not met; smallest candidate chosen)'),
+        "",
+        f"{'trees':>6}{'depth':>7}{'quant':>7}{'accuracy':>10}{'log-loss':>10}{'nodes':>9}{'JS KB':>8}"
+        f"{'p99 ms':>8}{'joblib KB':>11}",
+    ]
+    for label, row in [('baseline', result['baseline'])] + [('', r) for r in result['candidates']]:
+        marker = ' <- chosen' if row is result['chosen'] else (f'  {label}' if label else '')
+        lines.append(
+            f"{row['trees']:>6}{str(row['max_depth']):>7}{'yes' if row['quantized'] else 'no':>7}"
+            f"{row['accuracy']:>10.4f}{row['log_loss']:>10.4f}{row['n_nodes']:>9}{row['js_bytes'] / 1024:>8.0f}"
+            f"{row['p99_ms']:>8.2f}{row['joblib_bytes'] / 1024:>11.0f}{marker}"
+        )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,228 @@
+"""
+Serving-cost comparison of estimator families on the same preprocessed data.
+
+Each candidate is fitted on train_and_export_model.py's train split and
+reported with:
+
+- test accuracy and cross-validated accuracy
+- single-lead predict_proba latency (p50/p99) and batch time per 1,000 leads
+- explanation cost per lead with SHAP, the API's default engine
+- pickled model size and, for tree ensembles, ml_model.js size
+
+Only tree ensembles can be shipped. ml_model.js, the path explainer and
+forest compaction all walk estimators_ of decision trees. Gradient
+boosting and a sparse L1 logistic model are still measured, as reference
+points for what another family would buy.
+
+The selected family is the most accurate shippable candidate whose
+serving cost (p99 predict plus explanation) fits the latency budget.
+"""
+
+import io
+import time
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.base import clone
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MaxAbsScaler
+
+from js_model_export import render_js_model
+
+# Families that ml_model.js, the explainers and compaction can serve
+DEPLOYABLE_FAMILIES = ('random_forest', 'shallow_forest', 'extra_trees')
+FAMILIES = DEPLOYABLE_FAMILIES + ('hist_gradient_boosting', 'logistic')
+# Families that need a dense input matrix
+DENSE_FAMILIES = ('hist_gradient_boosting',)
+# shallow_forest: fewer, depth-limited trees on top of the base forest config
+SHALLOW_FOREST_PARAMS = {'n_estimators': 50, 'max_depth': 10, 'min_samples_leaf': 2}
+# Leads timed one at a time for the latency percentiles
+LATENCY_SAMPLE_ROWS = 200
+# Leads explained one at a time for the explanation cost
+EXPLAIN_SAMPLE_ROWS = 20
+# L1 logistic regression: scikit-learn 1.8 deprecated penalty= in favour of l1_ratio=
+L1_PENALTY = (
+    {'l1_ratio': 1.0}
+    if tuple(int(part) for part in sklearn.__version__.split('.')[:2]) >= (1, 8)
+    else {'penalty': 'l1'}
+)
+
+
+def family_estimator(family, base_config):
+    """
+    Unfitted estimator for a family
+
+    Args:
+        family: One of FAMILIES
+        base_config: RandomForestClassifier parameters (MODEL_CONFIG, or the
+            searched config); tree ensembles start from it
+    """
+    random_state = base_config.get('random_state', 42)
+    if family == 'random_forest':
+        return RandomForestClassifier(**base_config)
+    if family == 'shallow_forest':
+        return RandomForestClassifier(**{**base_config, **SHALLOW_FOREST_PARAMS})
+    if family == 'extra_trees':
+        return ExtraTreesClassifier(**base_config)
+    if family == 'hist_gradient_boosting':
+        return HistGradientBoostingClassifier(max_iter=200, random_state=random_state)
+    if family == 'logistic':
+        # L1 zeroes most one-hot coefficients; liblinear fits the CSR matrix without densifying
+        return make_pipeline(MaxAbsScaler(), LogisticRegression(**L1_PENALTY, solver='liblinear', max_iter=2000))
+    raise ValueError(f"unknown model family {family!r}, expected one of {FAMILIES}")
+
+
+def family_config(family, base_config):
+    """(estimator class, parameters) for train_model() to fit a shippable family"""
+    if family not in DEPLOYABLE_FAMILIES:
+        raise ValueError(f"{family} cannot be exported to ml_model.js")
+    config = {**base_config, **SHALLOW_FOREST_PARAMS} if family == 'shallow_forest' else dict(base_config)
+    return type(family_estimator(family, base_config)), config
+
+
+def _explainer(model, background):
+    import shap
+    if hasattr(model, 'named_steps'):
+        scaler, linear = model[:-1], model[-1]
+        explainer = shap.LinearExplainer(linear, scaler.transform(background))
+        return lambda row: explainer.shap_values(scaler.transform(row))
+    explainer = shap.TreeExplainer(model)
+    return explainer.shap_values
+
+
+def measure_family(family, model, X_test, y_test, feature_names, encodings=None):
+    """
+    Accuracy and serving cost of one fitted candidate
+
+    Returns:
+        dict: test_accuracy, single_p50_ms, single_p99_ms, batch_ms_per_1k,
+            explain_ms, serving_ms (p99 predict + explanation), model_bytes
+            and js_bytes (None when the family cannot be exported)
+    """
+    dense = X_test.toarray() if hasattr(X_test, 'toarray') else np.asarray(X_test)
+    timings = []
+    for row in dense[:LATENCY_SAMPLE_ROWS]:
+        start = time.perf_counter()
+        model.predict_proba(row.reshape(1, -1))
+        timings.append(time.perf_counter() - start)
+    batch = dense[:1000]
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    batch_ms_per_1k = (time.perf_counter() - start) * 1000 * 1000 / len(batch)
+
+    explain = _explainer(model, dense[:100])
+    explain(dense[:1])  # build any lazy state outside the timing
+    explain_timings = []
+    for row in dense[:EXPLAIN_SAMPLE_ROWS]:
+        start = time.perf_counter()
+        explain(row.reshape(1, -1))
+        explain_timings.append(time.perf_counter() - start)
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    js_bytes = None
+    if family in DEPLOYABLE_FAMILIES:
+        js_bytes = len(render_js_model(model, feature_names, 'arrays', encodings=encodings).encode('utf-8'))
+
+    single_p99_ms = float(np.percentile(timings, 99)) * 1000
+    explain_ms = float(np.median(explain_timings)) * 1000
+    return {
+        'test_accuracy': float(model.score(X_test if family not in DENSE_FAMILIES else dense, y_test)),
+        'single_p50_ms': float(np.percentile(timings, 50)) * 1000,
+        'single_p99_ms': single_p99_ms,
+        'batch_ms_per_1k': batch_ms_per_1k,
+        'explain_ms': explain_ms,
+        'serving_ms': single_p99_ms + explain_ms,
+        'model_bytes': buffer.tell(),
+        'js_bytes': js_bytes,
+    }
+
+
+def compare_families(X, y, split, feature_names, base_config, families=FAMILIES, encodings=None,
+                     cv=5, cv_jobs=1):
+    """
+    Fit and measure every family on the same features and split
+
+    Args:
+        X: Sparse feature matrix from the feature store
+        y: Target vector
+        split: (X_train, X_test, y_train, y_test) of X and y
+        feature_names: Encoded column names, for the JS size figure
+        base_config: Forest parameters the tree-ensemble families start from
+        families: Families to compare
+        encodings: Fitted categorical encodings, for the JS size figure
+        cv, cv_jobs: Cross-validation folds and processes
+
+    Returns:
+        list: One report row per family, in the order given
+    """
+    X_train, X_test, y_train, y_test = split
+    rows = []
+    for family in families:
+        print(f"  Fitting {family}...")
+        estimator = family_estimator(family, base_config)
+        densify = family in DENSE_FAMILIES
+        X_fit = X_train.toarray() if densify else X_train
+        start = time.perf_counter()
+        model = clone(estimator).fit(X_fit, y_train)
+        fit_seconds = time.perf_counter() - start
+        cv_scores = cross_val_score(estimator, X.toarray() if densify else X, y, cv=cv,
+                                    scoring='accuracy', n_jobs=cv_jobs)
+        rows.append({
+            'family': family,
+            'deployable': family in DEPLOYABLE_FAMILIES,
+            'cv_mean_accuracy': float(cv_scores.mean()),
+            'cv_std_accuracy': float(cv_scores.std()),
+            'fit_seconds': fit_seconds,
+            **measure_family(family, model, X_test, y_test, feature_names, encodings),
+        })
+    return rows
+
+
+def select_family(rows, max_latency_ms=None):
+    """
+    Most accurate shippable family within the latency budget
+
+    Args:
+        rows: Report rows from compare_families()
+        max_latency_ms: Budget on serving_ms (p99 predict + explanation);
+            None means accuracy alone decides
+
+    Returns:
+        tuple: (chosen row, whether it met the budget). When no shippable
+            family fits, the cheapest one is chosen.
+    """
+    deployable = [r for r in rows if r['deployable']]
+    if not deployable:
+        raise ValueError(f"no shippable family compared; include one of {DEPLOYABLE_FAMILIES}")
+    fitting = [r for r in deployable if max_latency_ms is None or r['serving_ms'] <= max_latency_ms]
+    if fitting:
+        return max(fitting, key=lambda r: (r['cv_mean_accuracy'], -r['serving_ms'])), True
+    return min(deployable, key=lambda r: r['serving_ms']), False
+
+
+def format_family_report(rows, chosen=None, max_latency_ms=None):
+    """Plain-text accuracy vs serving cost table"""
+    lines = [
+        "MODEL FAMILY SELECTION",
+        "=" * 50,
+        f"Latency budget (p99 predict + SHAP explanation): "
+        f"{'none' if max_latency_ms is None else f'{max_latency_ms} ms'}",
+        "",
+        f"{'family':<24}{'ship':>5}{'cv acc':>9}{'test':>8}{'p50 ms':>8}{'p99 ms':>8}"
+        f"{'1k ms':>8}{'shap ms':>9}{'serve ms':>10}{'pkl KB':>8}{'JS KB':>8}",
+    ]
+    for r in rows:
+        js_kb = '-' if r['js_bytes'] is None else f"{r['js_bytes'] / 1024:.0f}"
+        marker = ' <- chosen' if r is chosen else ''
+        lines.append(
+            f"{r['family']:<24}{'yes' if r['deployable'] else 'no':>5}{r['cv_mean_accuracy']:>9.4f}"
+            f"{r['test_accuracy']:>8.4f}{r['single_p50_ms']:>8.2f}{r['single_p99_ms']:>8.2f}"
+            f"{r['batch_ms_per_1k']:>8.1f}{r['explain_ms']:>9.2f}{r['serving_ms']:>10.2f}"
+            f"{r['model_bytes'] / 1024:>8.0f}{js_kb:>8}{marker}"
+        )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,196 @@
+"""
+Parallel hyperparameter search for the lead conversion forest.
+
+Candidates are drawn from a declared parameter space (the full grid when it
+is small enough, otherwise a random sample) and narrowed by successive
+halving: every round cross-validates the surviving candidates on a larger
+slice of the training rows and keeps the best 1/eta of them. Each
+(candidate, fold) fit is an independent task spread across a process pool;
+workers load the training matrix once from the feature store.
+
+Besides accuracy, every fit records its training time, single-lead
+inference latency and pickled model size, so the report can show what a
+more accurate configuration costs to serve.
+
+Usage:
+    python train_and_export_model.py --search [--search-candidates N] [--search-time SECONDS]
+"""
+
+import itertools
+import math
+import multiprocessing
+import os
+import pickle
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+
+from ml_backend.feature_store import load_features
+
+# Leads timed per fitted model for the single-lead latency figure
+LATENCY_SAMPLE_ROWS = 20
+
+
+def candidate_configs(space, n_candidates=None, random_state=42):
+    """
+    Parameter combinations to evaluate
+
+    Args:
+        space: {param: [values]} to search over
+        n_candidates: Max combinations; the full grid is used when it is
+            no larger, otherwise a random sample without replacement
+
+    Returns:
+        list: Parameter dicts
+    """
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+    if n_candidates is None or n_candidates >= len(grid):
+        return grid
+    rng = np.random.default_rng(random_state)
+    picks = rng.choice(len(grid), size=n_candidates, replace=False)
+    return [grid[i] for i in sorted(picks)]
+
+
+def measure_model(model, X, n_rows=LATENCY_SAMPLE_ROWS):
+    """
+    Serving cost of a fitted forest
+
+    Returns:
+        dict: latency_ms (median single-lead predict_proba), size_bytes
+            (pickled) and n_nodes (total tree nodes)
+    """
+    timings = []
+    for row in X[:n_rows]:
+        start = time.perf_counter()
+        model.predict_proba(row.reshape(1, -1))
+        timings.append(time.perf_counter() - start)
+    return {
+        'latency_ms': float(np.median(timings)) * 1000,
+        'size_bytes': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        'n_nodes': int(sum(est.tree_.node_count for est in model.estimators_)),
+    }
+
+
+# Training matrix for worker processes, set once per worker by _init_worker
+_worker_X = None
+_worker_y = None
+
+
+def _init_worker(data_path, encodings):
+    global _worker_X, _worker_y
+    features = load_features(data_path, encodings=encodings)
+    _worker_X, _worker_y = features.X_sparse, np.asarray(features.y)
+
+
+def _fit_fold_task(task):
+    candidate, fold, params, train_idx, test_idx = task
+    model = RandomForestClassifier(**params, n_jobs=1)
+    start = time.perf_counter()
+    model.fit(_worker_X[train_idx], _worker_y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    accuracy = float(model.score(_worker_X[test_idx], _worker_y[test_idx]))
+    return candidate, fold, {
+        'accuracy': accuracy,
+        'fit_seconds': fit_seconds,
+        # Served leads arrive as dense encoder rows, so time those
+        **measure_model(model, _worker_X[test_idx[:LATENCY_SAMPLE_ROWS]].toarray()),
+    }
+
+
+def _summarise(params, folds):
+    accuracies = [f['accuracy'] for f in folds]
+    return {
+        'params': params,
+        'cv_mean_accuracy': float(np.mean(accuracies)),
+        'cv_std_accuracy': float(np.std(accuracies)),
+        **{key: float(np.mean([f[key] for f in folds]))
+           for key in ('fit_seconds', 'latency_ms', 'size_bytes', 'n_nodes')},
+    }
+
+
+def successive_halving(data_path, base_config, space, n_candidates=None, eta=3, cv=5,
+                       n_jobs=-1, time_budget=None, random_state=42, encodings=None):
+    """
+    Search the parameter space with cross-validated successive halving
+
+    Args:
+        data_path: Training CSV; workers read its encoded form from the feature store
+        base_config: RandomForestClassifier parameters shared by every candidate
+        space: {param: [values]} overriding base_config per candidate
+        n_candidates: Max candidates in the first round (None = full grid)
+        eta: Keep the best 1/eta candidates per round and grow rows by eta
+        cv: Stratified folds per candidate
+        n_jobs: Worker processes (-1 = all cores)
+        time_budget: Wall-clock seconds; a round still running when it runs
+            out is abandoned (queued fits cancelled, running fits killed)
+            and the previous round's ranking is used
+        encodings: Categorical encodings for the feature store (None = defaults)
+
+    Returns:
+        dict: best_params, leaderboard (last completed round, best first),
+            rounds (candidates and rows per round), elapsed_seconds and
+            stopped_early
+    """
+    start = time.monotonic()
+    features = load_features(data_path, encodings=encodings)
+    y = np.asarray(features.y)
+    candidates = candidate_configs(space, n_candidates, random_state)
+    n_rounds = max(1, math.ceil(math.log(len(candidates), eta))) if len(candidates) > 1 else 1
+    # Rows grow by eta per round and the last round uses all of them
+    order = np.random.default_rng(random_state).permutation(len(y))
+    n_jobs = n_jobs if n_jobs > 0 else os.cpu_count()
+
+    leaderboard, rounds, stopped_early = None, [], False
+    # multiprocessing.Pool rather than ProcessPoolExecutor: terminate() kills fits in
+    # progress, so the time budget caps wall-clock time instead of waiting for them
+    pool = multiprocessing.Pool(n_jobs, initializer=_init_worker, initargs=(data_path, encodings))
+    try:
+        for round_index in range(n_rounds):
+            n_rows = max(cv * 20, len(y) // eta ** (n_rounds - 1 - round_index))
+            rows = np.sort(order[:min(n_rows, len(y))])
+            splitter = StratifiedKFold(cv, shuffle=True, random_state=random_state)
+            folds = [(rows[tr], rows[te]) for tr, te in splitter.split(rows, y[rows])]
+            print(f"  Round {round_index + 1}/{n_rounds}: {len(candidates)} candidates "
+                  f"x {cv} folds on {len(rows)} rows")
+
+            tasks = [
+                (c, f, {**base_config, **params}, tr, te)
+                for c, params in enumerate(candidates)
+                for f, (tr, te) in enumerate(folds)
+            ]
+            fits = pool.imap_unordered(_fit_fold_task, tasks)
+            results = [[] for _ in candidates]
+            try:
+                for _ in tasks:
+                    remaining = None if time_budget is None else max(time_budget - (time.monotonic() - start), 0)
+                    c, _, result = fits.next(timeout=remaining)
+                    results[c].append(result)
+            except multiprocessing.TimeoutError:
+                stopped_early = True
+                print("  Time budget exhausted, keeping the previous round's ranking")
+                break
+
+            ranked = sorted(
+                (_summarise(params, folds) for params, folds in zip(candidates, results)),
+                key=lambda r: (-r['cv_mean_accuracy'], r['latency_ms']),
+            )
+            leaderboard = ranked
+            rounds.append({'candidates': len(candidates), 'rows': int(len(rows))})
+            candidates = [r['params'] for r in ranked[:max(1, math.ceil(len(ranked) / eta))]]
+    finally:
+        # Also stops queued and running fits of an abandoned round
+        pool.terminate()
+        pool.join()
+
+    if leaderboard is None:
+        raise TimeoutError(f"Search time budget of {time_budget}s ran out before the first round finished")
+    return {
+        'best_params': leaderboard[0]['params'],
+        'leaderboard': leaderboard,
+        'rounds': rounds,
+        'elapsed_seconds': time.monotonic() - start,
+        'stopped_early': stopped_early,
+    }
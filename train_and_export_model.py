@@ -8,12 +8,15 @@ This script handles both:
 This enables GitHub Pages deployment by eliminating the need for a Python backend.
 
 Usage:
-    python train_and_export_model.py
+    python train_and_export_model.py [--js-format arrays|functions] [--jobs N]
+                                     [--search] [--search-candidates N] [--search-time SECONDS]
+                                     [--train-jobs N] [--encoding COLUMN=STRATEGY[:PARAM] ...]
+                                     [--max-nodes N] [--max-js-bytes N] [--max-p99-ms MS] [--compress LEVEL]
+                                     [--families all|FAMILY,...] [--max-latency-ms MS]
 """
 
+import argparse
 import pandas as pd
-import joblib
-import json
 import os
 import numpy as np
 from datetime import datetime
@@ -21,15 +24,26 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import accuracy_score, classification_report
 
+from js_model_export import JS_FORMATS, export_to_javascript
+from model_compaction import COMPRESS_LEVEL, compact_forest, format_compaction_report
+from model_families import FAMILIES, compare_families, family_config, format_family_report, select_family
+from model_search import successive_halving
+
+from ml_backend.feature_encoder import ENCODING_STRATEGIES, parse_encoding_spec
+from ml_backend.feature_store import load_features
+from ml_backend.model_artifacts import CATEGORICAL_ENCODINGS, build_feature_schema, save_artifacts
+
 # =====================================================
 # CONFIGURATION
 # =====================================================
 
 # File paths
 DATA_PATH = 'small file.csv'
-MODEL_PATH = os.path.join('trained_model', 'lead_model.pkl')
+MODEL_DIR = 'trained_model'  # versioned: trained_model/versions/<version>/, see CURRENT
 JS_MODEL_PATH = 'ml_model.js'
 METRICS_PATH = os.path.join('trained_model', 'model_metrics.txt')
+COMPACTION_REPORT_PATH = os.path.join('trained_model', 'compaction_report.txt')
+FAMILY_REPORT_PATH = os.path.join('trained_model', 'model_selection_report.txt')
 
 # Model hyperparameters
 MODEL_CONFIG = {
@@ -40,64 +54,155 @@ MODEL_CONFIG = {
     'min_samples_leaf': 1     # Minimum samples required at a leaf node
 }
 
-def load_and_prepare_data():
+# Parameter space for --search; each candidate overrides MODEL_CONFIG
+SEARCH_SPACE = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 10, 20, 40],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': ['sqrt', 'log2', 0.1],
+}
+
+def load_and_prepare_data(rebuild_features=False, encodings=None):
     """
-    Load and preprocess the training data
+    Load the preprocessed training data from the feature store
+    
+    The CSV is only parsed and one-hot encoded when its contents or the
+    preprocessing config changed since the last run.
+    
+    Args:
+        rebuild_features: Re-encode the CSV even if a cached entry exists
+        encodings: Categorical encodings; defaults to CATEGORICAL_ENCODINGS
     
     Returns:
-        tuple: (X, y, df) where X is features, y is target, df is original dataframe
+        tuple: (X, y, feature_names, schema) where X is the sparse feature
+            matrix, y is target, feature_names are the encoded column names
+            and schema is the feature-schema manifest
     """
     print("Loading training data...")
     
-    # Load historical lead data
-    df = pd.read_csv(DATA_PATH)
-    print(f"Loaded {len(df)} records from {DATA_PATH}")
-    
-    # Feature Selection: Drop non-feature columns
-    X = df.drop(['Converted', 'Name', 'Email', 'Website'], axis=1)
+    # Encoded with the shared encoder, so training and serving use the
+    # exact same column layout
+    features = load_features(DATA_PATH, encodings=encodings, rebuild=rebuild_features)
+    source = "feature cache" if features.from_cache else "freshly encoded CSV"
+    print(f"Loaded {len(features)} records from {DATA_PATH} ({source})")
     
-    # Convert categorical variables to dummy variables
-    X = pd.get_dummies(X)
+    # Sparse one-hot keeps memory proportional to non-zeros, not rows x columns
+    X = features.X_sparse
+    feature_names = list(features.columns)
     
     # Target Variable: Converted (0 or 1)
-    y = df['Converted']
+    y = pd.Series(features.y, name='Converted')
+    
+    # Feature-schema manifest saved alongside the model for serving
+    schema = build_feature_schema(features.encoder, DATA_PATH, features.data_hash)
     
     # Data validation
     print(f"Features shape: {X.shape}")
     print(f"Target shape: {y.shape}")
-    print(f"Missing values in features: {X.isnull().sum().sum()}")
+    print(f"Non-zero feature values: {X.nnz} ({X.nnz / (X.shape[0] * X.shape[1]):.4%} dense)")
     print(f"Missing values in target: {y.isnull().sum()}")
-    print(f"Number of features after encoding: {len(X.columns)}")
+    print(f"Number of features after encoding: {len(feature_names)}")
     
-    return X, y, df
+    return X, y, feature_names, schema
 
-def train_model(X, y):
+def search_model_config(args):
     """
-    Train the Random Forest model with cross-validation
+    Pick MODEL_CONFIG overrides with a parallel successive-halving search
+    
+    Args:
+        args: Parsed command line (search_candidates, search_time, train_jobs, encodings)
+        
+    Returns:
+        dict: Search results from model_search.successive_halving()
+    """
+    print("\nSearching hyperparameters...")
+    search = successive_halving(
+        DATA_PATH, MODEL_CONFIG, SEARCH_SPACE,
+        n_candidates=args.search_candidates,
+        n_jobs=args.train_jobs,
+        time_budget=args.search_time,
+        random_state=MODEL_CONFIG['random_state'],
+        encodings=args.encodings,
+    )
+    best = search['leaderboard'][0]
+    print(f"Search finished in {search['elapsed_seconds']:.1f}s, best: {search['best_params']}")
+    print(f"  CV accuracy {best['cv_mean_accuracy']:.4f}, latency {best['latency_ms']:.2f} ms, "
+          f"size {best['size_bytes'] / 1024:.0f} KB")
+    return search
+
+def split_data(X, y):
+    """
+    Hold out the evaluation rows shared by train_model and compaction
+    
+    Returns:
+        tuple: (X_train, X_test, y_train, y_test)
+    """
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+def select_model_family(X, y, feature_names, config, schema, args):
+    """
+    Compare estimator families on serving cost and pick one to ship
+    
+    Args:
+        X, y: Full feature matrix and target
+        feature_names: Encoded column names
+        config: Forest parameters the tree-ensemble families start from
+        schema: Feature-schema manifest, for the fitted encodings
+        args: Parsed command line (families, max_latency_ms, train_jobs)
+        
+    Returns:
+        tuple: (estimator_class, config, selection) where selection holds
+            the chosen row, the full comparison and whether the budget was met
+    """
+    print("\nComparing model families...")
+    rows = compare_families(
+        X, y, split_data(X, y), feature_names, config, args.families,
+        encodings=schema['encodings'], cv_jobs=args.train_jobs,
+    )
+    chosen, met_budget = select_family(rows, args.max_latency_ms)
+    if not met_budget:
+        print("⚠️  No shippable family fits the latency budget; using the cheapest one")
+    print(f"Chosen family: {chosen['family']} (CV accuracy {chosen['cv_mean_accuracy']:.4f}, "
+          f"serving {chosen['serving_ms']:.2f} ms)")
+    
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(FAMILY_REPORT_PATH, 'w') as f:
+        f.write(format_family_report(rows, chosen, args.max_latency_ms))
+    print(f"Model selection report saved to: {FAMILY_REPORT_PATH}")
+    
+    estimator_class, family_params = family_config(chosen['family'], config)
+    return estimator_class, family_params, {'chosen': chosen, 'rows': rows, 'met_budget': met_budget}
+
+def train_model(X, y, feature_names, config=MODEL_CONFIG, cv_jobs=1, estimator_class=RandomForestClassifier):
+    """
+    Train the tree ensemble with cross-validation
     
     Args:
         X: Feature matrix
         y: Target vector
+        feature_names: Encoded column names, for feature importances
+        config: Estimator parameters
+        cv_jobs: Processes for the cross-validation refits (-1 = all cores)
+        estimator_class: RandomForestClassifier, or another family picked
+            by select_model_family()
         
     Returns:
         tuple: (trained_model, training_metrics)
     """
-    print("\nTraining Random Forest classifier...")
+    print(f"\nTraining {estimator_class.__name__}...")
     
     # Split data for final evaluation
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    X_train, X_test, y_train, y_test = split_data(X, y)
     
-    print(f"Training set size: {len(X_train)}")
-    print(f"Test set size: {len(X_test)}")
+    print(f"Training set size: {X_train.shape[0]}")
+    print(f"Test set size: {X_test.shape[0]}")
     print(f"Training target distribution: {y_train.value_counts().to_dict()}")
     print(f"Test target distribution: {y_test.value_counts().to_dict()}")
     
     # Initialize model
-    model = RandomForestClassifier(**MODEL_CONFIG)
+    model = estimator_class(**config)
     
-    # Train model
+    # Train model on plain (sparse) arrays; serving feeds encoder matrices, not frames
     model.fit(X_train, y_train)
     
     # =====================================================
@@ -113,10 +218,10 @@ def train_model(X, y):
     test_accuracy = accuracy_score(y_test, y_test_pred)
     
     # Cross-validation for more robust evaluation
-    cv_scores = cross_val_score(model, X, y, cv=5, scoring='accuracy')
+    cv_scores = cross_val_score(model, X, y, cv=5, scoring='accuracy', n_jobs=cv_jobs)
     
     # Feature importance (top 10)
-    feature_importance = dict(zip(X.columns, model.feature_importances_))
+    feature_importance = dict(zip(feature_names, model.feature_importances_))
     top_features = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)[:10]
     
     # Classification report
@@ -131,29 +236,76 @@ def train_model(X, y):
         'top_features': top_features,
         'classification_report': test_report,
         'training_date': datetime.now().isoformat(),
-        'model_config': MODEL_CONFIG,
-        'data_size': len(X),
+        'model_config': config,
+        'model_class': estimator_class.__name__,
+        'data_size': X.shape[0],
         'num_features': X.shape[1]
     }
     
     return model, metrics
 
-def save_model_and_metrics(model, metrics):
+def compact_model(model, X, y, feature_names, schema, args):
+    """
+    Shrink the trained forest to the --max-nodes/--max-js-bytes/--max-p99-ms budget
+    
+    Candidates are scored on train_model's held-out rows, so the report's
+    accuracies are comparable with its test accuracy.
+    
+    Args:
+        model: Trained RandomForestClassifier
+        X, y: Full feature matrix and target
+        feature_names: Encoded column names
+        schema: Feature-schema manifest; records the chosen compaction
+        args: Parsed command line (max_nodes, max_js_bytes, max_p99_ms)
+        
+    Returns:
+        tuple: (compacted_model, compaction_result)
+    """
+    print("\nCompacting forest...")
+    _, X_test, _, y_test = split_data(X, y)
+    result = compact_forest(
+        model, X_test, np.asarray(y_test), feature_names, schema['encodings'],
+        max_nodes=args.max_nodes, max_js_bytes=args.max_js_bytes, max_p99_ms=args.max_p99_ms,
+    )
+    chosen = result['chosen']
+    if not result['met_budget']:
+        print("⚠️  No candidate fits the budget; using the smallest one")
+    print(f"Chosen: {chosen['trees']} trees, max depth {chosen['max_depth']}, "
+          f"{chosen['n_nodes']} nodes, accuracy {chosen['accuracy']:.4f}, log-loss {chosen['log_loss']:.4f} "
+          f"(baseline {result['baseline']['accuracy']:.4f}, {result['baseline']['log_loss']:.4f})")
+    schema['compaction'] = {
+        'trees': chosen['trees'],
+        'max_depth': chosen['max_depth'],
+        'quantized': chosen['quantized'],
+    }
+    
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(COMPACTION_REPORT_PATH, 'w') as f:
+        f.write(format_compaction_report(result))
+    print(f"Compaction report saved to: {COMPACTION_REPORT_PATH}")
+    return result['model'], result
+
+def save_model_and_metrics(model, metrics, schema, compress=0):
     """
-    Save the trained model and training metrics
+    Save the trained model, its feature-schema manifest and training metrics
     
     Args:
         model: Trained scikit-learn model
         metrics: Dictionary containing training metrics
+        schema: Feature-schema manifest from load_and_prepare_data()
+        compress: joblib compression level for the saved model
+        
+    Returns:
+        str: Path of the saved model file
     """
     print("\nSaving model and metrics...")
     
-    # Create trained_model directory if it doesn't exist
-    os.makedirs('trained_model', exist_ok=True)
-    
-    # Save model
-    joblib.dump(model, MODEL_PATH)
-    print(f"Model saved to: {MODEL_PATH}")
+    # Save model and schema manifest as a new version and make it CURRENT;
+    # a running ml_api picks it up via /admin/reload or its model watcher
+    model_path, schema_path = save_artifacts(model, schema, MODEL_DIR, compress=compress)
+    print(f"Model version: {schema['model_version']}")
+    print(f"Model saved to: {model_path}")
+    print(f"Feature schema saved to: {schema_path}")
     
     # Save metrics to text file for easy reading
     with open(METRICS_PATH, 'w') as f:
@@ -164,6 +316,7 @@ def save_model_and_metrics(model, metrics):
         f.write(f"Number of Features: {metrics['num_features']}\n\n")
         
         f.write("MODEL CONFIGURATION:\n")
+        f.write(f"  estimator: {metrics['model_class']}\n")
         for key, value in metrics['model_config'].items():
             f.write(f"  {key}: {value}\n")
         f.write("\n")
@@ -185,201 +338,68 @@ def save_model_and_metrics(model, metrics):
         f.write("TOP 10 MOST IMPORTANT FEATURES:\n")
         for i, (feature, importance) in enumerate(metrics['top_features'], 1):
             f.write(f"  {i:2d}. {feature}: {importance:.4f}\n")
+        
+        search = metrics.get('search')
+        if search:
+            f.write("\nHYPERPARAMETER SEARCH:\n")
+            f.write(f"  Winning config: {search['best_params']}\n")
+            rounds = ', '.join(f"{r['candidates']} on {r['rows']} rows" for r in search['rounds'])
+            f.write(f"  Rounds (candidates on rows): {rounds}\n")
+            f.write(f"  Elapsed: {search['elapsed_seconds']:.1f}s"
+                    f"{' (stopped by time budget)' if search['stopped_early'] else ''}\n")
+            f.write("  Final round (accuracy, fit s, latency ms, size KB, nodes):\n")
+            for i, r in enumerate(search['leaderboard'], 1):
+                f.write(f"  {i:2d}. {r['cv_mean_accuracy']:.4f} ± {r['cv_std_accuracy']:.4f}  "
+                        f"{r['fit_seconds']:6.2f}  {r['latency_ms']:6.2f}  "
+                        f"{r['size_bytes'] / 1024:8.0f}  {r['n_nodes']:8.0f}  {r['params']}\n")
+        
+        selection = metrics.get('model_selection')
+        if selection:
+            chosen = selection['chosen']
+            f.write("\nMODEL FAMILY SELECTION:\n")
+            f.write(f"  Chosen: {chosen['family']}"
+                    f"{'' if selection['met_budget'] else ' (no family met the latency budget)'}\n")
+            f.write("  Family (CV accuracy, p99 predict ms, SHAP ms, JS KB):\n")
+            for r in selection['rows']:
+                js_kb = 'not exportable' if r['js_bytes'] is None else f"{r['js_bytes'] / 1024:.0f}"
+                f.write(f"    {r['family']:<24} {r['cv_mean_accuracy']:.4f}  {r['single_p99_ms']:6.2f}  "
+                        f"{r['explain_ms']:6.2f}  {js_kb}\n")
+            f.write(f"  Full comparison: {FAMILY_REPORT_PATH}\n")
+        
+        compaction = metrics.get('compaction')
+        if compaction:
+            chosen, baseline = compaction['chosen'], compaction['baseline']
+            f.write("\nFOREST COMPACTION:\n")
+            f.write(f"  Kept: {chosen['trees']} trees, max depth {chosen['max_depth']}, "
+                    f"quantized: {chosen['quantized']}\n")
+            f.write(f"  Held-out accuracy: {chosen['accuracy']:.4f} (uncompacted {baseline['accuracy']:.4f})\n")
+            f.write(f"  Held-out log-loss: {chosen['log_loss']:.4f} (uncompacted {baseline['log_loss']:.4f})\n")
+            f.write(f"  Nodes: {chosen['n_nodes']} (uncompacted {baseline['n_nodes']})\n")
+            f.write(f"  JS bytes: {chosen['js_bytes']} (uncompacted {baseline['js_bytes']})\n")
+            f.write(f"  p99 latency: {chosen['p99_ms']:.2f} ms (uncompacted {baseline['p99_ms']:.2f} ms)\n")
+            f.write(f"  Full candidate table: {COMPACTION_REPORT_PATH}\n")
     
     print(f"Metrics saved to: {METRICS_PATH}")
+    
+    return model_path
 
-def extract_tree_rules(tree, feature_names):
-    """Extract decision tree rules and convert to JavaScript"""
-    tree_ = tree.tree_
-    feature_name = [
-        feature_names[i] if i != -2 else "undefined!"
-        for i in tree_.feature
-    ]
-    
-    def recurse(node, depth=0):
-        indent = "  " * depth
-        if tree_.feature[node] != -2:
-            name = feature_name[node]
-            threshold = tree_.threshold[node]
-            return f"{indent}if (features['{name}'] <= {threshold}) {{\n" + \
-                   recurse(tree_.children_left[node], depth + 1) + \
-                   f"{indent}}} else {{\n" + \
-                   recurse(tree_.children_right[node], depth + 1) + \
-                   f"{indent}}}\n"
-        else:
-            # Leaf node - return probability
-            value = tree_.value[node][0]
-            prob = value[1] / (value[0] + value[1]) if (value[0] + value[1]) > 0 else 0
-            return f"{indent}return {prob:.6f};\n"
-    
-    return recurse(0)
-
-def export_to_javascript(model, X):
+def export_js_model(model, feature_names, js_format, n_jobs=1, encodings=None, quantize=False):
     """
     Export the trained model to JavaScript for client-side use
     
     Args:
         model: Trained scikit-learn model
-        X: Feature matrix (for feature names)
+        feature_names: Encoded column names
+        js_format: 'arrays' (compact typed arrays) or 'functions' (nested if/else)
+        n_jobs: Processes used to render 'functions' trees (-1 = all cores)
+        encodings: Fitted categorical encodings from the feature schema
+        quantize: float32 thresholds and uint16 node probabilities ('arrays' only)
     """
-    print("\nExporting model to JavaScript...")
-    
-    # Generate JavaScript code for Random Forest
-    js_code = f"""
-// Auto-generated Random Forest model from scikit-learn
-// Lead Intent Scoring Model
-// Generated on: {datetime.now().isoformat()}
-
-// Feature names
-const MODEL_FEATURES = {json.dumps(list(X.columns))};
-
-// Individual tree predictions
-const TREE_PREDICTIONS = [
-"""
-
-    # Export each tree in the forest
-    for i, tree in enumerate(model.estimators_):
-        js_code += f"  // Tree {i + 1}\n"
-        js_code += f"  function tree_{i}(features) {{\n"
-        js_code += extract_tree_rules(tree, X.columns)
-        js_code += f"  }},\n"
-
-    js_code += """];
-
-// Helper function to preprocess input data
-function preprocessLeadData(lead) {
-    const features = {};
-    
-    // Initialize all features to 0
-    MODEL_FEATURES.forEach(feature => {
-        features[feature] = 0;
-    });
-    
-    // Map input fields to model features
-    // Title mapping
-    if (lead.title || lead.Title) {
-        const title = lead.title || lead.Title;
-        const titleKey = `Title_${title}`;
-        if (MODEL_FEATURES.includes(titleKey)) {
-            features[titleKey] = 1;
-        }
-    }
-    
-    // Industry mapping  
-    if (lead.industry || lead.Industry) {
-        const industry = lead.industry || lead.Industry;
-        const industryKey = `Industry_${industry}`;
-        if (MODEL_FEATURES.includes(industryKey)) {
-            features[industryKey] = 1;
-        }
-    }
-    
-    // Company Size mapping
-    if (lead.companySize || lead['Company Size']) {
-        const size = lead.companySize || lead['Company Size'];
-        const sizeKey = `Company Size_${size}`;
-        if (MODEL_FEATURES.includes(sizeKey)) {
-            features[sizeKey] = 1;
-        }
-    }
-    
-    // Numerical features
-    features['Page Views'] = parseFloat(lead.pageViews || lead['Page Views']) || 0;
-    features['Downloads'] = parseFloat(lead.downloads || lead['Downloads']) || 0;
-    features['Webinar Attended'] = parseInt(lead.webinarAttended || lead['Webinar Attended']) || 0;
-    
-    return features;
-}
-
-// Main prediction function (Random Forest)
-function predictLeadScore(lead) {
-    try {
-        const features = preprocessLeadData(lead);
-        
-        // Get predictions from all trees
-        let totalScore = 0;
-        for (let i = 0; i < TREE_PREDICTIONS.length; i++) {
-            totalScore += TREE_PREDICTIONS[i](features);
-        }
-        
-        // Average the predictions (Random Forest)
-        const score = totalScore / TREE_PREDICTIONS.length;
-        
-        return {
-            score: score,
-            explanation: [
-                { feature: 'Page Views', impact: features['Page Views'] > 10 ? 0.2 : (features['Page Views'] > 5 ? 0.1 : 0) },
-                { feature: 'Downloads', impact: features['Downloads'] > 2 ? 0.2 : (features['Downloads'] > 0 ? 0.1 : 0) },
-                { feature: 'Webinar Attended', impact: features['Webinar Attended'] ? 0.15 : 0 },
-                { feature: 'Company Size', impact: (lead.companySize === 'Enterprise' || lead['Company Size'] === 'Enterprise') ? 0.1 : ((lead.companySize === 'Mid-Market' || lead['Company Size'] === 'Mid-Market') ? 0.05 : 0) },
-                { feature: 'Industry', impact: ['Technology', 'Finance', 'Healthcare'].includes(lead.industry || lead.Industry) ? 0.1 : 0 }
-            ]
-        };
-    } catch (error) {
-        console.error('Error in ML prediction:', error);
-        // Fallback to rule-based scoring
-        return generateFallbackScore(lead);
-    }
-}
-
-// Fallback scoring function (from app.js)
-function generateFallbackScore(lead) {
-    let score = 0.3; // Base score
-    
-    // Score based on engagement
-    const pageViews = parseInt(lead.pageViews || lead['Page Views']) || 0;
-    const downloads = parseInt(lead.downloads || lead['Downloads']) || 0;
-    const webinarAttended = !!(lead.webinarAttended || lead['Webinar Attended']);
-    
-    if (pageViews > 10) score += 0.2;
-    else if (pageViews > 5) score += 0.1;
-    
-    if (downloads > 2) score += 0.2;
-    else if (downloads > 0) score += 0.1;
-    
-    if (webinarAttended) score += 0.15;
-    
-    // Score based on company attributes
-    const companySize = lead.companySize || lead['Company Size'] || '';
-    if (companySize === 'Enterprise') score += 0.1;
-    else if (companySize === 'Mid-Market') score += 0.05;
-    
-    // Industry scoring
-    const industry = lead.industry || lead.Industry || '';
-    const highValueIndustries = ['Technology', 'Finance', 'Healthcare'];
-    if (highValueIndustries.includes(industry)) score += 0.1;
-    
-    // Title scoring
-    const title = lead.title || lead.Title || '';
-    const seniorTitles = ['CEO', 'CTO', 'VP', 'Director', 'Manager'];
-    if (seniorTitles.some(t => title.includes(t))) score += 0.1;
-    
-    // Cap at 1.0
-    score = Math.min(score, 1.0);
-    
-    return {
-        score: score,
-        explanation: [
-            { feature: 'Page Views', impact: pageViews > 5 ? 0.1 : 0 },
-            { feature: 'Downloads', impact: downloads > 0 ? 0.1 : 0 },
-            { feature: 'Webinar Attendance', impact: webinarAttended ? 0.15 : 0 },
-            { feature: 'Company Size', impact: companySize === 'Enterprise' ? 0.1 : 0.05 },
-            { feature: 'Industry', impact: highValueIndustries.includes(industry) ? 0.1 : 0 }
-        ]
-    };
-}
-
-// Export for use in other modules
-if (typeof module !== 'undefined' && module.exports) {
-    module.exports = { predictLeadScore, preprocessLeadData, MODEL_FEATURES, generateFallbackScore };
-}
-"""
-
-    # Save the JavaScript model
-    with open(JS_MODEL_PATH, 'w') as f:
-        f.write(js_code)
-    
-    print(f"JavaScript model exported to: {JS_MODEL_PATH}")
+    print(f"\nExporting model to JavaScript ({js_format} format)...")
+    size = export_to_javascript(
+        model, feature_names, JS_MODEL_PATH, js_format, n_jobs, encodings, quantize,
+    )
+    print(f"JavaScript model exported to: {JS_MODEL_PATH} ({size / 1024:.0f} KB)")
 
 def print_training_summary(metrics):
     """
@@ -399,30 +419,95 @@ def print_training_summary(metrics):
         print(f"  {i}. {feature}: {importance:.4f}")
     print("=" * 50)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--js-format', choices=JS_FORMATS, default='arrays',
+                        help="ml_model.js layout: compact node arrays (default) or generated if/else functions")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="processes for rendering the JS export (-1 = all cores)")
+    parser.add_argument('--rebuild-features', action='store_true',
+                        help="re-encode the CSV instead of using the cached feature store")
+    parser.add_argument('--search', action='store_true',
+                        help="pick the forest's hyperparameters from SEARCH_SPACE before training")
+    parser.add_argument('--search-candidates', type=int, default=None,
+                        help="max configurations in the first search round (default: full grid)")
+    parser.add_argument('--search-time', type=float, default=None,
+                        help="wall-clock budget for the search in seconds")
+    parser.add_argument('--train-jobs', type=int, default=-1,
+                        help="processes for the search and cross-validation (-1 = all cores)")
+    parser.add_argument('--encoding', action='append', default=[], metavar='COLUMN=STRATEGY[:PARAM]',
+                        help=f"override CATEGORICAL_ENCODINGS for a column; strategies: {', '.join(ENCODING_STRATEGIES)} "
+                             "(e.g. Company=hash:64, Company=topk:100)")
+    parser.add_argument('--max-nodes', type=int, default=None,
+                        help="compact the forest to at most this many tree nodes")
+    parser.add_argument('--max-js-bytes', type=int, default=None,
+                        help="compact the forest until ml_model.js ('arrays' format) fits in this many bytes")
+    parser.add_argument('--max-p99-ms', type=float, default=None,
+                        help="compact the forest until p99 single-lead scoring fits in this many ms")
+    parser.add_argument('--compress', type=int, default=None, metavar='LEVEL',
+                        help=f"joblib compression level for the saved model "
+                             f"(default: {COMPRESS_LEVEL} when compacting, else 0)")
+    parser.add_argument('--families', default=None, metavar='all|FAMILY,...',
+                        help=f"compare estimator families and ship the best one within --max-latency-ms; "
+                             f"families: {', '.join(FAMILIES)}")
+    parser.add_argument('--max-latency-ms', type=float, default=None,
+                        help="budget on p99 single-lead predict plus SHAP explanation for --families")
+    args = parser.parse_args()
+    if args.families is not None:
+        args.families = list(FAMILIES) if args.families == 'all' else args.families.split(',')
+        unknown = [f for f in args.families if f not in FAMILIES]
+        if unknown:
+            parser.error(f"unknown model families: {', '.join(unknown)}")
+    args.compact = any(v is not None for v in (args.max_nodes, args.max_js_bytes, args.max_p99_ms))
+    if args.compress is None:
+        args.compress = COMPRESS_LEVEL if args.compact else 0
+    try:
+        args.encodings = {**CATEGORICAL_ENCODINGS, **dict(parse_encoding_spec(spec) for spec in args.encoding)}
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
 def main():
     """
     Main training and export pipeline
     """
+    args = parse_args()
     try:
         print("🚀 Starting model training and export process...")
         
         # Step 1: Load and prepare data
-        X, y, df = load_and_prepare_data()
+        X, y, feature_names, schema = load_and_prepare_data(args.rebuild_features, args.encodings)
+        
+        # Step 2: Train model, optionally with searched hyperparameters
+        search = search_model_config(args) if args.search else None
+        config = {**MODEL_CONFIG, **search['best_params']} if search else MODEL_CONFIG
+        estimator_class, selection = RandomForestClassifier, None
+        if args.families:
+            estimator_class, config, selection = select_model_family(X, y, feature_names, config, schema, args)
+        model, metrics = train_model(X, y, feature_names, config, args.train_jobs, estimator_class)
+        metrics['search'] = search
+        metrics['model_selection'] = selection
         
-        # Step 2: Train model
-        model, metrics = train_model(X, y)
+        # Step 3: Optionally compact the forest to a size/latency budget
+        compaction = None
+        if args.compact:
+            model, compaction = compact_model(model, X, y, feature_names, schema, args)
+        metrics['compaction'] = compaction
         
-        # Step 3: Save model and metrics
-        save_model_and_metrics(model, metrics)
+        # Step 4: Save model and metrics
+        model_path = save_model_and_metrics(model, metrics, schema, args.compress)
         
-        # Step 4: Export to JavaScript
-        export_to_javascript(model, X)
+        # Step 5: Export to JavaScript
+        export_js_model(
+            model, feature_names, args.js_format, args.jobs, schema['encodings'],
+            quantize=bool(compaction and compaction['chosen']['quantized']),
+        )
         
-        # Step 5: Print summary
+        # Step 6: Print summary
         print_training_summary(metrics)
         
         print("\n✅ Model training and export completed successfully!")
-        print(f"📦 Python model saved to: {MODEL_PATH}")
+        print(f"📦 Python model saved to: {model_path}")
         print(f"🌐 JavaScript model saved to: {JS_MODEL_PATH}")
         print(f"📊 Metrics saved to: {METRICS_PATH}")
         print(f"🎯 Model accuracy: {metrics['test_accuracy']:.3f}")